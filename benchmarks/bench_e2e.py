@@ -0,0 +1,111 @@
+"""
+端到端基准测试：在本地回放服务器上运行完整爬虫，对比各抓取后端的 页/秒、记录/秒 和内存峰值
+用法: python benchmarks/bench_e2e.py [--records 2000] [--latency 0.05] [--backends http selenium asyncio]
+（asyncio 为 aiohttp 异步引擎，并发数为 --workers）
+不访问真实网站；浏览器后端需要本机有 Chrome，无法启动时跳过
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CONFIG
+from gravelocator import create_sink, crawl_surnames, timings
+from gravelocator.replay import ReplayServer, ReplaySite
+
+import main as scraper_main
+
+SURNAME = "SMITH"
+
+
+def run_backend(backend, server, args, trace_memory=False):
+    """
+    运行一次完整爬取，返回 (耗时, 页数, 记录数, Python内存峰值)
+    tracemalloc 会明显拖慢解析，只在 trace_memory 时开启，此时耗时不可用于对比
+    """
+    site = server.site
+    site.requests.clear()
+    timings.reset()
+    output = tempfile.mkdtemp(prefix="bench_e2e_")
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    # 爬虫逐页打印进度，基准测试时不输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        if backend == "asyncio":
+            ok, records = run_async_engine(output, args)
+        else:
+            scraper = scraper_main.VeteransGravesiteScraper(CONFIG, backend=backend)
+            try:
+                ok = scraper_main.scrape_to_files(scraper, SURNAME, os.path.join(output, "veterans"),
+                                                  max_pages=args.max_pages, min_birth_year=args.min_birth_year)
+            finally:
+                scraper.close()
+            records = scraper.record_count
+    elapsed = time.perf_counter() - start
+    peak = 0
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    if not ok:
+        raise RuntimeError("爬取失败")
+    pages = site.requests.get("search", 0) + site.requests.get("result", 0)
+    return elapsed, pages, records, peak
+
+
+def run_async_engine(output, args):
+    """用 asyncio 引擎爬取，返回 (是否成功, 记录数)"""
+    counts = {}
+    config = dict(CONFIG, max_pages=args.max_pages, min_birth_year=args.min_birth_year,
+                  async_concurrency=args.workers, async_per_host=args.workers)
+    summary = crawl_surnames(config, [SURNAME], lambda surname: create_sink(os.path.join(output, "veterans")),
+                             on_done=lambda surname, count, error: counts.__setitem__(surname, count))
+    return summary["failed"] == 0, counts.get(SURNAME, 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="回放服务器上的端到端基准测试")
+    parser.add_argument("--records", type=int, default=2000, help="回放网站中该姓氏的记录数")
+    parser.add_argument("--latency", type=float, default=0.05, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.2, help="延迟的随机抖动比例")
+    parser.add_argument("--backends", nargs="+", default=["http", "selenium"])
+    parser.add_argument("--workers", type=int, default=CONFIG["workers"])
+    parser.add_argument("--rate", type=float, default=0, help="限速（请求/秒），0 表示不限速")
+    parser.add_argument("--max-pages", type=int, default=1000)
+    parser.add_argument("--min-birth-year", type=int, default=0, help="大于0时按出生年份下推到服务器")
+    parser.add_argument("--parse-processes", type=int, default=0, help="解析进程数，0 表示在抓取线程中解析")
+    parser.add_argument("--no-memory", action="store_true", help="不单独运行一次测量内存峰值")
+    args = parser.parse_args()
+
+    site = ReplaySite(records={SURNAME: args.records}, latency=args.latency, jitter=args.jitter)
+    with ReplayServer(site) as server:
+        CONFIG.update(base_url=server.base_url, workers=args.workers, requests_per_second=args.rate,
+                      parse_processes=args.parse_processes, export_excel=False)
+        print(f"回放服务器: {server.base_url}  记录数 {args.records}  延迟 {args.latency * 1000:.0f}ms  "
+              f"并发 {args.workers}")
+        print(f"{'后端':<12}{'耗时(s)':>10}{'页数':>8}{'页/秒':>10}{'记录数':>8}{'记录/秒':>10}{'内存峰值(MB)':>14}")
+        for backend in args.backends:
+            try:
+                elapsed, pages, records, _ = run_backend(backend, server, args)
+                peak = 0 if args.no_memory else run_backend(backend, server, args, trace_memory=True)[3]
+            except Exception as e:
+                print(f"{backend:<12}跳过: {str(e).splitlines()[0]}")
+                continue
+            print(f"{backend:<12}{elapsed:>10.2f}{pages:>8}{pages / elapsed:>10.1f}{records:>8}"
+                  f"{records / elapsed:>10.1f}{peak / 1e6:>14.1f}")
+
+    # 进程常驻内存峰值（包含浏览器驱动等非 Python 分配，Linux 上单位为 KB）
+    print(f"进程最大常驻内存: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
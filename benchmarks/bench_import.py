@@ -0,0 +1,85 @@
+"""
+启动（导入）耗时基准测试：用 python -X importtime 在新进程中导入各入口模块，
+打印累计耗时和最慢的模块，并检查启动时没有导入较重的可选依赖
+用法: python benchmarks/bench_import.py [--modules cli main] [--budget 40] [--repeat 5] [--top 10]
+超出耗时预算或导入了 HEAVY_MODULES 中的模块时退出码为1（可放在 CI 中防止启动变慢）
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只在用到时才应导入的模块：pandas 等只用于 Excel 导出和分析，selenium 只用于浏览器后端，
+# asyncio / aiohttp 只用于 asyncio 引擎，multiprocessing 只用于多进程解析，http.server 只用于指标端口
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow", "openpyxl", "selenium", "webdriver_manager", "bs4", "requests",
+                 "aiohttp", "asyncio", "multiprocessing", "http.server")
+ENTRY_MODULES = ("gravelocator", "cli", "main", "veterans_scraper", "ixed_scraper")
+
+
+def import_times(module):
+    """
+    在新进程中导入 module，返回 {模块名: (自身耗时us, 累计耗时us)}
+    不包括解释器启动（site 等）的耗时
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        name = name.strip()
+        if name == "site":
+            # 子模块先于父模块输出，site 之前（含 site）都是解释器启动时导入的
+            times.clear()
+            continue
+        times.setdefault(name, (int(self_us), int(cumulative_us)))
+    return times
+
+
+def heavy_imports(times):
+    """times 中属于 HEAVY_MODULES 的顶层模块（包括其子模块）"""
+    return sorted({heavy for heavy in HEAVY_MODULES for name in times
+                   if name == heavy or name.startswith(heavy + ".")})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="入口模块的导入耗时（python -X importtime）")
+    parser.add_argument("--modules", nargs="+", default=list(ENTRY_MODULES))
+    parser.add_argument("--budget", type=float, default=40.0, help="每个模块累计导入耗时上限（毫秒），0 表示不检查")
+    parser.add_argument("--repeat", type=int, default=5, help="每个模块导入次数，取最小值以减少噪声")
+    parser.add_argument("--top", type=int, default=10, help="打印累计耗时最多的模块数")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'模块':<20}{'导入耗时(ms)':>14}{'模块数':>8}  较重的依赖")
+    slowest = {}
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(max(args.repeat, 1))]
+        times = min(runs, key=lambda run: run[module][1])
+        elapsed = times[module][1] / 1000
+        heavy = heavy_imports(times)
+        over_budget = args.budget and elapsed > args.budget
+        failed = failed or bool(heavy) or over_budget
+        note = ", ".join(heavy) or "-"
+        if over_budget:
+            note += f"  超出预算 {args.budget:.0f}ms"
+        print(f"{module:<20}{elapsed:>14.1f}{len(times):>8}  {note}")
+        slowest[module] = times
+
+    for module, times in slowest.items() if args.top > 0 else ():
+        print(f"\n{module} 累计耗时最多的模块:")
+        ranked = sorted(((cumulative, own, name) for name, (own, cumulative) in times.items() if name != module),
+                        reverse=True)
+        for cumulative, own, name in ranked[:args.top]:
+            print(f"  {name:<40}{cumulative / 1000:>10.1f}ms  (自身 {own / 1000:.1f}ms)")
+
+    if failed:
+        print("\n启动耗时检查未通过")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
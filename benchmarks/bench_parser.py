@@ -0,0 +1,265 @@
+"""
+结果页解析基准测试：在一组结果页上对比原 BeautifulSoup(html.parser) 解析路径与各解析后端（PARSER_BACKENDS）
+页面包括真实抓取的页面（debug_page.html、--pages 指定的文件或目录）和合成页面：
+每页 10~1000 条记录，以及缺少字段 / 空值 / 标签写法不一致（无冒号、多余空白、嵌套标签、&nbsp;）的页面
+每个解析器报告每页耗时、记录/秒、内存分配峰值，并检查所有解析器得到相同的记录
+（原 bs4 解析路径有已知差异：main 丢掉每条记录的最后一行，get_text(strip=True) 把嵌套标签的文字直接拼接，
+只报告不一致的记录数，不算失败）
+
+用法: python benchmarks/bench_parser.py [--pages 文件或目录 ...] [--sizes 10 100 1000]
+      [--save-baseline base.json] [--baseline base.json] [--tolerance 0.3] [--min-speedup 3]
+以下情况退出码为1：解析后端之间结果不一致；默认后端比原 bs4 解析快不到 --min-speedup 倍；
+给出 --baseline 时，解析后端的耗时或内存峰值比基线多出 --tolerance 以上
+"""
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gravelocator.parser import DEFAULT_BACKEND, PARSER_BACKENDS, parse_results
+from gravelocator.replay import DEFAULT_TEMPLATE, generate_decedents, render_record
+
+ITEM_NUMBER_CLASS = 'table_row_labels item-number text-center'
+_SPACES_RE = re.compile(r'\s+')
+_TBODY_RE = re.compile(r'(<table[^>]*\bid="searchResults".*?<tbody[^>]*>).*?(</tbody>)', re.S)
+_ROW_RE = re.compile(r'\n\t*<tr>\n\t*<th scope="row" class="p-0 m-0 row-header">.*?</tr>\n', re.S)
+_LABEL_RE = re.compile(r'(<th scope="row" class="p-0 m-0 row-header"><div class="p-2">)(.*?)(</div></th>)', re.S)
+_VALUE_RE = re.compile(r'(<td class="results-info m-0 p-0"><div class="p-2">)(.*?)(</div></td>)', re.S)
+
+
+def legacy_main(page_html):
+    """main.parse_results_page 原来的做法：find_parent / find_next_sibling / str(row)"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_html, 'html.parser')
+    tbody = soup.find('table', {'id': 'searchResults'}).find('tbody')
+    records = []
+    for record_start in tbody.find_all('th', class_=ITEM_NUMBER_CLASS):
+        current_row = record_start.find_parent('tr')
+        record = {}
+        while current_row:
+            next_row = current_row.find_next_sibling('tr')
+            if next_row and 'horizontal-line' in str(next_row):
+                break
+            if next_row and next_row.find('th', class_=ITEM_NUMBER_CLASS):
+                break
+            cells = current_row.find_all(['th', 'td'])
+            if len(cells) >= 2:
+                label_div = cells[-2].find('div', class_='p-2')
+                value_div = cells[-1].find('div', class_='p-2')
+                if label_div and value_div:
+                    record[label_div.get_text(strip=True).replace(':', '')] = value_div.get_text(strip=True)
+            current_row = next_row
+        records.append(record)
+    return records
+
+
+def legacy_ixed(page_html):
+    """ixed_scraper.parse_page 原来的做法：整个文档 find_all('tr')"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(page_html, 'html.parser')
+    records = []
+    current = None
+    for tr in soup.find_all('tr'):
+        if tr.find('th', class_=ITEM_NUMBER_CLASS):
+            current = {}
+            records.append(current)
+        ths = tr.find_all('th', class_='row-header')
+        tds = tr.find_all('td', class_='results-info')
+        if current is not None and ths and tds:
+            current[ths[0].get_text(strip=True)] = tds[0].get_text(strip=True)
+    return records
+
+
+def parsers():
+    """[(名称, 解析函数, 是否为解析后端)]；没有安装 bs4 时不对比原解析路径"""
+    candidates = []
+    try:
+        import bs4  # noqa: F401
+        candidates += [('bs4 main.parse_results_page', legacy_main, False),
+                       ('bs4 ixed_scraper.parse_page', legacy_ixed, False)]
+    except ImportError:
+        print("没有安装 bs4，跳过原解析路径")
+    for backend in PARSER_BACKENDS:
+        candidates.append((f'parse_results[{backend}]', lambda h, b=backend: list(parse_results(h, b)), True))
+    return candidates
+
+
+def _clean(text):
+    return _SPACES_RE.sub(' ', text).strip()
+
+
+def normalized(records):
+    """
+    各解析器的结果统一为 [{标签: 值}]：空白合并、标签去掉末尾冒号
+    （原 bs4 解析不合并值中的空白，ixed_scraper 的标签保留冒号）
+    """
+    result = []
+    for record in records:
+        details = record if isinstance(record, dict) else record.details
+        result.append({_clean(label).rstrip(':').strip(): _clean(value) for label, value in details.items()})
+    return result
+
+
+def _odd_record(record_html, rng):
+    """把一条记录改成不规范的写法：删掉部分字段、空值，标签写法不一致、值中有实体和多余空白"""
+    rows = _ROW_RE.findall(record_html)
+    for row in rows:
+        roll = rng.random()
+        if roll < 0.15:
+            record_html = record_html.replace(row, '', 1)
+        elif roll < 0.25:
+            record_html = record_html.replace(row, _VALUE_RE.sub(r'\1\3', row), 1)
+    labels = [
+        lambda label: label.rstrip(':'),
+        lambda label: f'\n\t\t{label.replace(" ", chr(10) + "  ")} ',
+        lambda label: f'<span class="label">{label[:-1]}</span>:',
+        lambda label: label.replace(' ', '&nbsp;', 1),
+        lambda label: f'{label[:-1]} :',
+    ]
+
+    def odd_label(match):
+        if match.group(2).startswith('Name') or rng.random() < 0.5:
+            return match.group(0)
+        return match.group(1) + rng.choice(labels)(match.group(2)) + match.group(3)
+
+    record_html = _LABEL_RE.sub(odd_label, record_html)
+    if rng.random() < 0.3:
+        extra = ('\n<tr>\n<th scope="row" class="p-0 m-0 row-header"><div class="p-2">Relationships:</div></th>'
+                 '\n<td class="results-info m-0 p-0"><div class="p-2">SPOUSE OF  O&#39;NEIL &amp; SONS\n'
+                 '  <b>VETERAN</b></div></td>\n</tr>\n')
+        record_html = record_html.replace('\n\t\t\t\t\t\t<tr tabindex="-1">', extra + '\n\t\t\t\t\t\t<tr tabindex="-1">', 1)
+    return record_html
+
+
+def synthetic_page(template, count, odd=False, seed=0):
+    """以真实页面为模板，替换结果表格为 count 条生成的记录；odd 时每条记录改为不规范的写法"""
+    rng = random.Random(seed)
+    people = generate_decedents('SMITH', count, seed)
+    rows = ''.join(_odd_record(render_record(i + 1, person), rng) if odd else render_record(i + 1, person)
+                   for i, person in enumerate(people))
+    return _TBODY_RE.sub(lambda match: match.group(1) + rows + match.group(2), template, count=1)
+
+
+def corpus(paths, sizes):
+    """[(页面名, HTML)]：真实页面 + 每种记录数的规范页面和不规范页面"""
+    files = []
+    for path in paths:
+        files += sorted(glob.glob(os.path.join(path, '*.html'))) if os.path.isdir(path) else [path]
+    pages = []
+    for path in files:
+        with open(path, encoding='utf-8') as f:
+            pages.append((os.path.basename(path), f.read()))
+    with open(DEFAULT_TEMPLATE, encoding='utf-8') as f:
+        template = f.read()
+    for size in sizes:
+        pages.append((f'synthetic-{size}', synthetic_page(template, size)))
+        pages.append((f'odd-{size}', synthetic_page(template, size, odd=True, seed=size)))
+    return pages
+
+
+def timeit(func, page_html, min_time=0.2, max_repeat=50):
+    """每次解析耗时的中位数（秒）和解析结果；预热后重复到累计超过 min_time 秒"""
+    result = func(page_html)  # 预热
+    samples = []
+    while not samples or (sum(samples) < min_time and len(samples) < max_repeat):
+        start = time.perf_counter()
+        func(page_html)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result
+
+
+def peak_allocation(func, page_html):
+    """解析一次的 Python 内存分配峰值（字节）"""
+    tracemalloc.start()
+    try:
+        func(page_html)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def check_baseline(results, baseline, tolerance):
+    """解析后端与基线对比，返回超出容差的项"""
+    regressions = []
+    for key, values in results.items():
+        old = baseline.get(key)
+        if not old:
+            continue
+        for metric in ('ms', 'peak_kb'):
+            if old[metric] and values[metric] > old[metric] * (1 + tolerance):
+                regressions.append(f"{key}: {metric} {old[metric]:.3f} -> {values[metric]:.3f}")
+    return regressions
+
+
+def main():
+    default_page = os.path.join(os.path.dirname(DEFAULT_TEMPLATE), 'debug_page.html')
+    parser = argparse.ArgumentParser(description="结果页解析器的耗时、吞吐量、内存峰值和结果一致性")
+    parser.add_argument('--pages', nargs='+', default=[default_page], help="真实页面文件或目录（目录中的 *.html）")
+    parser.add_argument('--sizes', nargs='+', type=int, default=[10, 100, 1000], help="合成页面的记录数")
+    parser.add_argument('--min-time', type=float, default=0.2, help="每个解析器每页至少计时的秒数")
+    parser.add_argument('--min-speedup', type=float, default=3.0,
+                        help=f"默认后端（{DEFAULT_BACKEND}）至少比原 bs4 解析快几倍，0 表示不检查")
+    parser.add_argument('--baseline', help="基线 JSON（--save-baseline 生成），解析后端变慢或内存增加时失败")
+    parser.add_argument('--tolerance', type=float, default=0.3, help="相对基线允许的增加比例")
+    parser.add_argument('--save-baseline', help="把本次解析后端的结果保存为基线 JSON")
+    args = parser.parse_args()
+
+    pages = corpus(args.pages, args.sizes)
+    candidates = parsers()
+    failures = []
+    results = {}
+    print(f"{'页面':<18}{'解析器':<32}{'每页耗时(ms)':>14}{'记录数':>8}{'记录/秒':>12}{'内存峰值(KB)':>14}{'不一致':>8}")
+    for page_name, page_html in pages:
+        expected = normalized(parse_results(page_html, DEFAULT_BACKEND))
+        reference = list(parse_results(page_html, DEFAULT_BACKEND))
+        elapsed_by_parser = {}
+        for name, func, is_backend in candidates:
+            elapsed, records = timeit(func, page_html, args.min_time)
+            count = len(records)
+            peak = peak_allocation(func, page_html)
+            # 解析后端之间要求 VeteranRecord 完全相同，原解析路径只比较标签和值并报告不一致的记录数
+            if is_backend:
+                differing = sum(a != b for a, b in zip(records, reference)) + abs(count - len(reference))
+                if differing:
+                    failures.append(f"{page_name}: {name} 有 {differing} 条记录与 {DEFAULT_BACKEND} 不一致")
+            else:
+                records = normalized(records)
+                differing = sum(a != b for a, b in zip(records, expected)) + abs(count - len(expected))
+            elapsed_by_parser[name] = elapsed
+            if is_backend:
+                results[f"{page_name}/{name}"] = {'ms': elapsed * 1000, 'peak_kb': peak / 1024}
+            print(f"{page_name:<18}{name:<32}{elapsed * 1000:>14.3f}{count:>8}"
+                  f"{count / elapsed if elapsed else 0:>12.0f}{peak / 1024:>14.1f}{differing or '-':>8}")
+
+        legacy = [elapsed for name, elapsed in elapsed_by_parser.items() if name.startswith('bs4')]
+        default = elapsed_by_parser[f'parse_results[{DEFAULT_BACKEND}]']
+        if args.min_speedup and legacy and min(legacy) / default < args.min_speedup:
+            failures.append(f"{page_name}: {DEFAULT_BACKEND} 只比 bs4 快 {min(legacy) / default:.1f} 倍"
+                            f"（要求 {args.min_speedup:.1f} 倍）")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            failures += check_baseline(results, json.load(f), args.tolerance)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"基线已保存: {args.save_baseline}")
+
+    if failures:
+        print("\n检查未通过:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,54 @@
+"""
+后处理与统计基准测试：对比逐条处理（原 process_data / get_summary 的做法）与整列向量化处理
+用法: python benchmarks/bench_summary.py [记录数，默认 2000000]
+记录由回放网站的页面解析得到，再重复到指定条数
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from gravelocator import RecordStore, SearchState, parse_results
+from gravelocator.analysis import process_frame, summarize
+from gravelocator.replay import ReplaySite
+from gravelocator.sinks import output_row
+
+
+def sample_records():
+    site = ReplaySite(records={"SMITH": 1000})
+    state = SearchState.for_last_name("SMITH")
+    return [record.to_dict() for page in range(1, 101) for record in parse_results(site.render_results(state, page))]
+
+
+def per_record(store, min_birth_year):
+    """逐条拆分姓名、按出生年份过滤、计数"""
+    counts = {}
+    rows = [output_row(record) for record in store if record['Birth_Year'] >= min_birth_year]
+    for row in rows:
+        for key in (row['Rank_Branch'], row['Cemetery'], row['Birth_Year'] // 10 * 10, row['Cemetery_State']):
+            counts[key] = counts.get(key, 0) + 1
+    return len(rows)
+
+
+def vectorized(store, min_birth_year):
+    return summarize(process_frame(store.to_pandas(), min_birth_year))['records']
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    records = sample_records()
+    store = RecordStore()
+    for _ in range(total // len(records)):
+        store.write_page(records)
+    print(f"记录数: {len(store)}")
+
+    print(f"{'方式':<16}{'耗时(s)':>10}{'结果数':>12}")
+    for name, func in (('逐条处理', per_record), ('整列向量化', vectorized)):
+        start = time.perf_counter()
+        count = func(store, 1950)
+        print(f"{name:<16}{time.perf_counter() - start:>10.2f}{count:>12}")
+
+
+if __name__ == '__main__':
+    main()
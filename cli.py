@@ -0,0 +1,166 @@
+"""
+无交互的命令行入口（可由定时任务、多个工作进程运行）
+
+    python cli.py SMITH JONES --max-pages 50 --min-birth-year 1980 --output-dir data/run1
+    python cli.py -f surnames.txt --jobs 4 --backend http --format csv parquet
+    python cli.py -f surnames.txt --shard 0/8      # 8 个进程各处理姓氏列表的 1/8
+    python cli.py -f surnames.txt --refresh        # 增量模式
+    python cli.py -f surnames.txt --set dedup=false --set requests_per_second=1
+    python cli.py --reparse archive/pages.tar data/page_cache/objects   # 离线重新解析存档的页面
+
+退出码: 0 全部成功，1 有姓氏失败（下次运行从断点继续），2 参数错误，3 运行出错，130 被中断
+"""
+import argparse
+import json
+import os
+import sys
+import traceback
+from typing import Dict, List, Optional
+
+import main as runner
+from config import CONFIG
+from gravelocator import read_surnames
+from gravelocator.fetchers import FETCHER_FACTORIES
+from gravelocator.sinks import SINK_TYPES
+
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_ERROR = 3
+EXIT_INTERRUPTED = 130
+
+
+def parse_value(text: str):
+    """--set 的值按 JSON 解析（数字、true/false/null、列表），不是合法 JSON 时作为字符串"""
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_shard(text: str) -> tuple:
+    """"K/N" -> (K, N)，0 <= K < N"""
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"分片格式应为 K/N: {text}")
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"分片编号应在 0 到 {count - 1} 之间: {text}")
+    return index, count
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Nationwide Gravesite Locator 爬虫（无交互）",
+                                     epilog="退出码: 0 全部成功，1 有姓氏失败，2 参数错误，3 运行出错，130 被中断")
+    parser.add_argument("surnames", nargs="*", metavar="SURNAME", help="要搜索的姓氏（begins with）")
+    parser.add_argument("-f", "--surname-file", action="append", default=[],
+                        help="姓氏列表文件，每行一个，# 开头为注释（可重复）")
+    parser.add_argument("--refresh", action="store_true", help="增量模式：只抓取有变化的搜索，输出增量文件")
+    parser.add_argument("--reparse", nargs="+", metavar="PATH",
+                        help="离线模式：重新解析目录或归档（.tar / .zip / 页面缓存）中的原始结果页，不访问网络")
+    parser.add_argument("--shard", type=parse_shard, metavar="K/N",
+                        help="只处理姓氏列表中第 K 份（共 N 份），多个进程分担同一个列表")
+
+    group = parser.add_argument_group("CONFIG 覆盖")
+    group.add_argument("--max-pages", type=int, help="每次搜索最多爬取的页数 (max_pages)")
+    group.add_argument("--min-birth-year", type=int, help="出生年份下限 (min_birth_year)")
+    group.add_argument("--wait-timeout", type=float, help="请求/页面等待超时秒数 (wait_timeout)")
+    group.add_argument("--output-dir", help="输出目录 (output_dir)")
+    group.add_argument("--backend", choices=sorted(FETCHER_FACTORIES), help="抓取后端 (backend)")
+    group.add_argument("--engine", choices=["threads", "asyncio"], help="批量爬取引擎 (engine)")
+    group.add_argument("--format", nargs="+", choices=sorted(SINK_TYPES), dest="formats",
+                       help="输出格式，可多个 (output_formats)")
+    group.add_argument("-j", "--jobs", type=int,
+                       help="同时处理的姓氏数 (batch_workers / async_surnames)")
+    group.add_argument("--concurrency", type=int,
+                       help="每个姓氏同时抓取的页数 (workers)；asyncio 引擎为同时在途的请求数 (async_concurrency)")
+    group.add_argument("--rate", type=float, help="全局限速，每秒请求数 (requests_per_second)，0 表示不限速")
+    group.add_argument("--checkpoint-db", help="断点记录文件 (checkpoint_db)")
+    group.add_argument("--no-excel", action="store_true", help="不另外生成 Excel (export_excel=false)")
+    group.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                       help="覆盖任意 CONFIG 项，值按 JSON 解析，例如 --set dedup=false（可重复）")
+    return parser
+
+
+def config_overrides(args: argparse.Namespace) -> Dict:
+    """由命令行参数得到要覆盖的 CONFIG 项"""
+    overrides = {}
+    for key, value in (("max_pages", args.max_pages), ("min_birth_year", args.min_birth_year),
+                       ("wait_timeout", args.wait_timeout), ("output_dir", args.output_dir),
+                       ("backend", args.backend), ("engine", args.engine), ("output_formats", args.formats),
+                       ("requests_per_second", args.rate), ("checkpoint_db", args.checkpoint_db)):
+        if value is not None:
+            overrides[key] = value
+    if args.jobs is not None:
+        overrides["batch_workers"] = overrides["async_surnames"] = args.jobs
+    if args.concurrency is not None:
+        overrides["workers"] = overrides["async_concurrency"] = args.concurrency
+    if args.no_excel:
+        overrides["export_excel"] = False
+    for item in args.set:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            raise ValueError(f"--set 的格式应为 KEY=VALUE: {item}")
+        if key not in CONFIG:
+            raise ValueError(f"未知的配置项: {key}")
+        overrides[key] = parse_value(value)
+    if args.shard and args.checkpoint_db is None and "checkpoint_db" not in overrides:
+        # 各分片使用各自的断点记录，避免多个进程同时写一个 SQLite 文件
+        root, ext = os.path.splitext(CONFIG["checkpoint_db"])
+        overrides["checkpoint_db"] = f"{root}.shard{args.shard[0]}of{args.shard[1]}{ext}"
+    return overrides
+
+
+def select_surnames(args: argparse.Namespace) -> List[str]:
+    """命令行和文件中的姓氏（大写、去重并保持顺序），设置 --shard 时只取其中一份"""
+    surnames = [surname.strip().upper() for surname in args.surnames if surname.strip()]
+    for path in args.surname_file:
+        surnames.extend(read_surnames(path))
+    surnames = list(dict.fromkeys(surnames))
+    if args.shard:
+        index, count = args.shard
+        surnames = surnames[index::count]
+    return surnames
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """解析参数、覆盖 CONFIG 并运行，返回退出码"""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if not args.surnames and not args.surname_file and not args.reparse:
+        parser.print_usage(sys.stderr)
+        print("需要姓氏、--surname-file 或 --reparse", file=sys.stderr)
+        return EXIT_USAGE
+    try:
+        overrides = config_overrides(args)
+        surnames = select_surnames(args)
+    except (OSError, ValueError) as e:
+        print(f"参数错误: {str(e)}", file=sys.stderr)
+        return EXIT_USAGE
+    if not surnames and not args.reparse:
+        print("没有要处理的姓氏")
+        return EXIT_OK
+
+    CONFIG.update(overrides)
+    if CONFIG.get("metrics_port"):
+        runner.serve_metrics(CONFIG["metrics_port"])
+    try:
+        if args.reparse:
+            ok = runner.reparse_archives(args.reparse)
+        elif args.refresh:
+            ok = runner.refresh_surnames(surnames)
+        else:
+            ok = runner.search_surnames(surnames)
+    except KeyboardInterrupt:
+        print("已中断，下次运行从断点继续", file=sys.stderr)
+        return EXIT_INTERRUPTED
+    except Exception as e:
+        print(f"运行出错: {str(e)}", file=sys.stderr)
+        traceback.print_exc()
+        return EXIT_ERROR
+    return EXIT_OK if ok else EXIT_FAILED
+
+
+if __name__ == "__main__":
+    sys.exit(main())
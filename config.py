@@ -2,9 +2,43 @@
 CONFIG = {
     "driver_path": "chromedriver",  # ChromeDriver路径
     "base_url": "https://gravelocator.cem.va.gov/ngl",
+    "backend": "auto",  # 抓取后端: http / selenium / auto (HTTP优先，失败时退回浏览器)
+    "parser": None,  # 解析后端: lxml / stdlib，None 表示有 lxml 时用 lxml
+    "parse_processes": 0,  # 解析进程数，>0 时解析在独立进程中与抓取同时进行，0 表示在抓取线程中解析
+    "parse_compress": False,  # 多进程解析时先压缩页面再传给解析进程
+    "filters": ["complete", "min_birth_year"],  # 记录过滤器，按顺序应用
+    "http_pool_size": 10,  # HTTP连接池大小
+    "driver_pool_size": 2,  # 浏览器池大小（多次搜索共用）
+    "driver_recycle_pages": 200,  # 每个浏览器处理多少页后重建
+    "workers": 4,  # 并发抓取结果页的线程数（浏览器后端固定为1）
+    "requests_per_second": 2.0,  # 全局限速，每秒最多请求数
     "wait_timeout": 15,
     "page_load_delay": 3,
     "max_pages": 100,  # 最大爬取页数
     "min_birth_year": 1980,
-    "output_dir": "data"
-}
\ No newline at end of file
+    "retry_attempts": 3,  # 每个请求最多尝试次数（超时、连接错误、5xx、页面不完整时重试）
+    "retry_backoff": 0.5,  # 第一次重试前等待的秒数，之后每次加倍（带随机抖动）
+    "retry_max_delay": 30,  # 重试等待时间上限（秒）
+    "circuit_threshold": 10,  # 连续失败多少次后熔断（暂停请求），0 表示不熔断
+    "circuit_reset": 60,  # 熔断后等待多少秒再试探
+    "requeue_failed": True,  # 抓完全部页后补抓失败的页（只补抓这些页）
+    "query_planner": True,  # 搜索结果超过 max_pages 时按姓名（精确匹配 + 更长的前缀）拆分，避免结果被截断
+    "page_cache_dir": None,  # 原始页面缓存目录（例如 "data/page_cache"），None 表示不缓存
+    "page_cache_ttl": 86400,  # 缓存有效期（秒），过期后重新抓取
+    "page_cache_max_mb": 500,  # 缓存大小上限（压缩后），超出时淘汰最久未使用的页
+    "cache_only": False,  # 只从缓存读取、不访问网络（修改解析器后重新解析）
+    "dedup": True,  # 按 姓名+出生日期+死亡日期+墓地 去重（跨页、跨姓氏）
+    "dedup_db": None,  # 去重索引持久化文件（例如 "data/dedup.sqlite"），跨多次运行去重；None 表示只在本次运行内去重
+    "output_dir": "data",
+    "output_formats": ["csv"],  # 逐页写出的格式: csv / parquet（parquet 需要 pyarrow）
+    "export_excel": True,  # 爬取结束后由输出文件另外生成 Excel（需要 openpyxl）
+    "batch_workers": 2,  # 批量模式同时处理的姓氏数
+    "engine": "threads",  # 批量模式的爬取引擎: threads / asyncio（asyncio 需要 aiohttp，只支持HTTP后端）
+    "async_concurrency": 100,  # asyncio 引擎同时在途的请求数
+    "async_per_host": 20,  # asyncio 引擎每个主机的连接数上限
+    "async_surnames": 20,  # asyncio 引擎同时处理的姓氏数
+    "metrics_file": None,  # 每次运行结束追加一行 JSON 指标（例如 "data/metrics.jsonl"），None 表示不写
+    "metrics_port": None,  # 提供 Prometheus 文本格式指标的端口（例如 9108），None 表示不启动
+    "checkpoint_db": "data/checkpoint.sqlite",  # 批量模式断点记录
+    "incremental_db": "data/incremental.sqlite",  # 增量模式（--refresh）保存的上次结果指纹
+}
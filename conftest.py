@@ -0,0 +1,26 @@
+import pytest
+
+from config import CONFIG
+from gravelocator import RecordSink
+
+
+class ListSink(RecordSink):
+    """把写出的各页记录保存在列表中；pages 可以由调用方传入（多个 sink 共用一个列表）"""
+
+    def __init__(self, pages=None):
+        self.pages = [] if pages is None else pages
+
+    def write_page(self, records):
+        self.pages.append(records)
+
+    @property
+    def records(self):
+        return [record for page in self.pages for record in page]
+
+
+@pytest.fixture
+def restore_config():
+    saved = dict(CONFIG)
+    yield
+    CONFIG.clear()
+    CONFIG.update(saved)
@@ -0,0 +1,47 @@
+# Nationwide Gravesite Locator 爬虫公共模块
+from .search import SearchState, NAME_OPT_EXACT, NAME_OPT_BEGINS_WITH, birth_year_states
+from .pages import is_result_page, page_tokens, page_links, next_page_url, result_summary, total_pages
+from .driver_pool import DriverPool, cached_driver_path
+from .fetchers import (FetchError, IncompletePageError, PageFetcher, HttpFetcher, SeleniumFetcher, FallbackFetcher,
+                       create_fetcher, register_fetcher)
+from .metrics import StageTimer, timings, error_category, serve_metrics
+from .retry import RetryPolicy, CircuitBreaker, CircuitOpenError, call_with_retry
+from .scheduler import RateLimiter, AdaptiveRateLimiter, PageScheduler
+from .schema import RECORD_SCHEMA, RECORD_COLUMNS, parse_date, cemetery_id
+from .parser import VeteranRecord, parse_results, parse_birth_year, register_parser
+from .checkpoint import CheckpointStore
+from .batch import read_surnames, run_batch, covered_surnames, SurnameTrie
+from .sinks import (RecordSink, CsvSink, ParquetSink, MultiSink, create_sink, export_excel, extract_name_parts,
+                    output_row, register_sink)
+from .filters import RecordFilter, CompleteRecordFilter, BirthYearFilter, create_filters, register_filter
+from .dedup import DedupIndex, record_identity, dict_identity
+from .record_store import RecordStore
+from .page_cache import PageCache, page_digest
+from .parse_pool import ParsePool, compress_page
+from .pipeline import Pipeline
+from .planner import QueryPlanner, PlannedQuery
+
+# 依赖较重或只在特定模式下使用的模块（asyncio 引擎、离线重新解析）在第一次访问时才导入，
+# 只用 HTTP/浏览器后端和 CSV 输出的短时间批量进程不必为它们付出启动时间
+_LAZY_EXPORTS = {
+    "AsyncHttpFetcher": ".async_engine",
+    "AsyncCrawler": ".async_engine",
+    "crawl_surnames": ".async_engine",
+    "ingest_pages": ".ingest",
+    "scan_pages": ".ingest",
+    "results_region": ".ingest",
+}
+
+
+def __getattr__(name):
+    module = _LAZY_EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_EXPORTS))
@@ -0,0 +1,145 @@
+"""
+整列（向量化）的后处理与统计：姓名拆分、日期解析、出生年份过滤、按军种/墓地/出生年代/州计数
+输入为 RecordStore.to_pandas() 或输出文件读入的 DataFrame，需要 numpy + pandas
+"""
+import os
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pyarrow 可选，没有时用 pandas 的字符串方法（较慢）
+    pa = None
+
+
+# Rank_Branch 中的军种部分: "LT COL US AIR FORCE" -> "US AIR FORCE"
+_BRANCH_PATTERN = r'\b(US\s.+|USMC.*|USAF.*|USN.*|USA\b.*)$'
+_STATE_PATTERN = r',\s*([A-Z]{2})\s+\d{5}(?:-\d{4})?\s*$'
+
+
+def load_frame(path: str) -> pd.DataFrame:
+    """读入输出文件（CSV 全部按字符串读入，Parquet 保留列类型）"""
+    if os.path.splitext(path)[1] == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def split_names(full_names: pd.Series) -> pd.DataFrame:
+    """整列拆分 "MICHAEL, BERNARD EDWARD" -> Last_Name / First_Name（没有逗号时名为空）"""
+    if pa is None:
+        parts = full_names.fillna('').astype(str).str.split(',', n=1, expand=True)
+        if parts.shape[1] == 1:
+            parts[1] = ''
+        return pd.DataFrame({'Last_Name': parts[0].str.strip(),
+                             'First_Name': parts[1].fillna('').str.strip()}, index=full_names.index)
+
+    names = pc.fill_null(pa.array(full_names, from_pandas=True), '')
+    # 没有逗号的姓名末尾补一个逗号，使每个姓名都恰好拆成两部分
+    names = pc.if_else(pc.match_substring(names, ','), names,
+                       pc.binary_join_element_wise(names, pa.scalar('', names.type), pa.scalar(',', names.type)))
+    parts = pc.split_pattern(names, ',', max_splits=1)
+    return pd.DataFrame({'Last_Name': pd.array(pc.utf8_trim_whitespace(pc.list_element(parts, 0)),
+                                               dtype=pd.StringDtype('pyarrow')),
+                         'First_Name': pd.array(pc.utf8_trim_whitespace(pc.list_element(parts, 1)),
+                                                dtype=pd.StringDtype('pyarrow'))}, index=full_names.index)
+
+
+def map_categories(values: pd.Series, func) -> pd.Series:
+    """
+    对取值很少的列做字符串变换：func 只作用于不重复的取值（类别），再按编码展开，
+    代价与记录数基本无关；返回 category 列，func 结果为空的记为缺失
+    """
+    categorical = values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype('category')
+    mapped = func(pd.Series(categorical.cat.categories.astype(str)))
+    inverse, uniques = pd.factorize(mapped)
+    codes = categorical.cat.codes.to_numpy()
+    return pd.Series(pd.Categorical.from_codes(np.where(codes >= 0, inverse[codes], -1), uniques),
+                     index=values.index)
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """整列解析日期：MM/DD/YYYY 或 ISO 格式（CSV 中的 Birth_Date）字符串、已解析的日期，无法解析的为 NaT"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    if values.dtype == object and values.map(lambda value: not isinstance(value, str)).any():
+        return pd.to_datetime(values, errors='coerce')
+    parsed = pd.to_datetime(values, format='%m/%d/%Y', errors='coerce')
+    rest = parsed.isna() & values.notna() & (values != '')
+    if rest.any():
+        parsed[rest] = pd.to_datetime(values[rest], format='ISO8601', errors='coerce')
+    return parsed
+
+
+def process_frame(df: pd.DataFrame, min_birth_year: Optional[int] = None) -> pd.DataFrame:
+    """
+    整列后处理，返回新的 DataFrame（不修改输入）：
+    - Last_Name / First_Name：拆分 Full_Name
+    - Birth_Date / Death_Date：日期列（CSV 读入的字符串在这里统一解析）
+    - Birth_Year：由出生日期得到，未知为0
+    - Branch：Rank_Branch 中的军种；Cemetery_State：墓地地址中的州（缺少时由地址解析）
+    min_birth_year: 只保留出生年份不早于该年份的记录
+    """
+    out = df.copy(deep=False)
+    out[['Last_Name', 'First_Name']] = split_names(df['Full_Name'])
+    out['Birth_Date'] = parse_dates(df['Birth_Date'] if 'Birth_Date' in df else df['Date_of_Birth'])
+    if 'Death_Date' in df or 'Date_of_Death' in df:
+        out['Death_Date'] = parse_dates(df['Death_Date'] if 'Death_Date' in df else df['Date_of_Death'])
+    out['Birth_Year'] = out['Birth_Date'].dt.year.fillna(0).astype(np.int32)
+
+    out['Branch'] = map_categories(df['Rank_Branch'], lambda ranks: ranks.str.extract(
+        _BRANCH_PATTERN, expand=False).str.strip().fillna(ranks.str.strip()))
+    if 'Cemetery_State' not in df and 'Cemetery_Address' in df:
+        out['Cemetery_State'] = map_categories(df['Cemetery_Address'], lambda addresses: addresses.str.extract(
+            _STATE_PATTERN, expand=False))
+
+    if min_birth_year:
+        out = out[out['Birth_Year'] >= min_birth_year]
+    return out
+
+
+def _counts(values: pd.Series) -> pd.Series:
+    """按取值计数（降序），空值和空字符串不计"""
+    values = values[values.notna() & (values.astype(str) != '')]
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.remove_unused_categories()
+    return values.value_counts()
+
+
+def summarize(df: pd.DataFrame) -> Dict:
+    """
+    统计（df 为 process_frame 的结果）：
+    records / birth_year_range / by_branch / by_cemetery / by_decade / by_state
+    """
+    years = df['Birth_Year'][df['Birth_Year'] > 0]
+    decades = (years // 10 * 10).value_counts().sort_index()
+    # 按规范化的墓地标识计数（FT. / FORT 写法不同的同一墓地合并）
+    cemetery = df['Cemetery_ID'] if 'Cemetery_ID' in df else df.get('Cemetery', pd.Series(dtype=str))
+    state = df['Cemetery_State'] if 'Cemetery_State' in df else pd.Series(dtype=str)
+    return {
+        'records': len(df),
+        'birth_year_range': (int(years.min()), int(years.max())) if len(years) else None,
+        'by_branch': _counts(df['Branch']),
+        'by_cemetery': _counts(cemetery),
+        'by_decade': decades,
+        'by_state': _counts(state),
+    }
+
+
+def print_summary(summary: Dict, top: int = 5):
+    """打印统计结果，每项只列出前 top 个"""
+    print(f"总记录数: {summary['records']}")
+    if summary['birth_year_range']:
+        print(f"出生年份范围: {summary['birth_year_range'][0]} - {summary['birth_year_range'][1]}")
+    print_counts(summary, top)
+
+
+def print_counts(summary: Dict, top: int = 5):
+    """只打印分类计数"""
+    for key, title in (('by_branch', '军种'), ('by_cemetery', '墓地'), ('by_decade', '出生年代'), ('by_state', '州')):
+        counts = summary[key]
+        if len(counts):
+            items = ', '.join(f"{value}: {count}" for value, count in counts.head(top).items())
+            print(f"按{title}: {items}")
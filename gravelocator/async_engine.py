@@ -0,0 +1,437 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from .dedup import DedupIndex
+from .driver_pool import DEFAULT_USER_AGENT
+from .fetchers import DEFAULT_BASE_URL, FetchError, IncompletePageError, parse_search_form
+from .filters import RecordFilter, create_filters, min_birth_year
+from .metrics import timings
+from .pages import is_result_page, page_tokens, result_summary, total_pages
+from .page_cache import PageCache
+from .parse_pool import ParsePool
+from .pipeline import process_page
+from .retry import RETRYABLE_ERRORS, CircuitBreaker, CircuitOpenError, RetryPolicy
+from .scheduler import AdaptiveRateLimiter, RateLimiter
+from .search import SearchState, birth_year_states
+from .sinks import RecordSink
+
+
+class AsyncHttpFetcher:
+    """
+    aiohttp 版 HTTP 后端，search() / fetch_page() 为协程
+    所有搜索共用一个连接池：limit 为连接总数上限，limit_per_host 为每个主机的连接数上限
+    timeout: 单个请求的超时（秒），超时或HTTP错误抛出 FetchError
+    """
+    name = "aiohttp"
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 15, limit: int = 100,
+                 limit_per_host: int = 20, user_agent: str = DEFAULT_USER_AGENT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.user_agent = user_agent
+        # ClientSession 必须在事件循环中创建，第一次请求时才创建
+        self._session = None
+
+    def _get_session(self):
+        import aiohttp
+
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.limit, limit_per_host=self.limit_per_host)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=aiohttp.ClientTimeout(total=self.timeout),
+                                                  headers={"User-Agent": self.user_agent})
+        return self._session
+
+    async def _request(self, method: str, url: str, **kwargs) -> str:
+        import aiohttp
+        from yarl import URL
+
+        try:
+            with timings.measure("fetch"):
+                # 结果页地址中的 JSON 已经过百分号编码，不能再次编码
+                async with self._get_session().request(method, URL(url, encoded=True), **kwargs) as response:
+                    response.raise_for_status()
+                    return await response.text()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise FetchError(f"请求 {url} 失败: {e!r}") from e
+
+    async def search(self, state: SearchState) -> str:
+        landing = await self._request("GET", self.base_url)
+        action, method, fields, ids = parse_search_form(landing, self.base_url)
+        for element_id, value in state.form_values().items():
+            if element_id in ids:
+                fields[ids[element_id]] = value
+
+        if method == "post":
+            page_html = await self._request("POST", action, data=fields)
+        else:
+            page_html = await self._request("GET", action, params=fields)
+
+        if not is_result_page(page_html):
+            raise IncompletePageError("搜索返回的不是结果页")
+        return page_html
+
+    async def fetch_page(self, url: str) -> str:
+        page_html = await self._request("GET", url)
+        if not is_result_page(page_html):
+            raise IncompletePageError(f"结果页不完整: {url}")
+        return page_html
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncCrawler:
+    """
+    asyncio 爬取引擎：多个姓氏、每个姓氏的各出生年份子搜索和各结果页同时进行，
+    一个线程即可让上百个请求同时在途
+    - concurrency: 同时在途的请求数上限（每个主机的上限由 AsyncHttpFetcher 的连接池控制）
+    - surname_concurrency: 同时处理的姓氏数，限制内存中待写出的记录
+    - 与线程版共用限速器、页码 token 表、解析器和过滤器，输出的记录字段相同
+    - 设置 parse_pool 时解析在独立进程中进行，不阻塞事件循环
+    - 设置 page_cache 时原始页面先查磁盘缓存
+    - 设置 dedup 时重复的记录只输出一次（跨页、跨姓氏）
+    - 失败的请求按 retry 退避重试（等待时不占用并发名额），网站持续出错时 breaker 熔断；
+      每个姓氏抓完后补抓一次失败的页
+    """
+
+    def __init__(self, fetcher: AsyncHttpFetcher, parser: Optional[str] = None,
+                 filters: Optional[List[RecordFilter]] = None, concurrency: int = 100,
+                 surname_concurrency: int = 20, max_pages: int = 100, limiter: Optional[RateLimiter] = None,
+                 tokens: Optional[Dict[int, str]] = None, parse_pool: Optional[ParsePool] = None,
+                 page_cache: Optional[PageCache] = None, dedup: Optional[DedupIndex] = None,
+                 retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        """
+        limiter: 共用的限速器，默认不限速
+        retry: 失败重试策略，默认最多3次、指数退避；breaker: 熔断器，默认新建
+        tokens: 预先已知的页码 token（例如从断点记录中恢复），会被就地更新
+        parse_pool: 多进程解析池，run() 结束时关闭
+        page_cache: 原始页面缓存，run() 结束时关闭
+        dedup: 记录去重索引
+        """
+        self.fetcher = fetcher
+        self.parser = parser
+        self.filters = filters if filters is not None else create_filters({})
+        self.concurrency = max(concurrency, 1)
+        self.surname_concurrency = max(surname_concurrency, 1)
+        self.max_pages = max_pages
+        self.limiter = limiter or RateLimiter(0)
+        self.tokens: Dict[int, str] = tokens if tokens is not None else {}
+        self.parse_pool = parse_pool
+        self.page_cache = page_cache
+        self.dedup = dedup
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        # 总页数超过 max_pages、只抓取了一部分的姓氏
+        self.truncated = set()
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+
+    @classmethod
+    def from_config(cls, config: Dict, limiter: Optional[RateLimiter] = None,
+                    tokens: Optional[Dict[int, str]] = None) -> "AsyncCrawler":
+        """按 CONFIG 创建，未传入 limiter 时按 requests_per_second 新建自适应限速器"""
+        concurrency = config.get("async_concurrency", 100)
+        fetcher = AsyncHttpFetcher(base_url=config.get("base_url", DEFAULT_BASE_URL),
+                                   timeout=config.get("wait_timeout", 15), limit=concurrency,
+                                   limit_per_host=config.get("async_per_host", 20))
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(config.get("requests_per_second", 2.0), burst=config.get("workers", 4))
+        filters = create_filters(config)
+        parse_pool = None
+        if config.get("parse_processes", 0) > 0:
+            parse_pool = ParsePool(config["parse_processes"], parser=config.get("parser"), filters=filters,
+                                   compress=config.get("parse_compress", False))
+        return cls(fetcher, parser=config.get("parser"), filters=filters,
+                   concurrency=concurrency, surname_concurrency=config.get("async_surnames", 20),
+                   max_pages=config.get("max_pages", 100), limiter=limiter, tokens=tokens, parse_pool=parse_pool,
+                   page_cache=PageCache.from_config(config), dedup=DedupIndex.from_config(config),
+                   retry=RetryPolicy.from_config(config), breaker=CircuitBreaker.from_config(config))
+
+    async def _request(self, request: Callable[[], Awaitable[str]], stage: str = "fetch") -> str:
+        """
+        占用一个并发名额、限速后发出请求，并把耗时和成败反馈给限速器；失败按分类计数，
+        可重试的失败按 retry 退避后重试（等待期间让出并发名额），结果计入熔断器
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            async with self._semaphore:
+                delay = self.limiter.try_acquire()
+                while delay:
+                    with timings.measure("rate_wait"):
+                        await asyncio.sleep(delay)
+                    delay = self.limiter.try_acquire()
+                start = time.perf_counter()
+                trial = False
+                try:
+                    trial = self.breaker.before_request()
+                    page_html = await request()
+                except CircuitOpenError as e:
+                    timings.error(e, stage=stage)
+                    raise
+                except Exception as e:
+                    self.limiter.record(time.perf_counter() - start, ok=False)
+                    category = timings.error(e, stage=stage)
+                    if category in RETRYABLE_ERRORS:
+                        self.breaker.record(False)
+                    elif trial:
+                        self.breaker.release()
+                    if not self.retry.should_retry(category, attempt):
+                        raise
+                except BaseException:
+                    # 任务被取消等：结束试探，熔断器不会一直停在半开状态
+                    if trial:
+                        self.breaker.release()
+                    raise
+                else:
+                    self.limiter.record(time.perf_counter() - start)
+                    self.breaker.record(True)
+                    timings.incr("pages")
+                    return page_html
+            timings.incr("retries", reason=category)
+            await asyncio.sleep(self.retry.delay(attempt))
+
+    async def _cached(self, state: SearchState, page: int, request: Callable[[], Awaitable[str]],
+                      stage: str = "fetch") -> str:
+        """先查页面缓存，未命中时发出请求并写入缓存"""
+        if self.page_cache:
+            page_html = self.page_cache.get(state, page)
+            if page_html is not None:
+                return page_html
+        page_html = await self._request(request, stage)
+        if self.page_cache:
+            self.page_cache.put(state, page, page_html)
+        return page_html
+
+    async def _fetch(self, state: SearchState, page: int) -> str:
+        url = state.result_url(self.fetcher.base_url, self.tokens[page])
+        return await self._cached(state, page, lambda: self.fetcher.fetch_page(url))
+
+    async def _process(self, page_html: str) -> List[Dict]:
+        """解析并过滤一页；有解析进程池时在池中解析，事件循环继续处理其他请求"""
+        if self.parse_pool:
+            return await self.parse_pool.parse_async(page_html, self.filters, self.dedup)
+        return process_page(page_html, self.parser, self.filters, self.dedup)
+
+    async def _crawl_page(self, state: SearchState, page: int, page_size: int) -> List[Dict]:
+        """抓取一页、确认页码正确并记下导航中的 token，返回过滤后的记录"""
+        page_html = await self._fetch(state, page)
+        summary = result_summary(page_html)
+        if summary is not None and summary[0] != (page - 1) * page_size + 1:
+            # token 失效时服务器可能返回别的页
+            self.tokens.pop(page, None)
+            if self.page_cache:
+                self.page_cache.discard(state, page)
+            timings.incr("errors", category="stale_token", stage="fetch")
+            raise FetchError(f"第 {page} 页的 token 已失效")
+        self.tokens.update(page_tokens(page_html))
+        return await self._process(page_html)
+
+    async def _open_search(self, state: SearchState) -> str:
+        """已知第1页 token 时直接 GET 结果页地址，否则提交搜索表单"""
+        if 1 in self.tokens:
+            return await self._fetch(state, 1)
+        with timings.measure("search"):
+            return await self._cached(state, 1, lambda: self.fetcher.search(state), stage="search")
+
+    async def crawl_search(self, state: SearchState, first_html: str,
+                           failed: List[Tuple[SearchState, int]]) -> List[Tuple[int, List[Dict]]]:
+        """
+        抓取一次搜索的全部结果页，返回按页码排序的 [(页码, 过滤后的记录)]
+        每抓到一页就把导航中新出现的页码立即加入抓取，各页同时进行；
+        失败或链接始终未知的页记入 failed
+        """
+        summary = result_summary(first_html)
+        page_size = summary[1] - summary[0] + 1 if summary else 10
+        last_page = min(total_pages(first_html, state) or 1, self.max_pages)
+        if total_pages(first_html, state) > self.max_pages:
+            print(f"[{state.last_name}] 共 {total_pages(first_html, state)} 页，超过上限 {self.max_pages} 页，结果不完整")
+            self.truncated.add(state.last_name)
+        self.tokens.update(page_tokens(first_html))
+
+        results: Dict[int, Optional[List[Dict]]] = {}
+        tasks: Dict[int, asyncio.Task] = {1: asyncio.ensure_future(self._process(first_html))}
+
+        def schedule():
+            for page in range(2, last_page + 1):
+                if page not in results and page not in tasks and page in self.tokens:
+                    tasks[page] = asyncio.ensure_future(self._crawl_page(state, page, page_size))
+
+        schedule()
+        try:
+            while tasks:
+                finished, _ = await asyncio.wait(tasks.values(), return_when=asyncio.FIRST_COMPLETED)
+                for page in [page for page, task in tasks.items() if task in finished]:
+                    try:
+                        results[page] = tasks.pop(page).result()
+                    except Exception as e:
+                        print(f"[{state.last_name}] 第 {page} 页抓取失败: {str(e)}")
+                        failed.append((state, page))
+                        results[page] = None
+                schedule()
+        finally:
+            # 被取消或出错时不留下仍在运行的请求
+            for task in tasks.values():
+                task.cancel()
+
+        for page in range(2, last_page + 1):
+            if page not in results:
+                print(f"[{state.last_name}] 第 {page} 页的链接未知")
+                failed.append((state, page))
+        return [(page, records) for page, records in sorted(results.items()) if records is not None]
+
+    async def _learn_first_page_token(self, state: SearchState, first_html: str) -> bool:
+        """第1页自身没有指向第1页的链接，需要从第2页的分页导航中获得"""
+        self.tokens.update(page_tokens(first_html))
+        if 1 not in self.tokens and 2 in self.tokens:
+            try:
+                self.tokens.update(page_tokens(await self._fetch(state, 2)))
+            except Exception as e:
+                print(f"获取第1页 token 失败: {str(e)}")
+        return 1 in self.tokens
+
+    async def _crawl_year(self, year_state: SearchState, failed: List[Tuple[SearchState, int]],
+                          year_html: Optional[str] = None) -> List[Tuple[SearchState, int, List[Dict]]]:
+        try:
+            if year_html is None:
+                year_html = await self._open_search(year_state)
+        except Exception as e:
+            print(f"[{year_state.last_name}] 出生年份 {year_state.birth_year} 搜索失败: {str(e)}")
+            failed.append((year_state, 1))
+            return []
+        if result_summary(year_html) is None:
+            return []  # 该年份没有记录
+        year_state = SearchState.from_page(year_html) or year_state
+        return [(year_state, page, records) for page, records in await self.crawl_search(year_state, year_html, failed)]
+
+    async def crawl_surname(self, surname: str) -> Tuple[List[Tuple[SearchState, int, List[Dict]]],
+                                                         List[Tuple[SearchState, int]]]:
+        """
+        搜索一个姓氏并抓取全部结果页，返回 ([(子搜索状态, 页码, 记录)], 失败的页)
+        与 PageScheduler.crawl_by_birth_year 相同：页数多于出生年份数时按 pyb 拆分，各年份同时抓取
+        """
+        failed: List[Tuple[SearchState, int]] = []
+        state = SearchState.for_last_name(surname)
+        with timings.measure("search"):
+            first_html = await self._cached(state, 1, lambda: self.fetcher.search(state), stage="search")
+        state = SearchState.from_page(first_html) or state
+
+        # 没有出生年份下限时为0，不按年份拆分
+        min_year = min_birth_year(self.filters)
+        year_states = birth_year_states(state, min_year) if min_year else []
+        if (year_states and len(year_states) < total_pages(first_html, state)
+                and await self._learn_first_page_token(state, first_html)):
+            # 先打开第一个年份确认服务器按 pyb 过滤，其余年份再同时抓取
+            try:
+                year_html = await self._open_search(year_states[0])
+            except Exception as e:
+                print(f"[{surname}] 出生年份 {year_states[0].birth_year} 搜索失败: {str(e)}")
+                year_html = None
+            server_state = SearchState.from_page(year_html) if year_html else None
+            if not server_state or server_state.birth_year == year_states[0].birth_year:
+                parts = await asyncio.gather(self._crawl_year(year_states[0], failed, year_html),
+                                             *(self._crawl_year(s, failed) for s in year_states[1:]))
+                return [item for part in parts for item in part], failed
+            print(f"[{surname}] 服务器未按出生年份过滤，改为抓取原搜索结果")
+
+        return [(state, page, records) for page, records in await self.crawl_search(state, first_html, failed)], failed
+
+    async def refetch(self, failed: List[Tuple[SearchState, int]], page_size: int = 10
+                      ) -> Tuple[List[Tuple[SearchState, int, List[Dict]]], List[Tuple[SearchState, int]]]:
+        """
+        补抓失败的页（各页同时进行），返回 ([(搜索状态, 页码, 记录)], 仍失败的页)
+        页码为1的重新搜索该（子）搜索并抓取它的全部页；熔断器打开时先等冷却结束
+        """
+        delay = self.breaker.remaining()
+        if delay:
+            await asyncio.sleep(delay)
+        still_failed: List[Tuple[SearchState, int]] = []
+
+        async def refetch_one(state: SearchState, page: int) -> List[Tuple[SearchState, int, List[Dict]]]:
+            if page == 1:
+                return await self._crawl_year(state, still_failed)
+            try:
+                if page not in self.tokens:
+                    raise FetchError(f"第 {page} 页的链接未知")
+                return [(state, page, await self._crawl_page(state, page, page_size))]
+            except Exception as e:
+                print(f"[{state.last_name}] 第 {page} 页补抓失败: {str(e)}")
+                still_failed.append((state, page))
+                return []
+
+        parts = await asyncio.gather(*(refetch_one(state, page) for state, page in failed))
+        return [item for part in parts for item in part], still_failed
+
+    async def run(self, surnames: List[str], sink_factory: Callable[[str], RecordSink],
+                  on_done: Optional[Callable[[str, int, Optional[Exception]], None]] = None) -> Dict:
+        """
+        同时爬取多个姓氏，每个姓氏完成后按页码顺序写入 sink_factory(姓氏) 并关闭
+        on_done(姓氏, 记录数, 异常): 每个姓氏结束时回调，成功时异常为 None；
+        有页面抓取失败时该姓氏仍会写出已抓到的记录，但按失败回调
+        返回 {"done": 成功数, "failed": 失败数, "truncated": 超过 max_pages 的姓氏}；
+        任务被取消时停止全部请求并关闭连接
+        """
+        summary = {"done": 0, "failed": 0}
+        surname_slots = asyncio.Semaphore(self.surname_concurrency)
+
+        async def crawl_one(surname: str):
+            async with surname_slots:
+                count = 0
+                try:
+                    pages, failed = await self.crawl_surname(surname)
+                    if failed:
+                        print(f"[{surname}] 补抓 {len(failed)} 个失败的页面...")
+                        more, failed = await self.refetch(failed)
+                        pages.extend(more)
+                    with sink_factory(surname) as sink:
+                        for _, _, records in pages:
+                            sink.write_page(records)
+                            count += len(records)
+                    if failed:
+                        raise FetchError(f"{len(failed)} 个页面抓取失败")
+                except Exception as e:
+                    print(f"[{surname}] 失败: {str(e)}")
+                    summary["failed"] += 1
+                    if on_done:
+                        on_done(surname, count, e)
+                    return
+                print(f"[{surname}] 完成，共 {count} 条记录")
+                summary["done"] += 1
+                if on_done:
+                    on_done(surname, count, None)
+
+        try:
+            await asyncio.gather(*(crawl_one(surname) for surname in surnames))
+        finally:
+            await self.fetcher.close()
+            if self.parse_pool:
+                self.parse_pool.close()
+            if self.page_cache:
+                self.page_cache.close()
+            if self.dedup:
+                self.dedup.flush()
+        summary["truncated"] = sorted(self.truncated)
+        return summary
+
+
+def crawl_surnames(config: Dict, surnames: List[str], sink_factory: Callable[[str], RecordSink],
+                   on_done: Optional[Callable[[str, int, Optional[Exception]], None]] = None,
+                   limiter: Optional[RateLimiter] = None,
+                   tokens: Optional[Dict[int, str]] = None, dedup: Optional[DedupIndex] = None) -> Dict:
+    """
+    在新的事件循环中运行 AsyncCrawler（供同步代码调用），参数同 AsyncCrawler.run
+    dedup: 共用的去重索引（多次调用之间去重），默认按 CONFIG 新建
+    """
+
+    async def main():
+        crawler = AsyncCrawler.from_config(config, limiter=limiter, tokens=tokens)
+        if dedup is not None:
+            crawler.dedup = dedup
+        return await crawler.run(surnames, sink_factory, on_done)
+
+    return asyncio.run(main())
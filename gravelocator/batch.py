@@ -0,0 +1,116 @@
+import queue
+import threading
+import traceback
+from typing import Callable, Dict, Iterable, List, Optional
+
+from .checkpoint import STATUS_DONE, STATUS_FAILED, STATUS_RUNNING, CheckpointStore
+
+
+def read_surnames(path: str) -> List[str]:
+    """
+    读取姓氏列表文件：每行一个姓氏，忽略空行和 # 开头的注释，去重并保持顺序
+    """
+    surnames = []
+    seen = set()
+    with open(path, encoding="utf-8-sig") as f:
+        for line in f:
+            surname = line.split("#", 1)[0].strip().upper()
+            if surname and surname not in seen:
+                seen.add(surname)
+                surnames.append(surname)
+    return surnames
+
+
+class SurnameTrie:
+    """
+    请求的姓氏组成的前缀树（按字符逐层展开）
+    begins with 搜索中一个节点的搜索结果包含其整棵子树
+    """
+
+    def __init__(self, surnames: Iterable[str] = ()):
+        self.children: Dict[str, "SurnameTrie"] = {}
+        self.requested = False
+        for surname in surnames:
+            self.insert(surname)
+
+    def insert(self, surname: str):
+        node = self
+        for char in surname:
+            node = node.children.setdefault(char, SurnameTrie())
+        node.requested = True
+
+    def roots(self, prefix: str = "") -> List[str]:
+        """不被更短的请求姓氏覆盖的姓氏（只需对它们各搜索一次）"""
+        if self.requested and prefix:
+            return [prefix]
+        return [root for char, child in sorted(self.children.items()) for root in child.roots(prefix + char)]
+
+    def covered(self, prefix: str = "", root: Optional[str] = None) -> Dict[str, str]:
+        """{被覆盖的姓氏: 覆盖它的最短前缀}"""
+        covered = {}
+        if self.requested and prefix:
+            if root is None:
+                root = prefix
+            else:
+                covered[prefix] = root
+        for char, child in self.children.items():
+            covered.update(child.covered(prefix + char, root))
+        return covered
+
+
+def covered_surnames(surnames: List[str]) -> Dict[str, str]:
+    """
+    begins with 搜索中，列表里更短的姓氏是另一个姓氏的前缀时（MICHAEL / MICHAELSON），
+    前缀搜索的结果已包含后者的全部记录
+    返回 {被覆盖的姓氏: 覆盖它的最短前缀}
+    """
+    return SurnameTrie(surnames).covered()
+
+
+def run_batch(surnames: List[str], crawl_job: Callable[[str], int], checkpoint: CheckpointStore,
+              workers: int = 2) -> Dict[str, int]:
+    """
+    把每个姓氏作为一个任务放入队列，由 workers 个线程执行
+    crawl_job(姓氏) 返回记录数，抛出异常表示失败（下次运行会重试）
+    已完成的姓氏直接跳过；返回各状态的任务数
+    """
+    checkpoint.add_jobs(surnames)
+    jobs = queue.Queue()
+    for surname in surnames:
+        if checkpoint.job_status(surname) != STATUS_DONE:
+            jobs.put(surname)
+
+    skipped = len(surnames) - jobs.qsize()
+    if skipped:
+        print(f"跳过 {skipped} 个已完成的姓氏")
+    summary = {STATUS_DONE: 0, STATUS_FAILED: 0}
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            try:
+                surname = jobs.get_nowait()
+            except queue.Empty:
+                return
+            checkpoint.set_job_status(surname, STATUS_RUNNING)
+            try:
+                records = crawl_job(surname)
+                checkpoint.set_job_status(surname, STATUS_DONE, records=records)
+                status = STATUS_DONE
+                print(f"[{surname}] 完成，共 {records} 条记录")
+            except Exception as e:
+                checkpoint.set_job_status(surname, STATUS_FAILED, error=str(e))
+                status = STATUS_FAILED
+                print(f"[{surname}] 失败: {str(e)}")
+                traceback.print_exc()
+            with lock:
+                summary[status] += 1
+
+    threads = [threading.Thread(target=worker, name=f"batch-{i}", daemon=True) for i in range(max(workers, 1))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary["skipped"] = skipped
+    return summary
@@ -0,0 +1,147 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from .schema import restore_types
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    surname    TEXT PRIMARY KEY,
+    status     TEXT NOT NULL,
+    records    INTEGER NOT NULL DEFAULT 0,
+    error      TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    surname    TEXT NOT NULL,
+    search_key TEXT NOT NULL,
+    page       INTEGER NOT NULL,
+    records    TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (surname, search_key, page)
+);
+CREATE TABLE IF NOT EXISTS complete_surnames (
+    surname    TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS page_tokens (
+    page  INTEGER PRIMARY KEY,
+    token TEXT NOT NULL
+);
+"""
+
+STATUS_PENDING = "pending"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+class CheckpointStore:
+    """
+    批量爬取的断点记录（SQLite）
+    - jobs: 每个姓氏的状态
+    - pages: 每个姓氏、每个（子）搜索已完成的页及其记录，恢复时不必重新抓取
+    - complete_surnames: 完整爬取（没有超过 max_pages）的姓氏，恢复时被它们覆盖的姓氏仍然跳过
+    - page_tokens: 已学到的加密页码 token，恢复时可以直接跳到未完成的页
+    多个工作线程共用一个连接，写操作加锁
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def _execute(self, sql: str, params=()) -> List[tuple]:
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+            self._conn.commit()
+            return rows
+
+    # ---- 姓氏任务 ----
+
+    def add_jobs(self, surnames: List[str]):
+        """登记任务，已存在的任务保持原状态"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO jobs (surname, status, updated_at) VALUES (?, ?, ?)",
+                [(surname, STATUS_PENDING, now) for surname in surnames])
+            self._conn.commit()
+
+    def job_status(self, surname: str) -> Optional[str]:
+        rows = self._execute("SELECT status FROM jobs WHERE surname = ?", (surname,))
+        return rows[0][0] if rows else None
+
+    def set_job_status(self, surname: str, status: str, records: int = 0, error: Optional[str] = None):
+        self._execute(
+            "INSERT INTO jobs (surname, status, records, error, updated_at) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(surname) DO UPDATE SET status = excluded.status, records = excluded.records, "
+            "error = excluded.error, updated_at = excluded.updated_at",
+            (surname, status, records, error, time.time()))
+
+    def unfinished_jobs(self) -> List[str]:
+        rows = self._execute("SELECT surname FROM jobs WHERE status != ? ORDER BY rowid", (STATUS_DONE,))
+        return [row[0] for row in rows]
+
+    def mark_complete(self, surname: str):
+        self._execute("INSERT OR IGNORE INTO complete_surnames (surname) VALUES (?)", (surname,))
+
+    def complete_surnames(self) -> Set[str]:
+        return {row[0] for row in self._execute("SELECT surname FROM complete_surnames")}
+
+    # ---- 结果页 ----
+
+    def save_page(self, surname: str, search_key: str, page: int, records: List[Dict]):
+        self._execute(
+            "INSERT OR REPLACE INTO pages (surname, search_key, page, records, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (surname, search_key, page, json.dumps(records, ensure_ascii=False, default=str), time.time()))
+
+    def completed_pages(self, surname: str, search_key: str) -> Set[int]:
+        rows = self._execute("SELECT page FROM pages WHERE surname = ? AND search_key = ?", (surname, search_key))
+        return {row[0] for row in rows}
+
+    def iter_page_records(self, surname: str, batch: int = 16) -> Iterator[List[Dict]]:
+        """
+        按子搜索、页码顺序逐页取出该姓氏已完成页的记录（恢复时逐页写入输出，不必全部载入内存）
+        每次只从数据库读取 batch 页（按主键接着上次的位置读），读取之间不占用锁，其他线程可以继续写入
+        """
+        search_key, page = "", -1
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT search_key, page, records FROM pages WHERE surname = ? "
+                    "AND (search_key > ? OR (search_key = ? AND page > ?)) ORDER BY search_key, page LIMIT ?",
+                    (surname, search_key, search_key, page, batch)).fetchall()
+            for search_key, page, data in rows:
+                yield [restore_types(record) for record in json.loads(data)]
+            if len(rows) < batch:
+                return
+
+    def load_records(self, surname: str) -> List[Dict]:
+        """按子搜索、页码顺序取出该姓氏已完成页的全部记录"""
+        records = []
+        for page_records in self.iter_page_records(surname):
+            records.extend(page_records)
+        return records
+
+    # ---- 页码 token ----
+
+    def load_tokens(self) -> Dict[int, str]:
+        return dict(self._execute("SELECT page, token FROM page_tokens"))
+
+    def save_tokens(self, tokens: Dict[int, str]):
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO page_tokens (page, token) VALUES (?, ?)",
+                                   list(tokens.items()))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
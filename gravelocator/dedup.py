@@ -0,0 +1,118 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from .parser import VeteranRecord
+
+
+_SCHEMA = "CREATE TABLE IF NOT EXISTS seen (digest BLOB PRIMARY KEY)"
+_SPACES_RE = re.compile(r'\s+')
+
+
+def _normalize(value: str) -> str:
+    return _SPACES_RE.sub(' ', value).strip().upper()
+
+
+def record_identity(record: VeteranRecord) -> str:
+    """同一位逝者的标识：姓名 + 出生日期 + 死亡日期 + 墓地（忽略大小写和多余空白）"""
+    details = record.details
+    return "|".join(_normalize(value) for value in (
+        record.full_name, record.date_of_birth, details.get('Date of Death', ''), details.get('Cemetery', '')))
+
+
+def dict_identity(record: Dict) -> str:
+    """记录字典（例如断点中保存的记录）的标识，与 record_identity 相同"""
+    return "|".join(_normalize(record.get(column) or '') for column in (
+        'Full_Name', 'Date_of_Birth', 'Date_of_Death', 'Cemetery'))
+
+
+class DedupIndex:
+    """
+    记录去重索引：内存中的哈希集合，add() 为 O(1)
+    集合中只保存标识的 12 字节摘要，百万条记录约占 100MB 以内
+    path 不为空时持久化到 SQLite：创建时载入已有摘要，新摘要在 flush() 时写入，跨多次运行去重
+    多个工作线程可以共用
+    """
+
+    def __init__(self, path: Optional[str] = None, flush_every: int = 1000):
+        self.path = path
+        self.flush_every = flush_every
+        self._lock = threading.Lock()
+        self._seen = set()
+        self._pending: List[bytes] = []
+        self.duplicates = 0
+        if path:
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            conn = sqlite3.connect(path)
+            try:
+                conn.execute(_SCHEMA)
+                self._seen.update(row[0] for row in conn.execute("SELECT digest FROM seen"))
+            finally:
+                conn.close()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["DedupIndex"]:
+        """CONFIG["dedup"] 为 False 时不去重，返回 None；CONFIG["dedup_db"] 为持久化文件"""
+        if not config.get("dedup", True):
+            return None
+        return cls(config.get("dedup_db"))
+
+    @staticmethod
+    def _digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=12).digest()
+
+    def add(self, key: str) -> bool:
+        """登记一个标识，第一次出现返回 True，重复返回 False"""
+        digest = self._digest(key)
+        with self._lock:
+            if digest in self._seen:
+                self.duplicates += 1
+                return False
+            self._seen.add(digest)
+            if self.path:
+                self._pending.append(digest)
+                flush = len(self._pending) >= self.flush_every
+            else:
+                flush = False
+        if flush:
+            self.flush()
+        return True
+
+    def add_record(self, record: VeteranRecord) -> bool:
+        return self.add(record_identity(record))
+
+    def seed(self, keys: Iterable[str]):
+        """登记已经输出过的记录（例如从断点恢复的记录），之后再出现时去掉；不计入重复数"""
+        digests = [self._digest(key) for key in keys]
+        with self._lock:
+            new = [digest for digest in digests if digest not in self._seen]
+            self._seen.update(new)
+            if self.path:
+                self._pending.extend(new)
+            flush = len(self._pending) >= self.flush_every
+        if flush:
+            self.flush()
+
+    def __contains__(self, key: str) -> bool:
+        return self._digest(key) in self._seen
+
+    def __len__(self) -> int:
+        return len(self._seen)
+
+    def flush(self):
+        """把新登记的摘要写入 SQLite（不持久化时不做任何事）"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not self.path or not pending:
+            return
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute(_SCHEMA)
+            conn.executemany("INSERT OR IGNORE INTO seen (digest) VALUES (?)", [(digest,) for digest in pending])
+            conn.commit()
+        finally:
+            conn.close()
@@ -0,0 +1,186 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional
+
+from .metrics import timings
+
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+# webdriver_manager 安装结果的缓存文件，避免每次启动都查询最新版本（约1.5秒）
+DRIVER_PATH_CACHE = os.path.join(os.path.expanduser("~"), ".gravelocator", "chromedriver_path")
+
+_driver_path_lock = threading.Lock()
+_driver_path = None
+
+
+def cached_driver_path(cache_file: str = DRIVER_PATH_CACHE) -> Optional[str]:
+    """
+    ChromeDriver 路径：进程内和磁盘上各缓存一次，只有缓存的文件不存在时才调用 ChromeDriverManager().install()
+    没有安装 webdriver_manager 时返回 None（由 selenium 自带的 selenium-manager 查找）
+    """
+    global _driver_path
+    with _driver_path_lock:
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                path = f.read().strip()
+            if path and os.path.exists(path):
+                _driver_path = path
+                return path
+        except OSError:
+            pass
+
+        try:
+            from webdriver_manager.chrome import ChromeDriverManager
+        except ImportError:
+            return None
+
+        print("正在安装/检查ChromeDriver...")
+        path = ChromeDriverManager().install()
+        try:
+            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
+            with open(cache_file, "w", encoding="utf-8") as f:
+                f.write(path)
+        except OSError as e:
+            print(f"无法写入ChromeDriver路径缓存: {str(e)}")
+        _driver_path = path
+        return path
+
+
+def new_chrome(driver_path: Optional[str] = None, headless: bool = True, user_agent: str = DEFAULT_USER_AGENT,
+               window_size: Optional[str] = None):
+    """启动一个 Chrome 实例"""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument('--headless')  # 无头模式
+    options.add_argument('--disable-gpu')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    if window_size:
+        options.add_argument(f'--window-size={window_size}')
+    options.add_argument(f'--user-agent={user_agent}')
+
+    with timings.measure("driver_start"):
+        if driver_path and driver_path != "chromedriver":
+            from selenium.webdriver.chrome.service import Service
+            return webdriver.Chrome(service=Service(driver_path), options=options)
+        return webdriver.Chrome(options=options)
+
+
+class PooledDriver:
+    """池中的浏览器及其使用统计"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+    def is_healthy(self) -> bool:
+        """浏览器进程和会话是否仍然可用"""
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            print(f"关闭浏览器时出错: {str(e)}")
+
+
+class DriverPool:
+    """
+    固定大小的浏览器池，多次搜索共用已启动的 Chrome
+    - 取出时做健康检查，失效的浏览器直接替换
+    - 每个浏览器处理 recycle_after 页后关闭重建，避免长时间运行后内存膨胀
+    - ChromeDriver 路径只解析一次（见 cached_driver_path）
+    """
+
+    def __init__(self, size: int = 2, recycle_after: int = 200, driver_path: Optional[str] = None,
+                 headless: bool = True, user_agent: str = DEFAULT_USER_AGENT):
+        self.size = max(size, 1)
+        self.recycle_after = recycle_after
+        self.driver_path = driver_path
+        self.headless = headless
+        self.user_agent = user_agent
+        # 后进先出：优先复用刚归还的（最"热"的）浏览器
+        self._idle: List[PooledDriver] = []
+        self._created = 0
+        # 保护 _idle 和 _created；归还或关闭浏览器（空出名额）时唤醒等待的线程
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def _create(self) -> PooledDriver:
+        driver_path = self.driver_path or cached_driver_path()
+        try:
+            return PooledDriver(new_chrome(driver_path, headless=self.headless, user_agent=self.user_agent))
+        except Exception:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def _discard(self, item: PooledDriver):
+        item.quit()
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> PooledDriver:
+        """取出一个可用的浏览器，池满且都在使用时等待"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("浏览器池已关闭")
+                    if self._idle or self._created < self.size:
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("等待空闲浏览器超时")
+                    self._cond.wait(remaining)
+                item = self._idle.pop() if self._idle else None
+                if item is None:
+                    self._created += 1
+            if item is None:
+                return self._create()
+            if item.is_healthy():
+                return item
+            print("浏览器已失效，重新启动")
+            self._discard(item)
+
+    def release(self, item: PooledDriver):
+        """归还浏览器；达到回收页数或池已关闭时直接关闭"""
+        if self._closed or item.pages >= self.recycle_after:
+            self._discard(item)
+        else:
+            with self._cond:
+                self._idle.append(item)
+                self._cond.notify()
+
+    @contextmanager
+    def driver(self):
+        """with pool.driver() as item: item.driver.get(...)"""
+        item = self.acquire()
+        try:
+            yield item
+        finally:
+            self.release(item)
+
+    def close(self):
+        """关闭池中所有空闲浏览器，使用中的浏览器在归还时关闭"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for item in idle:
+            self._discard(item)
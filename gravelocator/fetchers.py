@@ -0,0 +1,331 @@
+import threading
+from html.parser import HTMLParser
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import urljoin
+
+from .driver_pool import DEFAULT_USER_AGENT, DriverPool, new_chrome
+from .metrics import timings
+from .pages import is_result_page
+from .search import SearchState
+from .waits import current_results_table, results_summary_text, wait_for_clickable, wait_for_new_results
+
+
+DEFAULT_BASE_URL = "https://gravelocator.cem.va.gov/ngl"
+
+
+class FetchError(Exception):
+    """抓取失败（搜索表单缺失、HTTP错误、结果页不完整等）"""
+
+
+class IncompletePageError(FetchError):
+    """返回的页面既没有结果表格也没有"未找到记录"提示（页面没有加载完整），可以重试"""
+    category = "empty_table"
+
+
+class PageFetcher:
+    """
+    抓取后端基类
+    search() 提交搜索并返回第一页HTML，fetch_page() 按结果页地址返回HTML
+    """
+    name = ""
+    # 是否允许多个线程同时调用 fetch_page
+    concurrent = False
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL):
+        self.base_url = base_url.rstrip("/")
+
+    def search(self, state: SearchState) -> str:
+        raise NotImplementedError
+
+    def fetch_page(self, url: str) -> str:
+        raise NotImplementedError
+
+    def fall_back(self, error: Exception) -> bool:
+        """
+        搜索经重试策略重试后仍然失败时由调用方调用：切换到了备用后端、可以再搜索一次时返回 True
+        默认没有备用后端
+        """
+        return False
+
+    def close(self):
+        pass
+
+
+class _SearchFormParser(HTMLParser):
+    """提取包含姓氏输入框(id=lname)的搜索表单: action、method 及各字段默认值"""
+
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self._form = None
+        self._select = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._form = {"action": attrs.get("action") or "", "method": (attrs.get("method") or "get").lower(),
+                          "fields": {}, "ids": {}}
+            self.forms.append(self._form)
+        if self._form is None:
+            return
+        name = attrs.get("name")
+        if tag == "input" and name:
+            if attrs.get("type", "text").lower() in ("checkbox", "radio") and "checked" not in attrs:
+                return
+            self._form["fields"][name] = attrs.get("value") or ""
+            if attrs.get("id"):
+                self._form["ids"][attrs["id"]] = name
+        elif tag == "select" and name:
+            self._select = name
+            self._form["fields"].setdefault(name, "")
+            if attrs.get("id"):
+                self._form["ids"][attrs["id"]] = name
+        elif tag == "option" and self._select:
+            if "selected" in attrs or not self._form["fields"][self._select]:
+                self._form["fields"][self._select] = attrs.get("value") or ""
+
+    def handle_endtag(self, tag):
+        if tag == "select":
+            self._select = None
+        elif tag == "form":
+            self._form = None
+
+
+def parse_search_form(page_html: str, page_url: str) -> Tuple[str, str, Dict[str, str], Dict[str, str]]:
+    """
+    解析首页搜索表单
+    返回 (提交地址, 方法, 字段默认值, 元素id->字段名)
+    """
+    parser = _SearchFormParser()
+    parser.feed(page_html)
+    for form in parser.forms:
+        if "lname" in form["ids"]:
+            return urljoin(page_url, form["action"]), form["method"], form["fields"], form["ids"]
+    raise FetchError("首页中未找到姓氏搜索表单")
+
+
+class HttpFetcher(PageFetcher):
+    """
+    不启动浏览器，直接用带连接池的 requests.Session 提交搜索和读取结果页
+    """
+    name = "http"
+    concurrent = True
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 15, pool_size: int = 10,
+                 user_agent: str = DEFAULT_USER_AGENT):
+        super().__init__(base_url)
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = user_agent
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def _request(self, method: str, url: str, **kwargs) -> str:
+        import requests
+
+        try:
+            with timings.measure("fetch"):
+                response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise FetchError(f"请求 {url} 失败: {e}") from e
+        return response.text
+
+    def search(self, state: SearchState) -> str:
+        landing = self._request("GET", self.base_url)
+        action, method, fields, ids = parse_search_form(landing, self.base_url)
+        for element_id, value in state.form_values().items():
+            if element_id in ids:
+                fields[ids[element_id]] = value
+
+        if method == "post":
+            page_html = self._request("POST", action, data=fields)
+        else:
+            page_html = self._request("GET", action, params=fields)
+
+        if not is_result_page(page_html):
+            raise IncompletePageError("搜索返回的不是结果页")
+        return page_html
+
+    def fetch_page(self, url: str) -> str:
+        page_html = self._request("GET", url)
+        if not is_result_page(page_html):
+            raise IncompletePageError(f"结果页不完整: {url}")
+        return page_html
+
+    def close(self):
+        self.session.close()
+
+
+class SeleniumFetcher(PageFetcher):
+    """
+    通过无头 Chrome 操作搜索表单（原有方式），作为 HTTP 后端的备用方案
+    传入 driver_pool 时从浏览器池借用 Chrome，close() 时归还而不是退出
+    """
+    name = "selenium"
+
+    def __init__(self, base_url: str = DEFAULT_BASE_URL, timeout: float = 10, driver_path: Optional[str] = None,
+                 headless: bool = True, user_agent: str = DEFAULT_USER_AGENT,
+                 driver_pool: Optional[DriverPool] = None):
+        super().__init__(base_url)
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver_pool = driver_pool
+        if driver_pool:
+            self._pooled = driver_pool.acquire()
+            self.driver = self._pooled.driver
+        else:
+            self._pooled = None
+            self.driver = new_chrome(driver_path, headless=headless, user_agent=user_agent)
+        self.wait = WebDriverWait(self.driver, timeout)
+
+    def search(self, state: SearchState) -> str:
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import Select
+
+        with timings.measure("navigate"):
+            self.driver.get(self.base_url)
+
+        # 等待页面加载（姓氏输入框出现即可，不再固定等待）
+        with timings.measure("page_wait"):
+            self.wait.until(EC.presence_of_element_located((By.ID, "lname")))
+
+        # 输入姓氏
+        last_name_input = self.driver.find_element(By.ID, "lname")
+        last_name_input.clear()
+        last_name_input.send_keys(state.last_name)
+
+        # 设置姓氏匹配方式
+        Select(self.driver.find_element(By.ID, "lnameopt")).select_by_value(state.fields["nlOpt"])
+
+        # 启用按钮（如果被禁用）
+        if self.driver.find_element(By.ID, "searchb").get_attribute("disabled"):
+            # 点击一下其他字段来启用按钮，等到按钮可点击为止
+            self.driver.find_element(By.ID, "fname").click()
+        search_button = wait_for_clickable(self.wait, (By.ID, "searchb"))
+
+        old_table = current_results_table(self.driver)
+        search_button.click()
+
+        # 结果表格（或"未找到记录"提示）出现后立即返回
+        wait_for_new_results(self.wait, old_table)
+        if self._pooled:
+            self._pooled.pages += 1
+        return self.driver.page_source
+
+    def fetch_page(self, url: str) -> str:
+        old_table = current_results_table(self.driver)
+        old_summary = results_summary_text(self.driver) if old_table is not None else ""
+        with timings.measure("navigate"):
+            self.driver.get(url)
+        wait_for_new_results(self.wait, old_table, old_summary)
+        if self._pooled:
+            self._pooled.pages += 1
+        return self.driver.page_source
+
+    def close(self):
+        if self._pooled:
+            self.driver_pool.release(self._pooled)
+            self._pooled = None
+        else:
+            self.driver.quit()
+
+
+class FallbackFetcher(PageFetcher):
+    """
+    先用主后端（HTTP），搜索失败时切换到备用后端（Selenium）并一直使用它
+    备用后端只在需要时才创建，避免无谓地启动浏览器
+    搜索失败先原样抛出，由重试策略处理（一次超时或5xx不会切换），重试策略放弃后调用方再用 fall_back() 切换；
+    结果页的抓取失败（超时、5xx、页面不完整等）不切换，交给重试策略和失败页补抓处理
+    """
+    name = "auto"
+
+    def __init__(self, primary: PageFetcher, fallback_factory: Callable[[], PageFetcher]):
+        super().__init__(primary.base_url)
+        self.active = primary
+        self._fallback_factory = fallback_factory
+        self._fell_back = False
+        self._lock = threading.Lock()
+
+    @property
+    def concurrent(self):
+        return self.active.concurrent
+
+    def fall_back(self, error: Exception) -> bool:
+        """error 为 search() 抛出的异常（记有出错时使用的后端）；多个线程同时失败时只切换一次"""
+        failed = getattr(error, "fetcher", None)
+        if failed is None:
+            # 不是搜索本身的失败（例如熔断器打开），切换后端没有帮助
+            return False
+        with self._lock:
+            if self.active is not failed:
+                # 其他线程已经切换，在备用后端上再搜索一次
+                return True
+            if self._fell_back:
+                return False
+            print(f"{failed.name} 后端搜索失败 ({error})，改用浏览器后端")
+            timings.incr("retries", reason="fallback")
+            failed.close()
+            self.active = self._fallback_factory()
+            self._fell_back = True
+            return True
+
+    def search(self, state: SearchState) -> str:
+        active = self.active
+        try:
+            return active.search(state)
+        except FetchError as e:
+            e.fetcher = active
+            raise
+
+    def fetch_page(self, url: str) -> str:
+        return self.active.fetch_page(url)
+
+    def close(self):
+        self.active.close()
+
+
+def _make_http(base_url: str, timeout: float, pool_size: int, **_) -> PageFetcher:
+    return HttpFetcher(base_url=base_url, timeout=timeout, pool_size=pool_size)
+
+
+def _make_selenium(base_url: str, timeout: float, driver_path: Optional[str], driver_pool: Optional[DriverPool],
+                   headless: bool = True, **_) -> PageFetcher:
+    return SeleniumFetcher(base_url=base_url, timeout=timeout, driver_path=driver_path, headless=headless,
+                           driver_pool=driver_pool)
+
+
+def _make_auto(**options) -> PageFetcher:
+    return FallbackFetcher(_make_http(**options), lambda: _make_selenium(**options))
+
+
+# 抓取后端注册表: 名称 -> 工厂函数(base_url, timeout, driver_path, pool_size, driver_pool, headless)
+FETCHER_FACTORIES: Dict[str, Callable[..., PageFetcher]] = {
+    "http": _make_http,
+    "selenium": _make_selenium,
+    "auto": _make_auto,
+}
+
+
+def register_fetcher(name: str, factory: Callable[..., PageFetcher]):
+    """注册抓取后端，工厂函数接收 create_fetcher 的全部参数（不需要的用 **_ 忽略）"""
+    FETCHER_FACTORIES[name] = factory
+
+
+def create_fetcher(backend: str = "auto", base_url: str = DEFAULT_BASE_URL, timeout: float = 15,
+                   driver_path: Optional[str] = None, pool_size: int = 10,
+                   driver_pool: Optional[DriverPool] = None, headless: bool = True) -> PageFetcher:
+    """
+    按名称创建抓取后端
+    backend: "http" 仅HTTP, "selenium" 仅浏览器, "auto" HTTP优先、失败时退回浏览器，或其他已注册的名称
+    driver_pool: 浏览器后端从该池借用 Chrome（多次搜索共用已启动的浏览器）
+    """
+    if backend not in FETCHER_FACTORIES:
+        raise ValueError(f"未知的抓取后端: {backend}")
+    return FETCHER_FACTORIES[backend](base_url=base_url, timeout=timeout, driver_path=driver_path,
+                                      pool_size=pool_size, driver_pool=driver_pool, headless=headless)
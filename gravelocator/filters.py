@@ -0,0 +1,74 @@
+from typing import Dict, Iterable, List, Optional
+
+from .parser import VeteranRecord
+
+
+# 默认过滤条件（CONFIG["filters"] 未设置时）
+DEFAULT_FILTERS = ("complete", "min_birth_year")
+
+
+class RecordFilter:
+    """
+    记录过滤器接口：accept() 返回 True 的记录才会写出
+    from_config() 从 CONFIG 读取参数
+    """
+    name = ""
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "RecordFilter":
+        return cls()
+
+    def accept(self, record: VeteranRecord) -> bool:
+        raise NotImplementedError
+
+
+class CompleteRecordFilter(RecordFilter):
+    """姓名、军衔/分支、出生日期都不为空"""
+    name = "complete"
+
+    def accept(self, record: VeteranRecord) -> bool:
+        return bool(record.full_name and record.rank_branch and record.date_of_birth)
+
+
+class BirthYearFilter(RecordFilter):
+    """出生年份 >= min_year（该条件同时通过 pyb 字段下推到服务器）"""
+    name = "min_birth_year"
+
+    def __init__(self, min_year: int = 0):
+        self.min_year = min_year
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "BirthYearFilter":
+        return cls(config.get("min_birth_year", 0))
+
+    def accept(self, record: VeteranRecord) -> bool:
+        return record.birth_year >= self.min_year
+
+
+# 过滤器注册表: 名称 -> 类
+FILTER_TYPES = {
+    CompleteRecordFilter.name: CompleteRecordFilter,
+    BirthYearFilter.name: BirthYearFilter,
+}
+
+
+def register_filter(filter_type):
+    """注册过滤器类（按其 name 属性），可用作类装饰器"""
+    FILTER_TYPES[filter_type.name] = filter_type
+    return filter_type
+
+
+def create_filters(config: Dict, names: Optional[Iterable[str]] = None) -> List[RecordFilter]:
+    """按 CONFIG["filters"] 中的名称依次创建过滤器"""
+    names = names if names is not None else config.get("filters", DEFAULT_FILTERS)
+    filters = []
+    for name in names:
+        if name not in FILTER_TYPES:
+            raise ValueError(f"未知的过滤器: {name}")
+        filters.append(FILTER_TYPES[name].from_config(config))
+    return filters
+
+
+def min_birth_year(filters: Iterable[RecordFilter]) -> int:
+    """过滤器中的出生年份下限（可下推到服务器），没有时为0"""
+    return max((f.min_year for f in filters if isinstance(f, BirthYearFilter)), default=0)
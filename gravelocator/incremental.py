@@ -0,0 +1,188 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .pages import result_summary
+from .pipeline import Pipeline
+from .schema import RECORD_COLUMNS
+from .search import SearchState
+from .sinks import RecordSink
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS searches (
+    surname     TEXT NOT NULL,
+    search_key  TEXT NOT NULL,
+    total       INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    updated_at  REAL NOT NULL,
+    PRIMARY KEY (surname, search_key)
+);
+CREATE TABLE IF NOT EXISTS page_fingerprints (
+    surname     TEXT NOT NULL,
+    search_key  TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    PRIMARY KEY (surname, search_key, page)
+);
+CREATE TABLE IF NOT EXISTS known_records (
+    surname    TEXT NOT NULL,
+    record_key TEXT NOT NULL,
+    PRIMARY KEY (surname, record_key)
+);
+"""
+
+
+# 逝者标识的列（与 dedup.record_identity 相同：姓名 + 出生日期 + 死亡日期 + 墓地）
+IDENTITY_COLUMNS = ("Full_Name", "Date_of_Birth", "Date_of_Death", "Cemetery")
+
+
+def record_key(record: Dict) -> str:
+    """
+    一条记录的标识：逝者标识 + 全部列（RECORD_COLUMNS）内容的摘要，
+    任何字段变化（例如死亡日期、墓地、墓位）都视为新记录
+    """
+    content = "\x1f".join(str(record.get(column, "")) for column in RECORD_COLUMNS)
+    digest = hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+    return "|".join(str(record.get(column, "")) for column in IDENTITY_COLUMNS) + "|" + digest
+
+
+def page_fingerprint(records: Iterable[Dict]) -> str:
+    """一页记录集合的指纹（与记录顺序无关）"""
+    digest = hashlib.sha1()
+    for key in sorted(record_key(record) for record in records):
+        digest.update(key.encode("utf-8"))
+        digest.update(b"\n")
+    return digest.hexdigest()
+
+
+class IncrementalStore:
+    """
+    增量爬取的上次结果（SQLite）
+    - searches: 每个（子）搜索上次的结果总数和第一页指纹
+    - page_fingerprints: 每页记录集合的指纹
+    - known_records: 已输出过的记录，只有不在其中的记录写入增量文件
+    多个工作线程共用一个连接，写操作加锁
+    """
+
+    def __init__(self, path: str):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    def search_snapshot(self, surname: str, search_key: str) -> Optional[Tuple[int, str]]:
+        """上次该搜索的 (结果总数, 第一页指纹)，没有记录时返回 None"""
+        with self._lock:
+            row = self._conn.execute("SELECT total, fingerprint FROM searches WHERE surname = ? AND search_key = ?",
+                                     (surname, search_key)).fetchone()
+        return tuple(row) if row else None
+
+    def page_fingerprints(self, surname: str) -> Dict[Tuple[str, int], str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT search_key, page, fingerprint FROM page_fingerprints WHERE surname = ?",
+                                      (surname,)).fetchall()
+        return {(key, page): fingerprint for key, page, fingerprint in rows}
+
+    def known_records(self, surname: str) -> Set[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT record_key FROM known_records WHERE surname = ?", (surname,)).fetchall()
+        return {row[0] for row in rows}
+
+    def save(self, surname: str, searches: Dict[str, Tuple[int, str]], pages: Dict[Tuple[str, int], str],
+             new_records: Iterable[str]):
+        """一个姓氏爬取结束后一次性保存（中途失败时不保存，下次仍按有变化处理）"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO searches (surname, search_key, total, fingerprint, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(surname, key, total, fingerprint, now) for key, (total, fingerprint) in searches.items()])
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO page_fingerprints (surname, search_key, page, fingerprint) VALUES (?, ?, ?, ?)",
+                [(surname, key, page, fingerprint) for (key, page), fingerprint in pages.items()])
+            self._conn.executemany("INSERT OR IGNORE INTO known_records (surname, record_key) VALUES (?, ?)",
+                                   [(surname, key) for key in new_records])
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class ChangeTracker:
+    """
+    一个姓氏的增量爬取：按 #results-content 中的结果总数和第一页指纹判断（子）搜索是否有变化
+    没有变化的搜索跳过其余页，有变化的搜索抓取全部页，只输出以前没有出现过的记录
+    """
+
+    def __init__(self, store: IncrementalStore, surname: str, pipeline: Pipeline):
+        self.store = store
+        self.surname = surname
+        self.pipeline = pipeline
+        # 本次看到的各搜索 (总数, 第一页指纹)
+        self.searches: Dict[str, Tuple[int, str]] = {}
+        self.skipped = 0
+
+    def unchanged(self, state: SearchState, first_html: str) -> bool:
+        """结果总数和第一页记录都与上次相同时返回 True"""
+        key = state.key()
+        if key not in self.searches:
+            summary = result_summary(first_html)
+            self.searches[key] = (summary[2] if summary else 0,
+                                  page_fingerprint(self.pipeline.process_page(first_html)))
+        same = self.store.search_snapshot(self.surname, key) == self.searches[key]
+        if same:
+            self.skipped += 1
+        return same
+
+
+def scrape_incremental(pipeline: Pipeline, last_name: str, store: IncrementalStore,
+                       delta_sink: Callable[[], RecordSink], **options) -> Tuple[int, int]:
+    """
+    增量爬取一个姓氏，新的或有变化的记录写入 delta_sink()（第一条增量记录出现时才创建）
+    整个搜索的总数和第一页都没有变化时只需一次搜索请求
+    返回 (增量记录数, 跳过的搜索数)；有页面抓取失败时抛出异常，且不更新保存的指纹
+    pipeline 的去重索引应只在本次爬取内有效：持久化的索引会去掉上次已出现、本次有字段变化的记录
+    """
+    tracker = ChangeTracker(store, last_name, pipeline)
+    state, first_html = pipeline.search(last_name)
+    if tracker.unchanged(state, first_html):
+        print(f"[{last_name}] 结果与上次相同，跳过")
+        return 0, tracker.skipped
+
+    known = store.known_records(last_name)
+    old_pages = store.page_fingerprints(last_name)
+    pages: Dict[Tuple[str, int], str] = {}
+    new_records: List[str] = []
+    sink = None
+    try:
+        for sub_state, page, records in pipeline.crawl(state, first_html, unchanged=tracker.unchanged, **options):
+            fingerprint = page_fingerprint(records)
+            pages[(sub_state.key(), page)] = fingerprint
+            if old_pages.get((sub_state.key(), page)) == fingerprint:
+                continue
+            delta = [record for record in records if record_key(record) not in known]
+            if not delta:
+                continue
+            if sink is None:
+                sink = delta_sink()
+            sink.write_page(delta)
+            for record in delta:
+                known.add(record_key(record))
+                new_records.append(record_key(record))
+    finally:
+        if sink is not None:
+            sink.close()
+
+    if pipeline.failed_pages:
+        raise RuntimeError(f"{len(pipeline.failed_pages)} 个页面抓取失败")
+    store.save(last_name, tracker.searches, pages, new_records)
+    print(f"[{last_name}] 增量记录 {len(new_records)} 条，跳过未变化的搜索 {tracker.skipped} 个")
+    return len(new_records), tracker.skipped
@@ -0,0 +1,216 @@
+"""
+离线批量重新解析：修改解析器后，从存档的原始结果页重新生成记录，不访问网络
+来源可以是目录（*.html / *.htm，以及页面缓存 objects/ 下的 *.zlib）、未压缩的 .tar、.zip
+页面文件用 mmap 映射，只把 #searchResults 表格的字节区间取出来解码、解析，不把整个页面读成 Python 字符串；
+tar 和不压缩存储的 zip 成员直接按字节偏移映射归档文件
+页面按块分给多个解析进程，按来源顺序产出结果
+
+    python cli.py --reparse archive/pages.tar data/page_cache/objects --output-dir data/reparsed
+"""
+import mmap
+import os
+import struct
+import tarfile
+import time
+import zipfile
+import zlib
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from .dedup import DedupIndex, record_identity
+from .filters import RecordFilter
+from .metrics import timings
+from .parse_pool import _to_records
+from .parser import DEFAULT_BACKEND, PARSER_BACKENDS
+
+PAGE_SUFFIXES = (".html", ".htm")
+# 页面缓存（PageCache）中 zlib 压缩的页面
+CACHE_SUFFIX = ".zlib"
+
+_TABLE_MARK = b'id="searchResults"'
+_TABLE_END = b"</table>"
+# zip 本地文件头: 签名 ... 文件名长度(26) 扩展字段长度(28)，共30字节
+_ZIP_LOCAL_HEADER = struct.Struct("<4s22xHH")
+
+
+class PageRef(NamedTuple):
+    """
+    存档中的一页
+    path: 所在文件；name: 显示名称（目录中的相对路径，归档中为 归档:成员）
+    offset / size: 页面在文件中的字节区间，size 为 -1 表示整个文件
+    codec: "" 未压缩（mmap）/ "zlib" 页面缓存文件 / "zip" 压缩的 zip 成员（member 为成员名）
+    """
+    path: str
+    name: str
+    offset: int = 0
+    size: int = -1
+    codec: str = ""
+    member: str = ""
+
+
+def results_region(buffer, start: int = 0, end: Optional[int] = None) -> bytes:
+    """
+    在 buffer（bytes 或 mmap）的 [start, end) 区间中找到 #searchResults 表格，返回表格的字节；没有时返回 b""
+    与 parser.results_table_region 相同：从 <table ... id="searchResults" 到第一个 </table>
+    """
+    end = len(buffer) if end is None else end
+    pos = start
+    while True:
+        pos = buffer.find(_TABLE_MARK, pos, end)
+        if pos < 0:
+            return b""
+        table = buffer.rfind(b"<table", start, pos)
+        # id 属性必须在 <table 标签内（中间没有 >），否则是脚本等其他地方的文字
+        if table >= 0 and buffer.find(b">", table, pos) < 0 and buffer[pos - 1:pos].isspace():
+            break
+        pos += len(_TABLE_MARK)
+    close = buffer.find(_TABLE_END, pos, end)
+    return buffer[table:close + len(_TABLE_END) if close >= 0 else end]
+
+
+def _zip_data_offset(f, info: zipfile.ZipInfo) -> int:
+    """zip 成员数据在归档文件中的起始偏移（跳过本地文件头）"""
+    f.seek(info.header_offset)
+    signature, name_length, extra_length = _ZIP_LOCAL_HEADER.unpack(f.read(_ZIP_LOCAL_HEADER.size))
+    if signature != b"PK\x03\x04":
+        raise ValueError(f"zip 本地文件头损坏: {info.filename}")
+    return info.header_offset + _ZIP_LOCAL_HEADER.size + name_length + extra_length
+
+
+def scan_pages(paths: Iterable[str]) -> List[PageRef]:
+    """
+    列出来源中的全部页面（目录递归，按路径排序）
+    压缩的 tar（.tar.gz 等）不能按偏移映射，需要先解压或改用 zip
+    """
+    pages = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for filename in sorted(files):
+                    if filename.endswith(PAGE_SUFFIXES) or filename.endswith(CACHE_SUFFIX):
+                        file_path = os.path.join(root, filename)
+                        pages.append(PageRef(file_path, os.path.relpath(file_path, path),
+                                             codec="zlib" if filename.endswith(CACHE_SUFFIX) else ""))
+        elif path.endswith(CACHE_SUFFIX):
+            pages.append(PageRef(path, os.path.basename(path), codec="zlib"))
+        elif path.endswith(PAGE_SUFFIXES):
+            pages.append(PageRef(path, os.path.basename(path)))
+        elif zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive, open(path, "rb") as f:
+                for info in archive.infolist():
+                    if info.is_dir() or not info.filename.endswith(PAGE_SUFFIXES):
+                        continue
+                    name = f"{os.path.basename(path)}:{info.filename}"
+                    if info.compress_type == zipfile.ZIP_STORED:
+                        pages.append(PageRef(path, name, _zip_data_offset(f, info), info.file_size))
+                    else:
+                        pages.append(PageRef(path, name, codec="zip", member=info.filename))
+        elif tarfile.is_tarfile(path):
+            try:
+                archive = tarfile.open(path, "r:")
+            except tarfile.ReadError:
+                raise ValueError(f"压缩的 tar 不能按偏移映射，请先解压或改用 zip: {path}")
+            with archive:
+                for member in archive:
+                    if member.isfile() and member.name.endswith(PAGE_SUFFIXES):
+                        pages.append(PageRef(path, f"{os.path.basename(path)}:{member.name}",
+                                             member.offset_data, member.size))
+        else:
+            raise ValueError(f"不支持的来源（应为目录、.html、.zlib、.tar 或 .zip）: {path}")
+    return pages
+
+
+def _read_region(page: PageRef, maps: Dict[str, mmap.mmap]) -> Tuple[bytes, int]:
+    """取出一页的结果表格字节，返回 (表格字节, 从磁盘读取的页面字节数)"""
+    if page.codec == "zlib":
+        with open(page.path, "rb") as f:
+            data = zlib.decompress(f.read())
+        return results_region(data), len(data)
+    if page.codec == "zip":
+        with zipfile.ZipFile(page.path) as archive:
+            data = archive.read(page.member)
+        return results_region(data), len(data)
+    buffer = maps.get(page.path)
+    if buffer is None:
+        with open(page.path, "rb") as f:
+            if not os.fstat(f.fileno()).st_size:
+                return b"", 0
+            buffer = maps[page.path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    end = len(buffer) if page.size < 0 else page.offset + page.size
+    return results_region(buffer, page.offset, end), end - page.offset
+
+
+def _ingest_chunk(pages: List[PageRef], parser: Optional[str],
+                  filters: List[RecordFilter]) -> List[Tuple[str, int, float, Tuple[List[tuple], float, float, int]]]:
+    """
+    工作进程中处理一块页面，同一文件（归档）只映射一次
+    每页返回 (名称, 页面字节数, 读取耗时, 与 parse_pool 相同格式的解析结果)
+    """
+    parse = PARSER_BACKENDS[parser or DEFAULT_BACKEND]
+    maps: Dict[str, mmap.mmap] = {}
+    results = []
+    try:
+        for page in pages:
+            start = time.perf_counter()
+            region, size = _read_region(page, maps)
+            read = time.perf_counter()
+            records = list(parse(region.decode("utf-8", errors="replace"))) if region else []
+            parsed = time.perf_counter()
+            kept = [record for record in records if all(f.accept(record) for f in filters)]
+            filtered = time.perf_counter()
+            rows = [(*record.to_dict().values(), record_identity(record)) for record in kept]
+            results.append((page.name, size, read - start,
+                            (rows, (parsed - read) + (time.perf_counter() - filtered), filtered - parsed,
+                             len(records) - len(kept))))
+    finally:
+        for buffer in maps.values():
+            buffer.close()
+    return results
+
+
+def _chunks(pages: List[PageRef], chunk_pages: int) -> Iterator[List[PageRef]]:
+    for i in range(0, len(pages), chunk_pages):
+        yield pages[i:i + chunk_pages]
+
+
+def ingest_pages(paths: Iterable[str], parser: Optional[str] = None, filters: Optional[List[RecordFilter]] = None,
+                 processes: Optional[int] = None, chunk_pages: int = 64,
+                 dedup: Optional[DedupIndex] = None) -> Iterator[Tuple[str, List[Dict]]]:
+    """
+    重新解析存档中的全部页面，按来源顺序产出 (页面名称, 记录字典列表)
+    processes: 解析进程数，默认等于CPU核数；为1时在当前进程中解析
+    chunk_pages: 每个任务的页数，任务只传页面位置，页面内容由工作进程自己从磁盘读取
+    dedup: 去重索引，在主进程中按顺序去重
+    """
+    pages = scan_pages(paths)
+    filters = filters or []
+    processes = processes or os.cpu_count() or 1
+    print(f"离线解析: {len(pages)} 页，{processes} 个进程")
+
+    def emit(results):
+        for name, size, read_seconds, result in results:
+            timings.add("read", read_seconds)
+            timings.incr("pages")
+            timings.incr("bytes_read", size)
+            yield name, _to_records(result, dedup)
+
+    if processes == 1:
+        for chunk in _chunks(pages, chunk_pages):
+            yield from emit(_ingest_chunk(chunk, parser, filters))
+        return
+
+    # multiprocessing 较重，需要时才导入
+    from concurrent.futures import ProcessPoolExecutor
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        # 最多 2 倍进程数的任务在途，结果按顺序取出，内存不随存档大小增长
+        pending = deque()
+        for chunk in _chunks(pages, chunk_pages):
+            pending.append(executor.submit(_ingest_chunk, chunk, parser, filters))
+            while len(pending) >= processes * 2:
+                yield from emit(pending.popleft().result())
+        while pending:
+            yield from emit(pending.popleft().result())
+    finally:
+        executor.shutdown(cancel_futures=True)
@@ -0,0 +1,237 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+
+# 属于"等待"的阶段（限速等待、等待页面内容出现），其余阶段计为"工作"
+WAIT_STAGES = ("rate_wait", "page_wait")
+# 包含其他阶段的阶段（搜索 = 打开首页 + 提交表单 + 等待结果），不计入等待/工作合计
+COMPOSITE_STAGES = ("search",)
+# 每个阶段保留的耗时样本数（蓄水池抽样），用于估计 p50 / p95
+SAMPLE_SIZE = 4096
+
+
+def error_category(error: BaseException) -> str:
+    """
+    错误分类：timeout / connection / http_4xx / http_5xx / stale_element（浏览器元素失效）/
+    fetch（其他抓取失败）/ 异常自带的 category 属性（例如 empty_table）/ 异常类名
+    FetchError 按其原始异常（__cause__）分类
+    """
+    cause = error
+    while isinstance(cause, Exception) and cause.__cause__ is not None and type(cause).__name__ == "FetchError":
+        cause = cause.__cause__
+    if getattr(cause, "category", None):
+        return cause.category
+    status = getattr(getattr(cause, "response", None), "status_code", None) or getattr(cause, "status", None)
+    if isinstance(status, int) and status >= 400:
+        return f"http_{status // 100}xx"
+    name = type(cause).__name__
+    # asyncio.TimeoutError（Python 3.11 之前不是 TimeoutError 的子类）按类名判断，不必为此导入 asyncio
+    if isinstance(cause, TimeoutError) or "Timeout" in name:
+        return "timeout"
+    if "StaleElement" in name:
+        return "stale_element"
+    if isinstance(cause, ConnectionError) or "Connection" in name or "Disconnected" in name:
+        return "connection"
+    if name == "FetchError":
+        return "fetch"
+    return name
+
+
+def _label_key(name: str, labels: Dict[str, str]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}" if labels else ""
+
+
+class StageTimer:
+    """
+    爬取过程的指标（线程安全）
+    - 各阶段耗时: with timings.measure("fetch"): ...  或  timings.add("fetch", seconds)，
+      阶段包括 driver_start / search / rate_wait / navigate / page_wait / fetch / parse / filter / write
+    - 计数器: timings.incr("pages") / timings.incr("errors", category="timeout")
+      计数器包括 pages / cache_hits / records / filtered / duplicates / retries / errors
+    report() 打印本次运行的汇总表（含 p50 / p95），write_jsonl() / prometheus_text() 输出给监控
+    """
+
+    def __init__(self, sample_size: int = SAMPLE_SIZE):
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self.totals: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self.maxima: Dict[str, float] = {}
+        self._samples: Dict[str, List[float]] = {}
+        self.counters: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+        self._random = random.Random(0)
+
+    def add(self, stage: str, seconds: float):
+        with self._lock:
+            self.totals[stage] = self.totals.get(stage, 0.0) + seconds
+            count = self.counts[stage] = self.counts.get(stage, 0) + 1
+            self.maxima[stage] = max(self.maxima.get(stage, 0.0), seconds)
+            samples = self._samples.setdefault(stage, [])
+            if len(samples) < self.sample_size:
+                samples.append(seconds)
+            else:
+                index = self._random.randrange(count)
+                if index < self.sample_size:
+                    samples[index] = seconds
+
+    @contextmanager
+    def measure(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def incr(self, name: str, n: int = 1, **labels):
+        """计数器加 n，labels 为标签（例如 category="timeout"）"""
+        if not n:
+            return
+        key = _label_key(name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def error(self, error: BaseException, stage: str = "fetch") -> str:
+        """按错误分类计数，返回分类"""
+        category = error_category(error)
+        self.incr("errors", category=category, stage=stage)
+        return category
+
+    def counter(self, name: str, **labels) -> int:
+        """计数器的值；不给 labels 时为该名称所有标签的合计"""
+        with self._lock:
+            if labels:
+                return self.counters.get(_label_key(name, labels), 0)
+            return sum(value for (counter, _), value in self.counters.items() if counter == name)
+
+    def percentile(self, stage: str, q: float) -> float:
+        """阶段耗时的分位数（秒），q 为 0~1；没有样本时为0"""
+        with self._lock:
+            samples = sorted(self._samples.get(stage, ()))
+        if not samples:
+            return 0.0
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def reset(self):
+        with self._lock:
+            self.totals.clear()
+            self.counts.clear()
+            self.maxima.clear()
+            self._samples.clear()
+            self.counters.clear()
+
+    def snapshot(self) -> Dict:
+        """当前指标: {"stages": {阶段: {count, total, p50, p95, max}}, "counters": {名称{标签}: 值}}"""
+        with self._lock:
+            stages = list(self.totals)
+            counters = dict(self.counters)
+        return {
+            "stages": {stage: {"count": self.counts[stage], "total": round(self.totals[stage], 6),
+                               "p50": round(self.percentile(stage, 0.5), 6),
+                               "p95": round(self.percentile(stage, 0.95), 6),
+                               "max": round(self.maxima[stage], 6)} for stage in stages},
+            "counters": {name + _label_text(labels): value for (name, labels), value in sorted(counters.items())},
+        }
+
+    def since(self, before: Dict) -> Dict:
+        """
+        从 before（之前的 snapshot()）到现在的增量，格式与 snapshot() 相同，用于单个任务的统计
+        只包含各阶段的次数、总耗时和计数器之差；分位数和最大值不能按区间相减，不包含在内
+        """
+        now = self.snapshot()
+        stages = {}
+        for stage, values in now["stages"].items():
+            old = before["stages"].get(stage, {"count": 0, "total": 0.0})
+            if values["count"] > old["count"]:
+                stages[stage] = {"count": values["count"] - old["count"],
+                                 "total": round(values["total"] - old["total"], 6)}
+        counters = {name: value - before["counters"].get(name, 0) for name, value in now["counters"].items()
+                    if value != before["counters"].get(name, 0)}
+        return {"stages": stages, "counters": counters}
+
+    def write_jsonl(self, path: str, **fields) -> Dict:
+        """追加一行 JSON（时间戳 + fields + snapshot），每次运行结束时调用"""
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        line = {"time": time.time(), **fields, **self.snapshot()}
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line, ensure_ascii=False) + "\n")
+        return line
+
+    def prometheus_text(self, prefix: str = "gravelocator") -> str:
+        """Prometheus 文本格式：阶段耗时为 summary（含 0.5 / 0.95 分位数），计数器为 counter"""
+        snapshot = self.snapshot()
+        lines = [f"# TYPE {prefix}_stage_seconds summary"]
+        for stage, values in snapshot["stages"].items():
+            for quantile in ("0.5", "0.95"):
+                value = values["p50" if quantile == "0.5" else "p95"]
+                lines.append(f'{prefix}_stage_seconds{{stage="{stage}",quantile="{quantile}"}} {value}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{stage}"}} {values["total"]}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{stage}"}} {values["count"]}')
+        with self._lock:
+            counters = sorted(self.counters.items())
+        declared = set()
+        for (name, labels), value in counters:
+            if name not in declared:
+                lines.append(f"# TYPE {prefix}_{name}_total counter")
+                declared.add(name)
+            lines.append(f"{prefix}_{name}_total{_label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def report(self, since: Optional[Dict] = None):
+        """
+        打印各阶段耗时（含 p50 / p95）、等待/工作时间合计（多线程时为各线程耗时之和）和计数器
+        since: 之前的 snapshot()，给出时只打印此后的增量（没有分位数）
+        """
+        snapshot = self.since(since) if since is not None else self.snapshot()
+        stages = snapshot["stages"]
+        if not stages and not snapshot["counters"]:
+            return
+        print("\n=== 耗时统计 ===")
+        print(f"{'阶段':<12}{'次数':>8}{'总耗时(s)':>12}{'平均(ms)':>12}{'p50(ms)':>10}{'p95(ms)':>10}")
+        for stage in sorted(stages, key=lambda name: stages[name]["total"], reverse=True):
+            values = stages[stage]
+            quantiles = [f"{values[q] * 1000:>10.1f}" if q in values else f"{'-':>10}" for q in ("p50", "p95")]
+            print(f"{stage:<12}{values['count']:>8}{values['total']:>12.2f}"
+                  f"{values['total'] / values['count'] * 1000:>12.1f}" + "".join(quantiles))
+        waiting = sum(stages[stage]["total"] for stage in WAIT_STAGES if stage in stages)
+        working = sum(values["total"] for stage, values in stages.items()
+                      if stage not in WAIT_STAGES and stage not in COMPOSITE_STAGES)
+        print(f"等待: {waiting:.2f}s  工作: {working:.2f}s")
+        if snapshot["counters"]:
+            print("计数: " + "  ".join(f"{name}={value}" for name, value in snapshot["counters"].items()))
+
+
+def serve_metrics(port: int, metrics: Optional[StageTimer] = None, host: str = "127.0.0.1"):
+    """在后台线程中提供 Prometheus 文本格式的指标（任意路径，通常为 /metrics），返回服务器（shutdown() 停止）"""
+    # http.server 只在需要指标端口时导入，不拖慢每个批量工作进程的启动
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = self.server.metrics.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.metrics = metrics or timings
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+# 全局计时器，各阶段共用
+timings = StageTimer()
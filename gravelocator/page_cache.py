@@ -0,0 +1,175 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional
+
+from .fetchers import FetchError
+from .metrics import timings
+from .search import SearchState
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    search_key  TEXT NOT NULL,
+    page        INTEGER NOT NULL,
+    digest      TEXT NOT NULL,
+    fetched_at  REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    PRIMARY KEY (search_key, page)
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size   INTEGER NOT NULL
+);
+"""
+
+
+def page_digest(page_html: str) -> str:
+    """页面内容的 sha256，缓存按内容存放，相同的页（例如"无结果"页）只存一份"""
+    return hashlib.sha256(page_html.encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """
+    磁盘上的原始结果页缓存
+    - 键: 规范化的搜索条件 SearchState.key()（即 sessionVeteranDetails 中除分页外的字段）+ 页码
+    - 内容: zlib 压缩的HTML，按内容 sha256 存放在 <path>/objects/ 下，索引和抓取时间保存在 <path>/index.sqlite
+    - ttl: 超过 ttl 秒的页视为过期，重新抓取后覆盖；cache_only 模式下忽略 ttl
+    - max_bytes: 压缩后总大小上限，超出时按最近使用时间淘汰（LRU）
+    - cache_only: 只从缓存读取，不访问网络，未缓存的页抛出 FetchError（修改解析器后重新解析用）
+    多个线程共用一个连接，操作加锁
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, max_bytes: int = 500 * 1024 * 1024,
+                 cache_only: bool = False):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.cache_only = cache_only
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(os.path.join(path, "objects"), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(path, "index.sqlite"), timeout=30, check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["PageCache"]:
+        """CONFIG["page_cache_dir"] 为空时不使用缓存，返回 None"""
+        if not config.get("page_cache_dir"):
+            return None
+        return cls(config["page_cache_dir"], ttl=config.get("page_cache_ttl", 86400),
+                   max_bytes=int(config.get("page_cache_max_mb", 500) * 1024 * 1024),
+                   cache_only=config.get("cache_only", False))
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.path, "objects", digest[:2], digest + ".zlib")
+
+    def get(self, state: SearchState, page: int) -> Optional[str]:
+        """
+        取出缓存的页面HTML，没有缓存或已过期时返回 None
+        cache_only 模式下忽略过期时间，没有缓存时抛出 FetchError
+        """
+        key = state.key()
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT digest, fetched_at FROM entries WHERE search_key = ? AND page = ?",
+                                     (key, page)).fetchone()
+            if row and (self.cache_only or self.ttl <= 0 or now - row[1] <= self.ttl):
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE search_key = ? AND page = ?",
+                                   (now, key, page))
+                self._conn.commit()
+            else:
+                row = None
+        if row:
+            try:
+                with open(self._blob_path(row[0]), "rb") as f:
+                    page_html = zlib.decompress(f.read()).decode("utf-8")
+                self.hits += 1
+                timings.incr("cache_hits")
+                return page_html
+            except (OSError, zlib.error):
+                pass  # 文件被删除或损坏，按未缓存处理
+        self.misses += 1
+        timings.incr("cache_misses")
+        if self.cache_only:
+            raise FetchError(f"缓存中没有 {key} 第 {page} 页")
+        return None
+
+    def put(self, state: SearchState, page: int, page_html: str):
+        """保存一页，总大小超过上限时淘汰最久未使用的页"""
+        digest = page_digest(page_html)
+        blob_path = self._blob_path(digest)
+        data = zlib.compress(page_html.encode("utf-8"), 6)
+        if not os.path.exists(blob_path):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            # 先写临时文件再改名，其他线程/进程不会读到写了一半的文件
+            temp_path = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, blob_path)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO blobs (digest, size) VALUES (?, ?)", (digest, len(data)))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (search_key, page, digest, fetched_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)", (state.key(), page, digest, now, now))
+            self._conn.commit()
+        self.evict()
+
+    def discard(self, state: SearchState, page: int):
+        """删除一页的缓存（例如 token 失效时缓存了错误的页），内容文件留给 evict 清理"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE search_key = ? AND page = ?", (state.key(), page))
+            self._conn.commit()
+
+    def cached_pages(self, state: SearchState) -> List[int]:
+        """某次搜索已缓存的页码（不论是否过期）"""
+        with self._lock:
+            rows = self._conn.execute("SELECT page FROM entries WHERE search_key = ? ORDER BY page",
+                                      (state.key(),)).fetchall()
+        return [row[0] for row in rows]
+
+    def size(self) -> int:
+        """缓存内容压缩后的总字节数"""
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def evict(self):
+        """总大小超过 max_bytes 时按 accessed_at 从旧到新删除，直到低于上限的 90%"""
+        if self.max_bytes <= 0 or self.size() <= self.max_bytes:
+            return
+        with self._lock:
+            # 先清理已没有页引用的内容（discard 留下的）
+            removed = [row[0] for row in self._conn.execute(
+                "SELECT digest FROM blobs WHERE digest NOT IN (SELECT digest FROM entries)").fetchall()]
+            self._conn.executemany("DELETE FROM blobs WHERE digest = ?", [(digest,) for digest in removed])
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+            entries = self._conn.execute(
+                "SELECT search_key, page, digest FROM entries ORDER BY accessed_at").fetchall()
+            for key, page, digest in entries:
+                if total <= self.max_bytes * 0.9:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE search_key = ? AND page = ?", (key, page))
+                # 内容可能被多个页共用，没有页再引用时才删除
+                if not self._conn.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                    size = self._conn.execute("SELECT size FROM blobs WHERE digest = ?", (digest,)).fetchone()
+                    self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                    total -= size[0] if size else 0
+                    removed.append(digest)
+            self._conn.commit()
+        for digest in removed:
+            try:
+                os.remove(self._blob_path(digest))
+            except OSError:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,67 @@
+import html as html_lib
+import re
+from typing import Dict, Optional, Tuple
+
+from .search import SearchState, extract_page_token
+
+
+# 分页导航中的链接: <a aria-label="Goto Page TOKEN" href="...">2</a> / <a aria-label="Goto Next Page" ...>Next</a>
+_PAGE_LINK_RE = re.compile(r'<a\s+aria-label="Goto Page [^"]*"\s+href="([^"]+)"[^>]*>\s*(\d+)\s*</a>')
+_NEXT_LINK_RE = re.compile(r'<a\s+aria-label="Goto Next Page"\s+href="([^"]+)"')
+# 结果总数: <p id="results-content">Displaying 1 to 10 of 2710 decedent's name found.</p>
+_SUMMARY_RE = re.compile(r'id="results-content"[^>]*>\s*Displaying\s+(\d+)\s+to\s+(\d+)\s+of\s+(\d+)', re.S)
+
+
+def is_result_page(page_html: str) -> bool:
+    """是否为完整的结果页：有结果表格，或有"未找到记录"之类的提示 (#err-msg)"""
+    return 'id="searchResults"' in page_html or 'id="err-msg"' in page_html
+
+
+def page_tokens(page_html: str) -> Dict[int, str]:
+    """提取分页导航中出现的页码及其加密 token {页码: token}"""
+    tokens = {}
+    for href, number in _PAGE_LINK_RE.findall(page_html):
+        token = extract_page_token(html_lib.unescape(href))
+        if token:
+            tokens[int(number)] = token
+    return tokens
+
+
+def page_links(page_html: str, state: SearchState, base_url: str) -> Dict[int, str]:
+    """
+    提取分页导航中出现的页码链接 {页码: 结果页地址}
+    链接统一按 state 重新拼接 sessionVeteranDetails，不依赖页面脚本
+    """
+    return {number: state.result_url(base_url, token) for number, token in page_tokens(page_html).items()}
+
+
+def next_page_url(page_html: str, state: SearchState, base_url: str) -> Optional[str]:
+    """下一页地址，已是最后一页时返回 None"""
+    match = _NEXT_LINK_RE.search(page_html)
+    if not match:
+        return None
+    token = extract_page_token(html_lib.unescape(match.group(1)))
+    return state.result_url(base_url, token) if token else None
+
+
+def result_summary(page_html: str) -> Optional[Tuple[int, int, int]]:
+    """
+    解析 #results-content: "Displaying 1 to 10 of 2710" -> (1, 10, 2710)
+    没有结果时返回 None
+    """
+    match = _SUMMARY_RE.search(page_html)
+    if not match:
+        return None
+    return int(match.group(1)), int(match.group(2)), int(match.group(3))
+
+
+def total_pages(page_html: str, state: Optional[SearchState] = None) -> int:
+    """结果总页数：优先使用 nfp 字段，否则按 #results-content 的总数和每页条数推算"""
+    if state and state.total_pages:
+        return state.total_pages
+    summary = result_summary(page_html)
+    if not summary:
+        return 0
+    first, last, total = summary
+    page_size = max(last - first + 1, 1)
+    return (total + page_size - 1) // page_size
@@ -0,0 +1,203 @@
+import re
+from html.parser import HTMLParser
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+from .schema import record_dict
+
+try:
+    from lxml import etree
+except ImportError:  # lxml 可选，没有时使用标准库解析器
+    etree = None
+
+
+class VeteranRecord(NamedTuple):
+    """结果表格中的一条记录"""
+    number: int
+    full_name: str
+    rank_branch: str
+    date_of_birth: str
+    birth_year: int
+    # 所有"标签: 值"行（标签不含冒号），包括上面已单独列出的字段
+    details: Dict[str, str]
+    # Buried At 行中地图链接 NGLMap?ID= 的墓位编号，没有时为0
+    location_id: int = 0
+
+    def to_dict(self) -> Dict:
+        """转换为记录字典，列及类型见 schema.RECORD_SCHEMA"""
+        return record_dict(self)
+
+
+_TABLE_START_RE = re.compile(r'<table[^>]*\bid="searchResults"')
+_SPACES_RE = re.compile(r'\s+')
+_LOCATION_ID_RE = re.compile(r'NGLMap\?ID=(\d+)')
+# 带地图链接（墓位编号）的行
+LOCATION_LABEL = 'Buried At'
+
+
+def parse_birth_year(birth_date: str) -> int:
+    """
+    从出生日期提取年份
+    格式: 01/17/1925 -> 1925，无法解析时返回0
+    """
+    year = birth_date.rsplit('/', 1)[-1] if '/' in birth_date else ''
+    return int(year) if len(year) == 4 and year.isdigit() else 0
+
+
+def results_table_region(page_html: str) -> str:
+    """截取 #searchResults 表格的HTML，跳过页头脚本和分页导航；没有表格时返回空字符串"""
+    match = _TABLE_START_RE.search(page_html)
+    if not match:
+        return ""
+    end = page_html.find('</table>', match.start())
+    return page_html[match.start():end + len('</table>') if end >= 0 else len(page_html)]
+
+
+def location_id(href: Optional[str]) -> int:
+    """地图链接 /ngl/NGLMap?ID=266866 -> 266866，不是地图链接时返回0"""
+    match = _LOCATION_ID_RE.search(href or '')
+    return int(match.group(1)) if match else 0
+
+
+def _make_record(number: int, details: Dict[str, str], location: int = 0) -> VeteranRecord:
+    date_of_birth = details.get('Date of Birth', '')
+    return VeteranRecord(
+        number=number,
+        full_name=details.get('Name', ''),
+        rank_branch=details.get('Rank & Branch', ''),
+        date_of_birth=date_of_birth,
+        birth_year=parse_birth_year(date_of_birth),
+        details=details,
+        location_id=location,
+    )
+
+
+def _clean(text: str) -> str:
+    return _SPACES_RE.sub(' ', text).strip()
+
+
+class _ResultsTableParser(HTMLParser):
+    """
+    标准库流式解析器（SAX风格），单次遍历结果表格
+    th.item-number 开始一条记录，th.row-header / td.results-info 为标签/值，hr.horizontal-line 结束记录
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.records: List[VeteranRecord] = []
+        self._number = None
+        self._details: Dict[str, str] = {}
+        self._cell = None  # 当前单元格类型: number / label / value
+        self._text: List[str] = []
+        self._label = None
+        self._location = 0
+
+    def _finish(self):
+        if self._number is not None and self._details:
+            self.records.append(_make_record(self._number, self._details, self._location))
+        self._number = None
+        self._details = {}
+        self._label = None
+        self._location = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'th' or tag == 'td':
+            classes = (dict(attrs).get('class') or '').split()
+            if 'item-number' in classes:
+                self._finish()
+                self._cell = 'number'
+            elif 'row-header' in classes:
+                self._cell = 'label'
+            elif 'results-info' in classes and tag == 'td':
+                self._cell = 'value'
+            else:
+                self._cell = None
+            self._text = []
+        elif tag == 'hr':
+            if 'horizontal-line' in (dict(attrs).get('class') or '').split():
+                self._finish()
+        elif tag == 'a' and self._cell == 'value' and self._label == LOCATION_LABEL:
+            self._location = location_id(dict(attrs).get('href')) or self._location
+
+    def handle_endtag(self, tag):
+        if tag not in ('th', 'td') or self._cell is None:
+            return
+        text = _clean(''.join(self._text))
+        if self._cell == 'number':
+            self._number = int(text) if text.isdigit() else 0
+        elif self._cell == 'label':
+            self._label = text.rstrip(':').strip()
+        elif self._cell == 'value' and self._label:
+            self._details[self._label] = text
+            self._label = None
+        self._cell = None
+
+    def handle_data(self, data):
+        if self._cell is not None:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._finish()
+
+
+def _parse_stdlib(region: str) -> Iterator[VeteranRecord]:
+    parser = _ResultsTableParser()
+    parser.feed(region)
+    parser.close()
+    return iter(parser.records)
+
+
+def _parse_lxml(region: str) -> Iterator[VeteranRecord]:
+    """lxml 后端：解析表格片段后单次遍历 tbody 下的 tr"""
+    table = etree.fromstring(region, etree.HTMLParser()).find('.//table')
+    if table is None:
+        return
+    number = None
+    details: Dict[str, str] = {}
+    location = 0
+    for row in table.iterfind('tbody/tr'):
+        label = None
+        for cell in row:
+            classes = (cell.get('class') or '').split()
+            if 'item-number' in classes:
+                if number is not None and details:
+                    yield _make_record(number, details, location)
+                text = _clean(''.join(cell.itertext()))
+                number = int(text) if text.isdigit() else 0
+                details = {}
+                location = 0
+            elif 'row-header' in classes:
+                label = _clean(''.join(cell.itertext())).rstrip(':').strip()
+            elif 'results-info' in classes and cell.tag == 'td' and label:
+                details[label] = _clean(''.join(cell.itertext()))
+                if label == LOCATION_LABEL:
+                    for link in cell.iter('a'):
+                        location = location_id(link.get('href')) or location
+                label = None
+    if number is not None and details:
+        yield _make_record(number, details, location)
+
+
+PARSER_BACKENDS = {
+    'stdlib': _parse_stdlib,
+}
+if etree is not None:
+    PARSER_BACKENDS['lxml'] = _parse_lxml
+
+DEFAULT_BACKEND = 'lxml' if etree is not None else 'stdlib'
+
+
+def register_parser(name: str, parse: Callable[[str], Iterable[VeteranRecord]]):
+    """注册解析后端：parse(表格区域HTML) 按顺序产出 VeteranRecord"""
+    PARSER_BACKENDS[name] = parse
+
+
+def parse_results(page_html: str, backend: Optional[str] = None) -> Iterator[VeteranRecord]:
+    """
+    单次遍历 #searchResults 表格，按顺序产出记录
+    backend: "lxml" / "stdlib"，默认有 lxml 时用 lxml
+    """
+    region = results_table_region(page_html)
+    if not region:
+        return iter(())
+    return PARSER_BACKENDS[backend or DEFAULT_BACKEND](region)
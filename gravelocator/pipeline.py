@@ -0,0 +1,228 @@
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .dedup import DedupIndex
+from .driver_pool import DriverPool
+from .fetchers import DEFAULT_BASE_URL, PageFetcher, create_fetcher
+from .filters import RecordFilter, BirthYearFilter, create_filters, min_birth_year
+from .metrics import timings
+from .page_cache import PageCache
+from .parse_pool import ParsePool
+from .parser import parse_results
+from .retry import CircuitBreaker, RetryPolicy
+from .scheduler import AdaptiveRateLimiter, PageScheduler, RateLimiter
+from .search import NAME_OPT_BEGINS_WITH, SearchState
+from .sinks import RecordSink
+
+
+def process_page(page_html: str, parser: Optional[str], filters: List[RecordFilter],
+                 dedup: Optional[DedupIndex] = None) -> List[Dict]:
+    """
+    解析 + 过滤一页，返回记录字典列表（Full_Name, Rank_Branch, Date_of_Birth, Birth_Year）
+    dedup: 去重索引，已出现过的记录不再返回
+    """
+    start = time.perf_counter()
+    records = list(parse_results(page_html, parser))
+    parsed = time.perf_counter()
+    kept = [record for record in records if all(f.accept(record) for f in filters)]
+    unique = kept if dedup is None else [record for record in kept if dedup.add_record(record)]
+    filtered = time.perf_counter()
+    rows = [record.to_dict() for record in unique]
+    timings.add("parse", (parsed - start) + (time.perf_counter() - filtered))
+    timings.add("filter", filtered - parsed)
+    timings.incr("records", len(rows))
+    timings.incr("filtered", len(records) - len(kept))
+    timings.incr("duplicates", len(kept) - len(unique))
+    return rows
+
+
+class Pipeline:
+    """
+    抓取 → 解析 → 过滤 → 输出 四个阶段，每个阶段都可按名称替换：
+    - 抓取: fetchers.FETCHER_FACTORIES（CONFIG["backend"]）
+    - 解析: parser.PARSER_BACKENDS（CONFIG["parser"]，默认有 lxml 时用 lxml）
+    - 过滤: filters.FILTER_TYPES（CONFIG["filters"]）
+    - 输出: sinks.SINK_TYPES（CONFIG["output_formats"]）
+    出生年份下限同时通过 pyb 字段下推到服务器
+    设置 parse_pool 时解析在独立进程中进行，与抓取同时进行；
+    设置 page_cache 时原始页面先查磁盘缓存（cache_only 模式完全不访问网络）；
+    设置 dedup 时 crawl() 中重复的记录（页面在抓取中移动、多个姓氏前缀重叠）只输出一次；
+    搜索和每页请求失败时按 retry 重试，网站持续出错时 breaker 熔断；
+    重试后仍失败的页在 crawl() 结束前补抓一次（requeue），也可之后用 retry_failed() 补抓
+    """
+
+    def __init__(self, fetcher: PageFetcher, parser: Optional[str] = None,
+                 filters: Optional[List[RecordFilter]] = None, workers: int = 4, rate: float = 2.0,
+                 max_pages: int = 100, rate_limiter: Optional[RateLimiter] = None,
+                 parse_pool: Optional[ParsePool] = None, page_cache: Optional[PageCache] = None,
+                 dedup: Optional[DedupIndex] = None, retry: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, requeue: bool = True):
+        """
+        rate_limiter: 共用的限速器，多个流水线同时运行时保持全局限速；默认按 rate 新建，搜索和各次 crawl 共用
+        parse_pool: 多进程解析池，为空时在抓取线程中解析
+        page_cache: 原始页面缓存，close() 时一并关闭
+        dedup: 记录去重索引，多个流水线共用时跨姓氏去重
+        retry: 失败重试策略，默认最多3次、指数退避
+        breaker: 熔断器，多个流水线共用时网站出错后全部暂停请求；默认每个流水线新建
+        requeue: crawl() 抓完全部页后是否补抓失败的页（只补抓这些页，不重新爬取整个搜索）
+        """
+        self.fetcher = fetcher
+        self.parser = parser
+        self.filters = filters if filters is not None else create_filters({})
+        self.workers = workers
+        self.rate = rate
+        self.max_pages = max_pages
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter(rate, burst=max(workers, 1))
+        self.parse_pool = parse_pool
+        self.page_cache = page_cache
+        self.dedup = dedup
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+        self.requeue = requeue
+        # 最近一次 crawl 中重试后仍失败的页 (搜索状态, 页码)
+        self.failed_pages: List[Tuple[SearchState, int]] = []
+        # 最近一次 crawl 学到的页码 token（补抓时沿用）
+        self.page_tokens: Dict[int, str] = {}
+        # 最近一次 crawl 中总页数超过 max_pages、只抓取了一部分的（子）搜索
+        self.truncated: List[SearchState] = []
+
+    @classmethod
+    def from_config(cls, config: Dict, backend: Optional[str] = None, driver_path: Optional[str] = None,
+                    driver_pool: Optional[DriverPool] = None, rate_limiter: Optional[RateLimiter] = None,
+                    headless: bool = True, parse_pool: Optional[ParsePool] = None,
+                    dedup: Optional[DedupIndex] = None, breaker: Optional[CircuitBreaker] = None) -> "Pipeline":
+        """
+        按 CONFIG 创建各阶段，backend / driver_path 不为空时覆盖 CONFIG 中的设置
+        parse_pool: 共用的解析进程池；为空且 CONFIG["parse_processes"] > 0 时新建
+        dedup: 共用的去重索引；为空时按 CONFIG["dedup"] / CONFIG["dedup_db"] 新建
+        breaker: 共用的熔断器；为空时按 CONFIG["circuit_threshold"] / CONFIG["circuit_reset"] 新建
+        """
+        fetcher = create_fetcher(backend or config.get("backend", "auto"),
+                                 base_url=config.get("base_url", DEFAULT_BASE_URL),
+                                 timeout=config.get("wait_timeout", 15),
+                                 driver_path=driver_path or config.get("driver_path"),
+                                 pool_size=config.get("http_pool_size", 10),
+                                 driver_pool=driver_pool, headless=headless)
+        filters = create_filters(config)
+        if parse_pool is None and config.get("parse_processes", 0) > 0:
+            parse_pool = ParsePool(config["parse_processes"], parser=config.get("parser"), filters=filters,
+                                   compress=config.get("parse_compress", False))
+        return cls(fetcher, parser=config.get("parser"), filters=filters,
+                   workers=config.get("workers", 4), rate=config.get("requests_per_second", 2.0),
+                   max_pages=config.get("max_pages", 100), rate_limiter=rate_limiter, parse_pool=parse_pool,
+                   page_cache=PageCache.from_config(config),
+                   dedup=dedup if dedup is not None else DedupIndex.from_config(config),
+                   retry=RetryPolicy.from_config(config),
+                   breaker=breaker if breaker is not None else CircuitBreaker.from_config(config),
+                   requeue=config.get("requeue_failed", True))
+
+    def _filters_for(self, min_year: Optional[int]) -> List[RecordFilter]:
+        """min_year 不为空时替换过滤器中的出生年份下限"""
+        if min_year is None:
+            return self.filters
+        return [f for f in self.filters if not isinstance(f, BirthYearFilter)] + [BirthYearFilter(min_year)]
+
+    def process_page(self, page_html: str, min_year: Optional[int] = None) -> List[Dict]:
+        """解析并过滤一页，返回记录字典列表"""
+        if self.parse_pool:
+            return self.parse_pool.parse(page_html, self._filters_for(min_year))
+        return process_page(page_html, self.parser, self._filters_for(min_year))
+
+    def search(self, last_name: str, option: str = NAME_OPT_BEGINS_WITH, birth_year: str = "",
+               page_tokens: Optional[Dict[int, str]] = None) -> Tuple[SearchState, str]:
+        """
+        提交姓氏搜索（默认 begins with），返回（服务器返回的搜索状态, 第一页HTML）
+        与结果页请求一样经过限速器、重试策略和熔断器（查询计划的探测搜索也不会绕过限速）
+        birth_year: 只搜索该出生年份（pyb）；搜索表单中没有这个字段，与按出生年份拆分相同，
+        用 page_tokens 中第1页的 token 直接打开结果页
+        """
+        state = SearchState.for_last_name(last_name, option)
+        tokens = {}
+        if birth_year:
+            if not page_tokens or 1 not in page_tokens:
+                raise ValueError("按出生年份搜索需要第1页的 token")
+            state = state.copy(pyb=birth_year)
+            tokens = {1: page_tokens[1]}
+        first_html = self._scheduler(None, tokens).open_search(state)
+        # 以服务器返回的搜索状态为准（包含总页数 nfp）
+        return SearchState.from_page(first_html) or state, first_html
+
+    def crawl(self, state: SearchState, first_html: str, min_year: Optional[int] = None,
+              max_pages: Optional[int] = None, page_tokens: Optional[Dict[int, str]] = None,
+              completed: Optional[Callable[[SearchState], Set[int]]] = None,
+              unchanged: Optional[Callable[[SearchState, str], bool]] = None
+              ) -> Iterator[Tuple[SearchState, int, List[Dict]]]:
+        """
+        抓取一次搜索的全部结果页，按页码顺序产出 (子搜索状态, 页码, 过滤后的记录)
+        page_tokens: 共享的页码 token 表，completed: 断点续爬时已完成的页
+        unchanged: 增量爬取时判断（子）搜索与上次相同、可以跳过
+        requeue 时失败的页在最后补抓，补抓到的页排在其他页之后产出
+        """
+        filters = self._filters_for(min_year)
+        scheduler = self._scheduler(max_pages, page_tokens, completed, unchanged)
+        self.failed_pages = scheduler.failed_pages
+        self.truncated = scheduler.truncated
+        self.page_tokens = scheduler.tokens
+        pages = scheduler.crawl_by_birth_year(state, first_html, min_birth_year(filters))
+        yield from self._process_pages(pages, filters)
+        if self.requeue and self.failed_pages:
+            yield from self.retry_failed(min_year=min_year, max_pages=max_pages, completed=completed)
+
+    def retry_failed(self, failed: Optional[List[Tuple[SearchState, int]]] = None, min_year: Optional[int] = None,
+                     max_pages: Optional[int] = None, page_tokens: Optional[Dict[int, str]] = None,
+                     completed: Optional[Callable[[SearchState], Set[int]]] = None
+                     ) -> Iterator[Tuple[SearchState, int, List[Dict]]]:
+        """
+        补抓失败的页（默认为最近一次 crawl 的 failed_pages），产出同 crawl，不必重新爬取整个搜索
+        page_tokens 为空时沿用最近一次 crawl 学到的 token（出生年份子搜索要靠第1页 token 直接打开）
+        熔断器打开时先等冷却结束；结束后 failed_pages 为仍然失败的页
+        """
+        failed = list(self.failed_pages if failed is None else failed)
+        if not failed:
+            return
+        if self.breaker:
+            self.breaker.wait()
+        print(f"补抓 {len(failed)} 个失败的页面...")
+        scheduler = self._scheduler(max_pages, self.page_tokens if page_tokens is None else page_tokens, completed)
+        scheduler.truncated = self.truncated
+        self.failed_pages = scheduler.failed_pages
+        yield from self._process_pages(scheduler.refetch(failed), self._filters_for(min_year))
+
+    def _scheduler(self, max_pages: Optional[int], page_tokens: Optional[Dict[int, str]],
+                   completed: Optional[Callable[[SearchState], Set[int]]] = None,
+                   unchanged: Optional[Callable[[SearchState, str], bool]] = None) -> PageScheduler:
+        return PageScheduler(self.fetcher, workers=self.workers, rate=self.rate,
+                             max_pages=max_pages or self.max_pages, tokens=page_tokens,
+                             completed=completed, limiter=self.rate_limiter, cache=self.page_cache,
+                             unchanged=unchanged, retry=self.retry, breaker=self.breaker)
+
+    def _process_pages(self, pages: Iterator[Tuple[SearchState, int, str]], filters: List[RecordFilter]
+                       ) -> Iterator[Tuple[SearchState, int, List[Dict]]]:
+        """解析并过滤抓到的页，按抓取顺序产出 (搜索状态, 页码, 记录)"""
+        if self.parse_pool:
+            # 已抓到的页交给解析进程，同时继续抓取后面的页，结果仍按页码顺序产出
+            parsed = self.parse_pool.imap((((sub_state, page), page_html) for sub_state, page, page_html in pages),
+                                          filters, dedup=self.dedup)
+            for (sub_state, page), records in parsed:
+                yield sub_state, page, records
+            return
+        for sub_state, page, page_html in pages:
+            yield sub_state, page, process_page(page_html, self.parser, filters, self.dedup)
+
+    def run(self, last_name: str, sink: RecordSink, **options) -> int:
+        """搜索一个姓氏并把全部记录逐页写入 sink，返回记录数（options 同 crawl）"""
+        state, first_html = self.search(last_name)
+        count = 0
+        for _, _, records in self.crawl(state, first_html, **options):
+            sink.write_page(records)
+            count += len(records)
+        return count
+
+    def close(self):
+        self.fetcher.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+        if self.page_cache:
+            self.page_cache.close()
+        if self.dedup:
+            self.dedup.flush()
@@ -0,0 +1,156 @@
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from .batch import SurnameTrie
+from .dedup import dict_identity
+from .filters import min_birth_year
+from .pages import result_summary, total_pages
+from .pipeline import Pipeline
+from .search import NAME_OPT_BEGINS_WITH, NAME_OPT_EXACT, SearchState
+
+
+# begins with 前缀按下一个字符拆分时使用的字符（姓氏中可能出现连字符和撇号：SMITH-JONES, O'BRIEN）
+NAME_ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZ-'"
+
+
+class PlannedQuery(NamedTuple):
+    """计划中的一次搜索：服务器返回的搜索状态、第一页HTML（探测时已抓取，执行时直接复用）、结果总数和总页数"""
+    state: SearchState
+    first_html: str
+    total: int
+    pages: int
+
+    @classmethod
+    def from_page(cls, state: SearchState, first_html: str) -> "PlannedQuery":
+        summary = result_summary(first_html)
+        return cls(state, first_html, summary[2] if summary else 0, total_pages(first_html, state))
+
+
+class QueryPlanner:
+    """
+    查询计划：按 #results-content 中的结果总数，决定一个姓氏前缀用一次 begins with 搜索，
+    还是拆成更窄的搜索，使每次搜索都不超过 max_pages、完整覆盖全部记录且抓取的页数尽量少
+    - 不超过 max_pages：直接抓取这个前缀
+    - 超过但有出生年份下限、按年份拆分后平均每年不超过 max_pages：仍用这个前缀，由 crawl 按 pyb 拆分
+      （只抓取符合出生年份的记录，比按姓名拆分的页数少）；记录集中在个别年份、该年份仍超过 max_pages 时，
+      crawl 抓完后把这些年份（pyb 不变）再按姓名拆分抓取
+    - 否则按姓名拆分：精确匹配（nlOpt=1）的这个姓氏 + 前缀后加一个字符的 begins with 搜索，递归规划
+    探测子搜索的第一页在执行时复用，只有被拆分的宽泛搜索的第一页是额外请求
+    """
+
+    def __init__(self, pipeline: Pipeline, max_pages: Optional[int] = None, min_year: Optional[int] = None,
+                 alphabet: str = NAME_ALPHABET):
+        self.pipeline = pipeline
+        self.max_pages = max_pages or pipeline.max_pages
+        self.min_year = min_year if min_year is not None else min_birth_year(pipeline.filters)
+        self.alphabet = alphabet
+        # 规划时发出的搜索数
+        self.probes = 0
+        # 按出生年份搜索要用的页码 token（按年份拆分的 crawl 学到第1页 token 后更新）
+        self.tokens: Dict[int, str] = {}
+
+    def probe(self, prefix: str, option: str = NAME_OPT_BEGINS_WITH, birth_year: str = "") -> PlannedQuery:
+        """搜索一次，取得结果总数；birth_year 不为空时只搜索该出生年份"""
+        self.probes += 1
+        state, first_html = self.pipeline.search(prefix, option, birth_year, self.tokens)
+        return PlannedQuery.from_page(state, first_html)
+
+    def _split_by_year(self, pages: int) -> bool:
+        """crawl 会按出生年份拆分（页数多于年份数），且平均每个年份不超过 max_pages"""
+        if not self.min_year:
+            return False
+        years = datetime.now().year - self.min_year + 1
+        return years < pages <= years * self.max_pages
+
+    def plan(self, query: PlannedQuery) -> List[PlannedQuery]:
+        """
+        把一次搜索规划为若干次不超过 max_pages 的搜索，合起来覆盖原搜索的全部记录
+        限定了出生年份的搜索只按姓名拆分，子搜索限定同一年份
+        """
+        year = query.state.birth_year
+        if query.pages <= self.max_pages or (not year and self._split_by_year(query.pages)):
+            return [query]
+        prefix = query.state.last_name
+        label = f"{prefix}（出生年份 {year}）" if year else prefix
+        if query.state.fields["nlOpt"] == NAME_OPT_EXACT:
+            print(f"[{label}] 精确匹配共 {query.pages} 页，无法再按姓名拆分，结果不完整")
+            return [query]
+
+        print(f"[{label}] 共 {query.pages} 页，超过上限 {self.max_pages} 页，按姓名拆分为更窄的搜索")
+        children = [self.probe(prefix, NAME_OPT_EXACT, year)]
+        for char in self.alphabet:
+            child = self.probe(prefix + char, birth_year=year)
+            if child.state.last_name != prefix + char:
+                # 服务器忽略了这个字符，拆分不能缩小范围
+                print(f"[{label}] 无法按 {prefix + char} 拆分，改为抓取原搜索（结果不完整）")
+                return [query]
+            children.append(child)
+
+        covered = sum(child.total for child in children)
+        if covered < query.total:
+            print(f"[{label}] 拆分后的搜索共 {covered} 条，少于原搜索的 {query.total} 条"
+                  f"（姓氏中有不在 {self.alphabet} 中的字符）")
+        return [planned for child in children if child.total for planned in self.plan(child)]
+
+    def plan_surnames(self, surnames: Iterable[str]) -> Dict[str, List[PlannedQuery]]:
+        """
+        为姓氏列表规划查询：请求的姓氏组成前缀树，被更短的请求姓氏覆盖的不单独搜索
+        返回 {根姓氏: 查询列表}
+        """
+        return {root: self.plan(self.probe(root)) for root in SurnameTrie(surnames).roots()}
+
+    def crawl(self, state: SearchState, first_html: str, **options
+              ) -> Iterator[Tuple[SearchState, int, List[Dict]]]:
+        """
+        按计划抓取一次（已提交的）搜索，产出同 Pipeline.crawl
+        结束后 pipeline.failed_pages / pipeline.truncated 为全部查询的合计
+        """
+        queries = self.plan(PlannedQuery.from_page(state, first_html))
+        if len(queries) > 1:
+            print(f"[{state.last_name}] 计划 {len(queries)} 次搜索，共约 {sum(q.pages for q in queries)} 页")
+        failed_pages, truncated = [], []
+        for query in queries:
+            yield from self._crawl_query(query, failed_pages, truncated, options)
+        self.pipeline.failed_pages = failed_pages
+        self.pipeline.truncated = truncated
+
+    def _crawl_query(self, query: PlannedQuery, failed_pages: List, truncated: List, options: Dict
+                     ) -> Iterator[Tuple[SearchState, int, List[Dict]]]:
+        """
+        抓取计划中的一次查询，失败的页和被截断的搜索追加到 failed_pages / truncated
+        按出生年份拆分时，超过 max_pages 的年份在抓完后按姓名重新规划（限定该年份）再抓取，
+        该年份已产出的前 max_pages 页中的记录不再重复产出
+        """
+        seen: Dict[str, Set[str]] = {}
+        for sub_state, page, records in self.pipeline.crawl(query.state, query.first_html, **options):
+            if sub_state.birth_year != query.state.birth_year and \
+                    sub_state.key() in {state.key() for state in self.pipeline.truncated}:
+                seen.setdefault(sub_state.key(), set()).update(dict_identity(record) for record in records)
+            yield sub_state, page, records
+        failed_pages.extend(self.pipeline.failed_pages)
+        years = [state for state in self.pipeline.truncated if state.birth_year != query.state.birth_year]
+        truncated.extend(state for state in self.pipeline.truncated if state.birth_year == query.state.birth_year)
+        if not years:
+            return
+
+        self.tokens = dict(self.pipeline.page_tokens)
+        for year_state in years:
+            try:
+                replanned = self.plan(self.probe(year_state.last_name, year_state.fields["nlOpt"],
+                                                 year_state.birth_year))
+            except Exception as e:
+                print(f"[{year_state.last_name}] 出生年份 {year_state.birth_year} 重新规划失败: {str(e)}")
+                truncated.append(year_state)
+                continue
+            if [q.state.key() for q in replanned] == [year_state.key()]:
+                # 无法再拆分，已抓取的前 max_pages 页就是全部结果
+                truncated.append(year_state)
+                continue
+            print(f"[{year_state.last_name}] 出生年份 {year_state.birth_year} 超过 {self.max_pages} 页，"
+                  f"按姓名拆分为 {len(replanned)} 次搜索")
+            done = seen.get(year_state.key(), set())
+            for child in replanned:
+                for sub_state, page, records in self.pipeline.crawl(child.state, child.first_html, **options):
+                    yield sub_state, page, [record for record in records if dict_identity(record) not in done]
+                failed_pages.extend(self.pipeline.failed_pages)
+                truncated.extend(self.pipeline.truncated)
@@ -0,0 +1,161 @@
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, List
+
+from .schema import RECORD_SCHEMA
+from .sinks import RecordSink
+
+
+# 取值很少的列（军衔/军种、战争时期、墓地及其地址电话）按类别编码存储，每个取值只保存一份
+CATEGORICAL_COLUMNS = ('Rank_Branch', 'War_Period', 'Cemetery', 'Cemetery_ID', 'Cemetery_Address',
+                       'Cemetery_State', 'Cemetery_Phone')
+# 日期列保存为 Unix 秒（int64），缺失值为 NaT 对应的最小 int64
+_NAT = -2 ** 63
+_EPOCH_DAY = date(1970, 1, 1).toordinal()
+
+
+def _date_seconds(value) -> int:
+    if value is None or value == '':
+        return _NAT
+    return (value.toordinal() - _EPOCH_DAY) * 86400
+
+
+def _seconds_date(value: int):
+    return None if value == _NAT else date.fromordinal(value // 86400 + _EPOCH_DAY)
+
+
+class _CategoricalColumn:
+    """类别编码列：codes 为 int32 数组，categories 为不重复的取值"""
+
+    __slots__ = ('codes', 'categories', '_index')
+
+    def __init__(self):
+        self.codes = array('i')
+        self.categories: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def append(self, value: str):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.categories)
+            self.categories.append(value)
+        self.codes.append(code)
+
+    def __getitem__(self, index: int) -> str:
+        return self.categories[self.codes[index]]
+
+
+class RecordStore(RecordSink):
+    """
+    列式记录存储，代替记录字典列表（results_data）
+    - 只追加：可作为 RecordSink 直接接收解析后的每页记录
+    - 类别列只保存 int32 编码，整数和日期列保存在 array 中，每条记录不再重复保存字典的键
+    - to_pandas() / to_arrow() 的数值、日期列和类别编码直接引用 array 的缓冲区，不复制数据
+      （导出的 DataFrame / Table 存在期间 array 不能扩容，不能再追加记录）
+    迭代或按下标访问时按需还原为记录字典
+    """
+
+    def __init__(self, records: Iterable[Dict] = ()):
+        self._columns = {}
+        self._kinds = {}
+        for name, kind in RECORD_SCHEMA:
+            if name in CATEGORICAL_COLUMNS:
+                self._columns[name] = _CategoricalColumn()
+            elif kind is int or kind is date:
+                self._columns[name] = array('q')
+            else:
+                self._columns[name] = []
+            self._kinds[name] = kind
+        self._size = 0
+        self.write_page(records)
+
+    def append(self, record: Dict):
+        try:
+            for name, column in self._columns.items():
+                value = record.get(name)
+                kind = self._kinds[name]
+                if kind is date:
+                    column.append(_date_seconds(value))
+                elif kind is int:
+                    column.append(value or 0)
+                else:
+                    column.append(value or '')
+        except BufferError:
+            # 导出的 DataFrame 仍在引用缓冲区：撤销已追加的列，保持各列等长
+            for column in self._columns.values():
+                values = column.codes if isinstance(column, _CategoricalColumn) else column
+                del values[self._size:]
+            raise
+        self._size += 1
+
+    def write_page(self, records: Iterable[Dict]):
+        for record in records:
+            self.append(record)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getitem__(self, index: int) -> Dict:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError(index)
+        row = {}
+        for name, column in self._columns.items():
+            value = column[index]
+            row[name] = _seconds_date(value) if self._kinds[name] is date else value
+        return row
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(self._size):
+            yield self[index]
+
+    def categories(self, name: str) -> List[str]:
+        """类别列的全部取值（按首次出现的顺序）"""
+        return list(self._columns[name].categories)
+
+    def to_pandas(self):
+        """转换为 pandas DataFrame（需要 numpy + pandas）：类别列为 category，日期列为 datetime64[s]"""
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for name, column in self._columns.items():
+            kind = self._kinds[name]
+            if isinstance(column, _CategoricalColumn):
+                data[name] = pd.Categorical.from_codes(np.frombuffer(column.codes, dtype=np.int32),
+                                                       column.categories)
+            elif kind is date:
+                data[name] = np.frombuffer(column, dtype='datetime64[s]')
+            elif kind is int:
+                data[name] = np.frombuffer(column, dtype=np.int64)
+            else:
+                data[name] = column
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        """转换为 pyarrow Table：类别列为 dictionary，日期列为 date32（缺失为 null）"""
+        import numpy as np
+        import pyarrow as pa
+
+        arrays = []
+        for name, column in self._columns.items():
+            kind = self._kinds[name]
+            if isinstance(column, _CategoricalColumn):
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(np.frombuffer(column.codes, dtype=np.int32)), pa.array(column.categories, pa.string())))
+            elif kind is date:
+                seconds = np.frombuffer(column, dtype='datetime64[s]')
+                arrays.append(pa.array(seconds, from_pandas=True).cast(pa.date32()))
+            elif kind is int:
+                arrays.append(pa.array(np.frombuffer(column, dtype=np.int64)))
+            else:
+                arrays.append(pa.array(column, pa.string()))
+        return pa.Table.from_arrays(arrays, names=list(self._columns))
+
+    def write_parquet(self, path: str):
+        """写入 Parquet（需要 pyarrow）"""
+        import pyarrow.parquet as pq
+
+        pq.write_table(self.to_arrow(), path)
+        return path
@@ -0,0 +1,405 @@
+"""
+本地回放服务器：模拟 Nationwide Gravesite Locator 的搜索表单和分页结果页，用于离线测试和端到端基准测试
+页面以 debug_page.html 为模板，记录为按姓氏确定性生成的虚构数据
+
+用法: python -m gravelocator.replay [--records 2710] [--latency 0.05] [--port 8000]
+"""
+import base64
+import hashlib
+import hmac
+import html as html_lib
+import os
+import random
+import re
+import threading
+import time
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from urllib.parse import parse_qs, unquote
+
+from .search import NAME_OPT_EXACT, SearchState
+
+
+DEFAULT_TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "debug_page.html")
+
+PAGE_SIZE = 10
+
+# 搜索表单字段名 -> sessionVeteranDetails 字段（元素 id 与真实网站一致）
+FORM_FIELDS = {
+    "lastName": "nl",
+    "lastNameOpt": "nlOpt",
+    "firstName": "nf",
+    "firstNameOpt": "nfOpt",
+    "middleName": "nm",
+    "middleNameOpt": "nmOpt",
+}
+
+LANDING_PAGE = """<html lang="en"><head><meta charset="utf-8"><title>Nationwide Gravesite Locator</title></head>
+<body>
+<form id="searchForm" action="/ngl/search" method="post">
+  <input type="hidden" name="nglUP" value="1">
+  <input id="lname" name="lastName" type="text" value="">
+  <select id="lnameopt" name="lastNameOpt"><option value="1">Exact</option><option value="2" selected>Begins with</option></select>
+  <input id="fname" name="firstName" type="text" value="">
+  <select id="fnameopt" name="firstNameOpt"><option value="1" selected>Exact</option><option value="2">Begins with</option></select>
+  <input id="mname" name="middleName" type="text" value="">
+  <select id="mnameopt" name="middleNameOpt"><option value="1" selected>Exact</option><option value="2">Begins with</option></select>
+  <button id="searchb" type="submit">Search</button>
+</form>
+</body></html>
+"""
+
+NO_RESULTS = '<p id="err-msg" class="text-danger">No records found matching your search criteria.</p>'
+
+_FIRST_NAMES = ["JOHN", "MARY", "JAMES", "ROBERT", "LINDA", "WILLIAM", "DAVID", "SUSAN", "JOSEPH", "KAREN",
+                "THOMAS", "NANCY", "CHARLES", "BETTY", "DANIEL", "HELEN", "PAUL", "DONNA", "MARK", "CAROL"]
+_MIDDLE_NAMES = ["", "A", "B", "LEE", "MARIE", "EDWARD", "ANN", "J", "RAY", "LOUISE"]
+_SURNAME_SUFFIXES = ["S", "SON", "ER"]
+_RANKS = ["PVT US ARMY", "SGT US ARMY", "S1 US NAVY", "COX US NAVY", "CPL US MARINE CORPS",
+          "SSGT US AIR FORCE", "CWO4 US AIR FORCE", "LT US NAVY", "SPC US ARMY", "PO2 US COAST GUARD"]
+_WAR_PERIODS = ["WORLD WAR I", "WORLD WAR II", "KOREA", "VIETNAM", "GULF WAR", "PERSIAN GULF"]
+_CEMETERIES = [
+    ("FT. ROSECRANS NATIONAL CEMETERY", "1700 CABRILLO MEMORIAL DR  SAN DIEGO, CA 92106", "(619) 553-2084"),
+    ("ROCKY GAP VETERANS CEMETERY", "14305 PLEASANT VALLEY RD NE  FLINTSTONE, MD 21530", "(301) 777-2185"),
+    ("AUGUSTA MEMORIAL PARK", "1775 GOOSE CREEK ROAD  WAYNESBORO, VA 22980", "(540) 942-4727"),
+    ("FORT SNELLING NATIONAL CEMETERY", "7601 34TH AVE S  MINNEAPOLIS, MN 55450", "(612) 726-1127"),
+    ("CALVERTON NATIONAL CEMETERY", "210 PRINCETON BLVD  CALVERTON, NY 11933", "(631) 727-5410"),
+]
+
+
+class Decedent(NamedTuple):
+    last_name: str
+    first_name: str
+    rank_branch: str
+    war_period: str
+    birth: str
+    death: str
+    site: str
+    location_id: int
+    cemetery: int
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.last_name}, {self.first_name}"
+
+    @property
+    def birth_year(self) -> str:
+        return self.birth[-4:]
+
+
+def _row(label: str, value: str) -> str:
+    return (f'\n\t\t\t\t\t\t\t<tr>\n\t\t\t\t\t\t\t\t<th scope="row" class="p-0 m-0 row-header"><div class="p-2">{label}:</div></th>'
+            f'\n\t\t\t\t\t\t\t\t<td class="results-info m-0 p-0"><div class="p-2">{value}</div></td>\n\t\t\t\t\t\t\t</tr>\n')
+
+
+def render_record(number: int, person: Decedent) -> str:
+    """按网站的表格结构渲染一条记录（每个字段一行，记录之间用 horizontal-line 分隔）"""
+    cemetery, address, phone = _CEMETERIES[person.cemetery]
+    rows = [_row("Rank &amp; Branch", f"{person.rank_branch} "),
+            _row("War Period", f"{person.war_period} "),
+            _row("Date of Birth", person.birth),
+            _row("Date of Death", person.death),
+            _row("Buried At", f'{person.site}\n\t\t\t\t\t\t\t\t\t<a href="/ngl/NGLMap?ID={person.location_id}" '
+                              f'target="_blank"><img name="viewmap" src="/ngl/img_ngl/btnViewMap_new.gif" '
+                              f'alt="Click to view the Map Layout for {cemetery}"></a>\n\t\t\t\t\t\t\t\t\t'),
+            _row("Cemetery", f'<a tabindex="0" class="results-info not-a-link">{cemetery}</a>'),
+            _row("Cemetery Address", f"{cemetery}, {address}"),
+            _row("Telephone", phone)]
+    return (f'\n\t\t\t\t\t\t<tr>\n\t\t\t\t\t\t\t<th class="table_row_labels item-number text-center" scope="rowgroup" '
+            f'rowspan="{len(rows) + 1}"><div class="p-2">{number}</div></th>'
+            f'\n\t\t\t\t\t\t\t<th scope="row" class="m-0 p-0 colored row-header"><div class="p-2">Name:</div></th>'
+            f'\n\t\t\t\t\t\t\t<td class="results-info m-0 p-0"><div class="p-2">{person.full_name}  </div></td>'
+            f'\n\t\t\t\t\t\t</tr>\n' + "".join(rows) +
+            '\n\t\t\t\t\t\t<tr tabindex="-1">\n\t\t\t\t\t\t\t<td tabindex="-1" aria-label="row divider" colspan="3">'
+            '<hr role="presentation" class="horizontal-line"></td>\n\t\t\t\t\t\t</tr>\n')
+
+
+def generate_decedents(surname: str, count: int, seed: int = 0) -> List[Decedent]:
+    """
+    为姓氏生成 count 条虚构记录（同一 seed 结果相同），按姓名排序
+    约四分之一的记录姓氏带后缀（SMITH -> SMITHS），只在 begins with 搜索中出现
+    """
+    rng = random.Random(f"{seed}:{surname}")
+    people = []
+    for _ in range(count):
+        last_name = surname if rng.random() < 0.75 else surname + rng.choice(_SURNAME_SUFFIXES)
+        first_name = f"{rng.choice(_FIRST_NAMES)} {rng.choice(_MIDDLE_NAMES)}".strip()
+        birth_year = rng.randint(1890, 2005)
+        death_year = min(birth_year + rng.randint(18, 95), 2025)
+        people.append(Decedent(
+            last_name=last_name,
+            first_name=first_name,
+            rank_branch=rng.choice(_RANKS),
+            war_period=rng.choice(_WAR_PERIODS),
+            birth=f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{birth_year}",
+            death=f"{rng.randint(1, 12):02d}/{rng.randint(1, 28):02d}/{death_year}",
+            site=f"SECTION {rng.choice('ABCDEFGS')} SITE {rng.randint(1, 9999)}",
+            location_id=rng.randint(100000, 99999999),
+            cemetery=rng.randrange(len(_CEMETERIES)),
+        ))
+    people.sort(key=lambda person: (person.full_name, person.birth))
+    return people
+
+
+class ReplaySite:
+    """
+    回放网站的数据和页面渲染（与 HTTP 服务器无关，可直接调用）
+    records: 每个姓氏的记录数，或 {姓氏: 记录数}（未列出的姓氏没有记录）
+    latency / jitter: 每个请求的响应延迟（秒）及随机抖动比例
+    """
+
+    def __init__(self, records: Union[int, Dict[str, int]] = 2710, latency: float = 0.0, jitter: float = 0.0,
+                 template_path: str = DEFAULT_TEMPLATE, seed: int = 0, secret: bytes = b"replay"):
+        self.records = records
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self._secret = secret
+        self._token_pages: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        with open(template_path, encoding="utf-8") as f:
+            self._parts, self._defaults = self._split_template(f.read())
+        # 每个姓氏的数据只生成一次
+        self._decedents = lru_cache(maxsize=64)(self._generate)
+
+    @staticmethod
+    def _split_template(template: str) -> Tuple[List[str], Dict[str, str]]:
+        """
+        把模板中会变化的部分替换为占位符，拆成 [固定, 占位符, 固定, ...]
+        结果表格的首尾也是占位符（默认值为模板原文），没有结果时替换为 #err-msg
+        """
+        substitutions = [
+            (r'(?<=JSON\.stringify\()\{.*?\}(?=\))', "session"),
+            (r'<p id="results-content">.*?</p>', "summary"),
+            (r'<table id="searchResults".*?<tbody[^>]*>', "table_open"),
+            (r'(?<=\x00table_open\x00).*?(?=</tbody>)', "rows"),
+            (r'</tbody>\s*</table>', "table_close"),
+            (r'(?<=<nav id="pagination" role="navigation" aria-label="Pagination Navigation">).*?(?=</nav>)', "nav"),
+        ]
+        defaults = {}
+        for pattern, name in substitutions:
+            match = re.search(pattern, template, flags=re.S)
+            if not match:
+                raise ValueError(f"模板中缺少 {name} 部分")
+            defaults[name] = match.group(0)
+            template = template[:match.start()] + f"\x00{name}\x00" + template[match.end():]
+        return template.split("\x00"), defaults
+
+    def _generate(self, surname: str) -> List[Decedent]:
+        count = self.records if isinstance(self.records, int) else self.records.get(surname, 0)
+        return generate_decedents(surname, count, self.seed)
+
+    def _matching(self, surname: str) -> List[Decedent]:
+        """
+        以 surname 为前缀的候选记录：records 为字典时合并所有与之前缀相关的姓氏（SMI 包含 SMITH、SMITHSON），
+        按姓名排序；records 为整数时每个查询各自生成
+        """
+        if isinstance(self.records, int):
+            return self._decedents(surname)
+        roots = [root for root in self.records if root.startswith(surname) or surname.startswith(root)]
+        if len(roots) == 1:
+            return self._decedents(roots[0])
+        people = [person for root in roots for person in self._decedents(root)]
+        return sorted(set(people), key=lambda person: (person.full_name, person.birth))
+
+    def count_request(self, kind: str):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def delay(self):
+        if self.latency > 0:
+            time.sleep(self.latency * (1 + random.uniform(-self.jitter, self.jitter)))
+
+    # ---- 页码 token ----
+
+    def page_token(self, page: int) -> str:
+        """页码 -> 加密 token（只依赖页码，与真实网站的观察一致）"""
+        digest = hmac.new(self._secret, str(page).encode(), hashlib.sha256).digest()[:16]
+        token = base64.urlsafe_b64encode(digest).decode("ascii")
+        self._token_pages[token] = page
+        return token
+
+    def token_page(self, token: str) -> Optional[int]:
+        return self._token_pages.get(token)
+
+    # ---- 搜索与渲染 ----
+
+    def search(self, state: SearchState) -> List[Decedent]:
+        """按姓氏（精确 / begins with）、名和出生年份过滤"""
+        surname = state.last_name.upper()
+        if not surname:
+            return []
+        if state.fields["nlOpt"] == NAME_OPT_EXACT:
+            people = [person for person in self._matching(surname) if person.last_name == surname]
+        else:
+            people = [person for person in self._matching(surname) if person.last_name.startswith(surname)]
+        first_name = state.fields["nf"].upper()
+        if first_name:
+            people = [person for person in people if person.first_name.split()[0] == first_name]
+        if state.birth_year:
+            people = [person for person in people if person.birth_year == state.birth_year]
+        return people
+
+    def _page_href(self, state: SearchState, page: int) -> str:
+        return html_lib.escape(f"/ngl/result/{self.page_token(page)}/{state.to_session_json()}")
+
+    def _render_nav(self, state: SearchState, page: int, pages: int) -> str:
+        """分页导航：当前页前后共10页的链接，以及 Previous / Next"""
+        items = ["\n\t\t\t\t<p align=\"center\">\n\t\t     \tPage: "]
+        if page > 1:
+            items.append(f'<a aria-label="Goto Previous Page" href="{self._page_href(state, page - 1)}">Previous</a>')
+        else:
+            items.append("Previous")
+        start = max(1, page - 4)
+        for number in range(start, min(pages, start + 9) + 1):
+            items.append("&nbsp;&nbsp;|&nbsp;&nbsp;")
+            if number == page:
+                items.append(str(number))
+            else:
+                items.append(f'\n\t\t\t\t\t\t\t<a aria-label="Goto Page {self.page_token(number)}" '
+                             f'href="{self._page_href(state, number)}">{number}</a>')
+        if page < pages:
+            items.append(f'&nbsp;&nbsp;|&nbsp;&nbsp;\n\t\t\t\t\t\t<a aria-label="Goto Next Page" '
+                         f'href="{self._page_href(state, page + 1)}">Next</a>')
+        items.append("\n\t\t\t\t</p>\n\t\t\t\t<p></p>\n\t\t\t")
+        return "".join(items)
+
+    def render_results(self, state: SearchState, page: int = 1) -> str:
+        """渲染第 page 页结果"""
+        people = self.search(state)
+        pages = (len(people) + PAGE_SIZE - 1) // PAGE_SIZE
+        first = (page - 1) * PAGE_SIZE
+        shown = people[first:first + PAGE_SIZE]
+        state = state.copy(pn=page, nfp=pages or "")
+
+        values = {"session": state.to_session_json()}
+        if shown:
+            values["summary"] = (f'<p id="results-content">Displaying {first + 1} to {first + len(shown)} of\n'
+                                 f"\t\t\t\t\t{len(people)} decedent's name found.</p>")
+            values["rows"] = "".join(render_record(first + i + 1, person) for i, person in enumerate(shown))
+            values["nav"] = self._render_nav(state, page, pages)
+        else:
+            values.update(summary="", table_open=NO_RESULTS, rows="", table_close="", nav="")
+
+        parts = list(self._parts)
+        for i in range(1, len(parts), 2):
+            name = parts[i]
+            parts[i] = values.get(name, self._defaults[name])
+        return "".join(parts)
+
+    def handle(self, method: str, path: str, body: str = "") -> Optional[str]:
+        """
+        处理一个请求，返回页面HTML；地址不存在时返回 None
+        GET /ngl -> 搜索表单，POST /ngl/search -> 第1页，GET /ngl/result/<token>/<JSON> -> 对应页
+        """
+        path, _, query = path.partition("?")
+        if method == "GET" and path.rstrip("/") == "/ngl":
+            self.count_request("landing")
+            return LANDING_PAGE
+        if path == "/ngl/search":
+            self.count_request("search")
+            form = parse_qs(body if method == "POST" else query, keep_blank_values=True)
+            fields = {FORM_FIELDS[name]: values[0] for name, values in form.items() if name in FORM_FIELDS}
+            return self.render_results(SearchState.for_last_name(fields.pop("nl", ""),
+                                                                 fields.pop("nlOpt", "2")).copy(**fields))
+        if method == "GET" and path.startswith("/ngl/result/"):
+            # JSON 中的 "/" 被编码为 %2F，先按原始路径拆分再解码
+            token, _, session = path[len("/ngl/result/"):].partition("/")
+            page = self.token_page(unquote(token))
+            if page is None:
+                return None
+            try:
+                state = SearchState.from_session_json(unquote(session))
+            except ValueError:
+                return None
+            self.count_request("result")
+            return self.render_results(state, page)
+        return None
+
+
+class _ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # 响应头和正文分两次写出，关闭 Nagle 避免 keep-alive 连接上每个请求多等 40ms
+    disable_nagle_algorithm = True
+
+    def _respond(self, method: str):
+        site: ReplaySite = self.server.site
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode("utf-8") if length else ""
+        site.delay()
+        page_html = site.handle(method, self.path, body)
+        status = 200 if page_html is not None else 404
+        data = (page_html if page_html is not None else "Not Found").encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._respond("GET")
+
+    def do_POST(self):
+        self._respond("POST")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ReplayServer:
+    """
+    在后台线程中运行回放网站
+    with ReplayServer(ReplaySite(records=500)) as server:
+        CONFIG["base_url"] = server.base_url
+    """
+
+    def __init__(self, site: Optional[ReplaySite] = None, host: str = "127.0.0.1", port: int = 0):
+        self.site = site or ReplaySite()
+        self._httpd = ThreadingHTTPServer((host, port), _ReplayHandler)
+        self._httpd.daemon_threads = True
+        self._httpd.site = self.site
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/ngl"
+
+    def start(self) -> "ReplayServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="replay-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="本地回放 Nationwide Gravesite Locator")
+    parser.add_argument("--records", type=int, default=2710, help="每个姓氏的记录数")
+    parser.add_argument("--latency", type=float, default=0.0, help="每个请求的响应延迟（秒）")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟的随机抖动比例")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    server = ReplayServer(ReplaySite(args.records, args.latency, args.jitter), port=args.port)
+    print(f"回放服务器已启动: {server.base_url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
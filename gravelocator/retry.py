@@ -0,0 +1,177 @@
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, TypeVar
+
+from .fetchers import FetchError
+from .metrics import timings
+
+
+# 可以重试的失败类别（error_category 的结果）：超时、连接错误、服务器5xx错误、
+# 浏览器元素失效、页面不完整（没有结果表格），其余（4xx、表单缺失等）重试也不会成功
+RETRYABLE_ERRORS = ("timeout", "connection", "http_5xx", "stale_element", "empty_table")
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(FetchError):
+    """熔断器打开期间不再发出请求（网站持续出错），该页记为失败，之后可补抓"""
+    category = "circuit_open"
+
+
+class RetryPolicy:
+    """
+    失败重试策略：可重试的失败（RETRYABLE_ERRORS）按指数退避加随机抖动等待后重试，
+    每个请求最多尝试 attempts 次
+    第 n 次重试前等待 base_delay * 2^(n-1)（不超过 max_delay），再乘以 [1 - jitter, 1] 之间的随机数，
+    避免多个线程同时重试
+    """
+
+    def __init__(self, attempts: int = 3, base_delay: float = 0.5, max_delay: float = 30.0, jitter: float = 0.5,
+                 retryable=RETRYABLE_ERRORS):
+        self.attempts = max(attempts, 1)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+        self.retryable = set(retryable)
+        self._random = random.Random()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "RetryPolicy":
+        return cls(attempts=config.get("retry_attempts", 3), base_delay=config.get("retry_backoff", 0.5),
+                   max_delay=config.get("retry_max_delay", 30.0))
+
+    def should_retry(self, category: str, attempt: int) -> bool:
+        """第 attempt 次尝试（从1开始）以 category 类别失败后是否重试"""
+        return attempt < self.attempts and category in self.retryable
+
+    def delay(self, attempt: int) -> float:
+        """第 attempt 次尝试失败后、下一次尝试前的等待秒数"""
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        return delay * (1 - self.jitter * self._random.random())
+
+
+class CircuitBreaker:
+    """
+    熔断器（多个线程、多个调度器共用）：连续 threshold 次请求失败时打开，
+    打开后 reset_after 秒内的请求直接失败（CircuitOpenError），不再给已经出错的网站增加压力；
+    之后放行一个试探请求（半开），成功则关闭，失败则重新打开
+    threshold <= 0 表示不启用
+    """
+
+    def __init__(self, threshold: int = 10, reset_after: float = 60.0):
+        self.threshold = threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "CircuitBreaker":
+        return cls(threshold=config.get("circuit_threshold", 10), reset_after=config.get("circuit_reset", 60.0))
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def remaining(self) -> float:
+        """距离允许试探请求还有多少秒，未打开时为0"""
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(0.0, self.opened_at + self.reset_after - time.monotonic())
+
+    def before_request(self) -> bool:
+        """
+        请求前检查：打开期间抛出 CircuitOpenError；冷却结束后只放行一个试探请求
+        返回本次请求是否为试探请求（结束时必须调用 record() 或 release()）
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if time.monotonic() - self.opened_at < self.reset_after or self._trial:
+                raise CircuitOpenError(f"连续 {self.failures} 次请求失败，暂停请求")
+            self._trial = True
+            return True
+
+    def record(self, ok: bool):
+        """记录一次请求的结果"""
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            trial, self._trial = self._trial, False
+            if ok:
+                if self.opened_at is not None:
+                    print("请求恢复正常，熔断器关闭")
+                self.failures = 0
+                self.opened_at = None
+                return
+            self.failures += 1
+            if trial or (self.opened_at is None and self.failures >= self.threshold):
+                print(f"连续 {self.failures} 次请求失败，熔断器打开，{self.reset_after:.0f} 秒后重试")
+                self.opened_at = time.monotonic()
+                timings.incr("circuit_open")
+
+    def release(self):
+        """
+        试探请求以不计入熔断器的方式结束（4xx、表单缺失、解析错误、被中断等）：
+        不改变熔断器状态，但放弃本次试探，由下一个请求重新试探，熔断器不会一直停在半开状态
+        """
+        with self._lock:
+            self._trial = False
+
+    def wait(self):
+        """等到冷却结束（补抓失败页之前调用）"""
+        delay = self.remaining()
+        if delay:
+            print(f"等待熔断器冷却 {delay:.0f} 秒...")
+            time.sleep(delay)
+
+
+def call_with_retry(request: Callable[[], T], policy: Optional[RetryPolicy] = None,
+                    breaker: Optional[CircuitBreaker] = None, stage: str = "fetch",
+                    on_result: Optional[Callable[[float, bool], None]] = None) -> T:
+    """
+    发出请求，失败时按 policy 重试（policy 为空时不重试），结果计入 breaker
+    on_result(耗时, 是否成功): 每次尝试后的回调（例如反馈给限速器）
+    每次失败按类别计入 errors，每次重试计入 retries；最后一次失败的异常原样抛出
+    """
+    attempt = 0
+    while True:
+        attempt += 1
+        start = time.perf_counter()
+        trial = False
+        try:
+            if breaker:
+                trial = breaker.before_request()
+            result = request()
+        except CircuitOpenError as e:
+            timings.error(e, stage=stage)
+            raise
+        except Exception as e:
+            if on_result:
+                on_result(time.perf_counter() - start, False)
+            category = timings.error(e, stage=stage)
+            if breaker:
+                # 只有网站本身出错（超时、5xx 等）才计入熔断器，其他失败只结束试探
+                if category in RETRYABLE_ERRORS:
+                    breaker.record(False)
+                elif trial:
+                    breaker.release()
+            if not policy or not policy.should_retry(category, attempt):
+                raise
+            delay = policy.delay(attempt)
+            print(f"请求失败（{category}），{delay:.1f} 秒后第 {attempt} 次重试: {str(e)}")
+            timings.incr("retries", reason=category)
+            time.sleep(delay)
+            continue
+        except BaseException:
+            if trial:
+                breaker.release()
+            raise
+        if on_result:
+            on_result(time.perf_counter() - start, True)
+        if breaker:
+            breaker.record(True)
+        return result
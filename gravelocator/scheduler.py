@@ -0,0 +1,370 @@
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from .fetchers import FetchError, PageFetcher
+from .metrics import timings
+from .page_cache import PageCache
+from .pages import page_tokens, result_summary, total_pages
+from .retry import CircuitBreaker, RetryPolicy, call_with_retry
+from .search import SearchState, birth_year_states
+
+
+class RateLimiter:
+    """
+    全局限速（令牌桶），所有工作线程共享
+    rate: 每秒请求数，<=0 表示不限速
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> float:
+        """
+        不阻塞地尝试取一个令牌：成功返回0，否则返回还需等待的秒数
+        （asyncio 引擎用 await asyncio.sleep 等待，不占用线程）
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            delay = self.try_acquire()
+            if not delay:
+                return
+            time.sleep(delay)
+
+    def record(self, latency: float, ok: bool = True):
+        """记录一次请求的耗时和结果（固定速率限速器不做调整）"""
+
+
+class AdaptiveRateLimiter(RateLimiter):
+    """
+    自适应限速：出错或响应慢于 slow_after 秒时速率减半（不低于 min_rate），
+    响应正常时每次恢复上限的 1/10，直到回到设定的 rate
+    """
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: Optional[float] = None, slow_after: float = 5.0):
+        super().__init__(rate, burst)
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 16
+        self.slow_after = slow_after
+
+    def record(self, latency: float, ok: bool = True):
+        if self.max_rate <= 0:
+            return
+        with self._lock:
+            if not ok or latency > self.slow_after:
+                new_rate = max(self.min_rate, self.rate / 2)
+                if new_rate < self.rate:
+                    print(f"响应变慢或出错，请求速率降为 {new_rate:.2f}/s")
+                self.rate = new_rate
+            else:
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 10)
+
+
+class PageScheduler:
+    """
+    已知总页数后并发抓取剩余结果页
+
+    页码 token 由服务器加密生成，只能从已抓取页面的分页导航中获得，
+    所以调度按"边抓边发现"进行：每抓到一页就把导航里新出现的页码加入待抓队列。
+    已学到的 token 保存在 self.tokens 中，同一调度器后续的搜索可以直接复用。
+    结果按页码顺序返回。
+    """
+
+    def __init__(self, fetcher: PageFetcher, workers: int = 4, rate: float = 2.0, max_pages: int = 100,
+                 tokens: Optional[Dict[int, str]] = None,
+                 completed: Optional[Callable[[SearchState], Set[int]]] = None,
+                 limiter: Optional[RateLimiter] = None, cache: Optional[PageCache] = None,
+                 unchanged: Optional[Callable[[SearchState, str], bool]] = None,
+                 retry: Optional[RetryPolicy] = None, breaker: Optional[CircuitBreaker] = None):
+        """
+        limiter: 共用的限速器（多个调度器同时运行时保持全局限速），默认按 rate 新建
+        retry: 失败重试策略（默认最多3次、指数退避），breaker: 共用的熔断器，为空时不熔断
+        cache: 原始页面缓存，命中时不发请求
+        unchanged: 由某次搜索的第一页判断结果与上次相同时返回 True，跳过该搜索的其余页（增量爬取）
+        tokens: 预先已知的页码 token（例如从断点记录中恢复），会被就地更新
+        completed: 返回某次搜索中已完成、无需再抓取的页码（断点续爬）
+        """
+        self.fetcher = fetcher
+        # 浏览器后端不能多线程共用，只能逐页抓取
+        self.workers = max(workers, 1) if fetcher.concurrent else 1
+        # auto 后端可能在运行中切换到浏览器（fetcher.concurrent 变为 False），之后的请求逐个发出
+        self._serial = threading.Lock()
+        self.limiter = limiter or AdaptiveRateLimiter(rate, burst=self.workers)
+        self.max_pages = max_pages
+        self.tokens: Dict[int, str] = tokens if tokens is not None else {}
+        self.completed = completed
+        self.cache = cache
+        self.unchanged = unchanged
+        self.retry = retry or RetryPolicy()
+        self.breaker = breaker
+        # 重试后仍失败的页 (搜索状态, 页码)，可用 refetch() 补抓；页码为1表示整个（子）搜索失败
+        self.failed_pages: List[Tuple[SearchState, int]] = []
+        # 总页数超过 max_pages、只抓取了前 max_pages 页的搜索
+        self.truncated: List[SearchState] = []
+
+    def _request(self, request: Callable[[], str], stage: str = "fetch") -> str:
+        """
+        限速后发出请求，并把耗时和成败反馈给限速器；
+        失败按分类计数，可重试的失败按 retry 退避后重试（每次重试重新限速），结果计入熔断器
+        """
+        def attempt() -> str:
+            with timings.measure("rate_wait"):
+                self.limiter.acquire()
+            start = time.perf_counter()
+            try:
+                if self.fetcher.concurrent:
+                    page_html = request()
+                else:
+                    with self._serial:
+                        page_html = request()
+            except Exception:
+                self.limiter.record(time.perf_counter() - start, ok=False)
+                raise
+            self.limiter.record(time.perf_counter() - start)
+            return page_html
+
+        page_html = call_with_retry(attempt, self.retry, self.breaker, stage)
+        timings.incr("pages")
+        return page_html
+
+    def _fetch(self, state: SearchState, page: int) -> str:
+        if self.cache:
+            page_html = self.cache.get(state, page)
+            if page_html is not None:
+                return page_html
+        url = state.result_url(self.fetcher.base_url, self.tokens[page])
+        page_html = self._request(lambda: self.fetcher.fetch_page(url))
+        if self.cache:
+            self.cache.put(state, page, page_html)
+        return page_html
+
+    def _check_page(self, page_html: str, page: int, page_size: int) -> bool:
+        """确认返回的是期望的页（token 失效时服务器可能返回别的页）"""
+        summary = result_summary(page_html)
+        return summary is None or summary[0] == (page - 1) * page_size + 1
+
+    def crawl(self, state: SearchState, first_html: str) -> Iterator[Tuple[int, str]]:
+        """
+        从第一页开始按页码顺序产出 (页码, HTML)
+        first_html: 搜索后得到的第一页
+        """
+        if self.unchanged and self.unchanged(state, first_html):
+            year_label = f"（出生年份 {state.birth_year}）" if state.birth_year else ""
+            print(f"搜索结果{year_label}与上次相同，跳过")
+            return
+
+        summary = result_summary(first_html)
+        page_size = summary[1] - summary[0] + 1 if summary else 10
+        last_page = min(total_pages(first_html, state) or 1, self.max_pages)
+        if total_pages(first_html, state) > self.max_pages:
+            print(f"共 {total_pages(first_html, state)} 页，超过上限 {self.max_pages} 页，结果不完整")
+            self.truncated.append(state)
+        print(f"共 {last_page} 页待抓取，并发数 {self.workers}")
+
+        self.tokens.update(page_tokens(first_html))
+        skip = self.completed(state) if self.completed else set()
+        done: Dict[int, Optional[str]] = {1: None if 1 in skip else first_html}
+        pending = {}
+        next_page = 1
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            while next_page <= last_page:
+                # 按顺序产出已完成的页（断点中已完成的页为 None，跳过）
+                while next_page in done:
+                    page_html = done.pop(next_page)
+                    if page_html is not None:
+                        yield next_page, page_html
+                    next_page += 1
+                if next_page > last_page:
+                    break
+
+                # 提交已知 token 的页，窗口限制在当前页之后的有限范围内，避免结果堆积
+                in_flight = set(pending.values())
+                window_end = min(last_page, next_page + self.workers * 4)
+                for page in range(next_page, window_end + 1):
+                    if len(pending) >= self.workers * 2:
+                        break
+                    if page in done or page in in_flight:
+                        continue
+                    if page in skip:
+                        done[page] = None
+                        continue
+                    if page not in self.tokens:
+                        continue
+                    pending[pool.submit(self._fetch, state, page)] = page
+
+                if not pending and next_page not in done:
+                    # 断点中跳过的页没有抓取，后续页的 token 未知时重新抓一个已完成的页来发现链接
+                    known = [page for page in skip if page < next_page and page in self.tokens]
+                    if not known:
+                        # 发现链接的页抓取失败时后面的页无法继续，全部记为失败，之后可补抓
+                        print(f"第 {next_page} 页的链接未知，停止抓取")
+                        self.failed_pages.extend((state, page) for page in range(next_page, last_page + 1)
+                                                 if page not in done and page not in skip)
+                        break
+                    page = max(known)
+                    skip.discard(page)
+                    pending[pool.submit(self._fetch, state, page)] = -page
+
+                if not pending:
+                    continue
+
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    page = pending.pop(future)
+                    try:
+                        page_html = future.result()
+                    except Exception as e:
+                        print(f"第 {abs(page)} 页抓取失败: {str(e)}")
+                        if page > 0:
+                            self.failed_pages.append((state, page))
+                            done[page] = None
+                        continue
+
+                    if page < 0:
+                        # 仅用于发现链接的页，不再产出
+                        self.tokens.update(page_tokens(page_html))
+                        continue
+
+                    if not self._check_page(page_html, page, page_size):
+                        print(f"第 {page} 页的 token 已失效，丢弃")
+                        timings.incr("errors", category="stale_token", stage="fetch")
+                        self.tokens.pop(page, None)
+                        if self.cache:
+                            self.cache.discard(state, page)
+                        self.failed_pages.append((state, page))
+                        done[page] = None
+                        continue
+
+                    self.tokens.update(page_tokens(page_html))
+                    done[page] = page_html
+
+    def open_search(self, state: SearchState) -> str:
+        """
+        打开一次搜索的第一页
+        已知第1页 token 时直接按 sessionVeteranDetails 构造地址（一次GET），否则提交搜索表单
+        """
+        if 1 in self.tokens:
+            return self._fetch(state, 1)
+        if self.cache:
+            page_html = self.cache.get(state, 1)
+            if page_html is not None:
+                return page_html
+        with timings.measure("search"):
+            try:
+                page_html = self._request(lambda: self.fetcher.search(state), stage="search")
+            except FetchError as e:
+                # 重试策略放弃后（或表单缺失等不可重试的失败）才切换到备用后端（auto 后端改用浏览器）再搜索
+                if not self.fetcher.fall_back(e):
+                    raise
+                page_html = self._request(lambda: self.fetcher.search(state), stage="search")
+        if self.cache:
+            self.cache.put(state, 1, page_html)
+        return page_html
+
+    def _learn_first_page_token(self, state: SearchState, first_html: str) -> bool:
+        """第1页自身没有指向第1页的链接，需要从第2页的分页导航中获得"""
+        self.tokens.update(page_tokens(first_html))
+        if 1 not in self.tokens and 2 in self.tokens:
+            try:
+                self.tokens.update(page_tokens(self._fetch(state, 2)))
+            except Exception as e:
+                print(f"获取第1页 token 失败: {str(e)}")
+        return 1 in self.tokens
+
+    def crawl_by_birth_year(self, state: SearchState, first_html: str, min_year: int,
+                            max_year: Optional[int] = None) -> Iterator[Tuple[SearchState, int, str]]:
+        """
+        用 pyb 字段把出生年份条件下推到服务器：每个出生年份单独搜索并合并结果
+        产出 (子搜索状态, 页码, HTML)
+
+        按年份拆分至少要为每个年份请求一次，所以只有原搜索的页数多于年份数时才拆分；
+        服务器没有按 pyb 过滤时退回到原搜索逐页抓取（客户端仍会按出生年份过滤）；
+        min_year 为0（没有出生年份下限）或搜索本身已限定出生年份（pyb）时不拆分
+        """
+        year_states = birth_year_states(state, min_year, max_year) if min_year and not state.birth_year else []
+        base_pages = total_pages(first_html, state)
+
+        if (not year_states or base_pages <= len(year_states)
+                or not self._learn_first_page_token(state, first_html)):
+            for page, page_html in self.crawl(state, first_html):
+                yield state, page, page_html
+            return
+
+        print(f"按出生年份拆分为 {len(year_states)} 次搜索 ({min_year}-{year_states[-1].birth_year})")
+        checked = False
+        failed_before = len(self.failed_pages)
+        for year_state in year_states:
+            try:
+                year_html = self.open_search(year_state)
+            except Exception as e:
+                # 整个年份的搜索失败：记为第1页失败，补抓时重新搜索该年份并抓取全部页
+                print(f"出生年份 {year_state.birth_year} 搜索失败: {str(e)}")
+                self.failed_pages.append((year_state, 1))
+                continue
+
+            server_state = SearchState.from_page(year_html)
+            if not checked and server_state and server_state.birth_year != year_state.birth_year:
+                print("服务器未按出生年份过滤，改为抓取原搜索结果")
+                del self.failed_pages[failed_before:]
+                for page, page_html in self.crawl(state, first_html):
+                    yield state, page, page_html
+                return
+            checked = True
+
+            if result_summary(year_html) is None:
+                continue  # 该年份没有记录
+            year_state = server_state or year_state
+            for page, page_html in self.crawl(year_state, year_html):
+                yield year_state, page, page_html
+
+    def refetch(self, failed: List[Tuple[SearchState, int]], page_size: int = 10
+                ) -> Iterator[Tuple[SearchState, int, str]]:
+        """
+        补抓之前失败的页，产出 (搜索状态, 页码, HTML)，不必重新爬取整个搜索
+        页码为1的重新提交该（子）搜索并抓取它的全部页；其他页按已知 token 直接抓取
+        仍失败的页重新记入 failed_pages
+        """
+        for state, page in failed:
+            try:
+                if page == 1:
+                    first_html = self.open_search(state)
+                    if result_summary(first_html) is None:
+                        continue  # 该搜索没有记录
+                    server_state = SearchState.from_page(first_html)
+                    if state.birth_year and server_state and server_state.birth_year != state.birth_year:
+                        raise FetchError(f"出生年份 {state.birth_year} 的搜索未按年份过滤")
+                    state = server_state or state
+                    for sub_page, page_html in self.crawl(state, first_html):
+                        yield state, sub_page, page_html
+                    continue
+                if page not in self.tokens:
+                    raise FetchError(f"第 {page} 页的链接未知")
+                page_html = self._fetch(state, page)
+                if not self._check_page(page_html, page, page_size):
+                    self.tokens.pop(page, None)
+                    if self.cache:
+                        self.cache.discard(state, page)
+                    raise FetchError(f"第 {page} 页的 token 已失效")
+            except Exception as e:
+                print(f"第 {page} 页补抓失败: {str(e)}")
+                self.failed_pages.append((state, page))
+                continue
+            self.tokens.update(page_tokens(page_html))
+            yield state, page, page_html
@@ -0,0 +1,98 @@
+import re
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+
+# 记录字典的列及类型（顺序即输出顺序）
+# 日期在解析时转换一次为 datetime.date，原始字符串（MM/DD/YYYY）仍保留在 Date_of_Birth / Date_of_Death
+RECORD_SCHEMA: List[Tuple[str, type]] = [
+    ('Full_Name', str),
+    ('Rank_Branch', str),
+    ('War_Period', str),
+    ('Date_of_Birth', str),
+    ('Birth_Year', int),
+    ('Birth_Date', date),
+    ('Date_of_Death', str),
+    ('Death_Date', date),
+    ('Buried_At', str),
+    ('Location_ID', int),
+    ('Cemetery', str),
+    ('Cemetery_ID', str),
+    ('Cemetery_Address', str),
+    ('Cemetery_State', str),
+    ('Cemetery_Phone', str),
+]
+RECORD_COLUMNS = [name for name, _ in RECORD_SCHEMA]
+DATE_COLUMNS = [name for name, kind in RECORD_SCHEMA if kind is date]
+
+# 结果表格中的标签 -> 列
+LABEL_COLUMNS = {
+    'Name': 'Full_Name',
+    'Rank & Branch': 'Rank_Branch',
+    'War Period': 'War_Period',
+    'Date of Birth': 'Date_of_Birth',
+    'Date of Death': 'Date_of_Death',
+    'Buried At': 'Buried_At',
+    'Cemetery': 'Cemetery',
+    'Cemetery Address': 'Cemetery_Address',
+    'Telephone': 'Cemetery_Phone',
+}
+
+# 墓地名称中的缩写（FT. ROSECRANS / FORT ROSECRANS 是同一个墓地）
+_CEMETERY_ABBREVIATIONS = {'FT': 'FORT', 'MT': 'MOUNT', 'ST': 'SAINT', 'NATL': 'NATIONAL', 'CEM': 'CEMETERY'}
+_NON_WORD_RE = re.compile(r"[^A-Z0-9&']+")
+_STATE_RE = re.compile(r',\s*([A-Z]{2})\s+\d{5}(?:-\d{4})?\s*$')
+
+
+def parse_date(text: str) -> Optional[date]:
+    """MM/DD/YYYY -> date，月或日未知（00）、格式不对时返回 None"""
+    parts = text.strip().split('/')
+    if len(parts) != 3 or not all(part.isdigit() for part in parts):
+        return None
+    try:
+        return date(int(parts[2]), int(parts[0]), int(parts[1]))
+    except ValueError:
+        return None
+
+
+def cemetery_id(name: str) -> str:
+    """规范化的墓地标识：大写、去掉标点、展开常见缩写，例如 FT. ROSECRANS NATIONAL CEMETERY -> FORT ROSECRANS NATIONAL CEMETERY"""
+    words = _NON_WORD_RE.sub(' ', name.upper()).split()
+    return ' '.join(_CEMETERY_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def cemetery_address(address: str, cemetery: str) -> str:
+    """去掉地址开头重复的墓地名称: "AUGUSTA MEMORIAL PARK, 1775 GOOSE CREEK ROAD ..." -> "1775 GOOSE CREEK ROAD ..." """
+    if cemetery and address.startswith(cemetery):
+        return address[len(cemetery):].lstrip(' ,')
+    return address
+
+
+def address_state(address: str) -> str:
+    """地址末尾的州缩写: "... WAYNESBORO, VA 22980" -> "VA"，没有时为空字符串"""
+    match = _STATE_RE.search(address)
+    return match.group(1) if match else ''
+
+
+def record_dict(record) -> Dict:
+    """VeteranRecord -> 按 RECORD_SCHEMA 的记录字典（未出现的文本列为空字符串，日期为 None，整数为0）"""
+    details = record.details
+    row = {column: details.get(label, '') for label, column in LABEL_COLUMNS.items()}
+    cemetery = row['Cemetery']
+    row['Birth_Year'] = record.birth_year
+    row['Birth_Date'] = parse_date(row['Date_of_Birth'])
+    row['Death_Date'] = parse_date(row['Date_of_Death'])
+    row['Location_ID'] = record.location_id
+    row['Cemetery_ID'] = cemetery_id(cemetery)
+    row['Cemetery_Address'] = cemetery_address(row['Cemetery_Address'], cemetery)
+    row['Cemetery_State'] = address_state(row['Cemetery_Address'])
+    return {column: row[column] for column in RECORD_COLUMNS}
+
+
+def restore_types(record: Dict) -> Dict:
+    """JSON 往返后（断点记录）把 ISO 日期字符串还原为 date"""
+    for column in DATE_COLUMNS:
+        value = record.get(column)
+        if isinstance(value, str):
+            record[column] = date.fromisoformat(value) if value else None
+    return record
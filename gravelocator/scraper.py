@@ -0,0 +1,306 @@
+from typing import Dict, List, Optional
+
+from .checkpoint import CheckpointStore
+from .dedup import DedupIndex, dict_identity
+from .driver_pool import DriverPool
+from .metrics import timings
+from .pages import next_page_url, result_summary
+from .parser import parse_birth_year
+from .pipeline import Pipeline
+from .record_store import RecordStore
+from .planner import QueryPlanner
+from .retry import CircuitBreaker, call_with_retry
+from .scheduler import RateLimiter
+from .sinks import CsvSink, RecordSink, create_sink, export_excel, extract_name_parts, output_row
+
+
+class VeteransGravesiteScraper:
+    """
+    main.py / veterans_scraper.py / ixed_scraper.py 共用的爬虫
+    抓取、解析、过滤、输出都由 Pipeline 完成，各阶段由 CONFIG 选择
+    """
+
+    def __init__(self, config: Optional[Dict] = None, backend: Optional[str] = None,
+                 driver_path: Optional[str] = None, driver_pool: Optional[DriverPool] = None,
+                 rate_limiter: Optional[RateLimiter] = None, headless: bool = True,
+                 dedup: Optional[DedupIndex] = None, breaker: Optional[CircuitBreaker] = None):
+        """
+        初始化爬虫
+        config: 配置（config.CONFIG），未设置的项使用默认值
+        backend: 抓取后端 http / selenium / auto，默认使用 CONFIG["backend"]
+        driver_path: ChromeDriver路径（仅浏览器后端使用）
+        driver_pool: 浏览器池，多个爬虫实例共用已启动的 Chrome
+        rate_limiter: 共用的限速器，多个爬虫实例同时运行时保持全局限速
+        dedup: 共用的去重索引，多个爬虫实例之间去重（默认每个实例按 CONFIG 新建）
+        breaker: 共用的熔断器，网站持续出错时所有爬虫实例一起暂停请求（默认每个实例按 CONFIG 新建）
+        """
+        self.config = config if config is not None else {}
+        self.pipeline = Pipeline.from_config(self.config, backend=backend, driver_path=driver_path,
+                                             driver_pool=driver_pool, rate_limiter=rate_limiter,
+                                             headless=headless, dedup=dedup, breaker=breaker)
+        self.fetcher = self.pipeline.fetcher
+        self.base_url = self.fetcher.base_url
+        self.search_state = None
+        self.page_source = ""
+        # 不逐页写出时记录保存在列式存储中（可零拷贝转换为 DataFrame / Parquet）
+        self.results_data = RecordStore()
+        self.failed_pages = []
+        # 是否有（子）搜索因超过 max_pages 只抓取了一部分
+        self.truncated = False
+        # 逐页写出时不保留记录，只保留摘要所需的统计
+        self.record_count = 0
+        self.birth_year_range = None
+        self.sample_records = []
+
+    def search_by_last_name(self, last_name: str):
+        """
+        在首页搜索姓氏（begins with）
+        """
+        try:
+            print(f"正在搜索姓氏: {last_name}")
+            self.search_state, self.page_source = self.pipeline.search(last_name)
+            print("结果页面加载完成")
+            return True
+
+        except Exception as e:
+            print(f"搜索时发生错误: {str(e)}")
+            return False
+
+    def extract_name_parts(self, full_name: str) -> tuple:
+        """
+        将全名分割为姓和名
+        格式: MICHAEL, BERNARD EDWARD -> 姓: MICHAEL, 名: BERNARD EDWARD
+        """
+        return extract_name_parts(full_name)
+
+    def parse_birth_year(self, birth_date: str) -> int:
+        """
+        从出生日期提取年份
+        格式: 01/17/1925 -> 1925
+        """
+        return parse_birth_year(birth_date)
+
+    def parse_results_page(self, min_birth_year: Optional[int] = None) -> List[Dict]:
+        """
+        解析当前结果页面，提取符合条件的记录
+        min_birth_year 为空时使用 CONFIG["min_birth_year"]
+        """
+        try:
+            if 'id="searchResults"' not in self.page_source:
+                print("未找到结果表格")
+                return []
+
+            page_data = self.pipeline.process_page(self.page_source, min_birth_year)
+            print(f"本页找到 {len(page_data)} 条符合条件记录")
+            return page_data
+
+        except Exception as e:
+            print(f"解析页面时发生错误: {str(e)}")
+            return []
+
+    def go_to_next_page(self) -> bool:
+        """
+        跳转到下一页，已是最后一页时返回 False
+        请求失败时按重试策略重试；仍失败时把该页记入 failed_pages 并抛出异常（不当作最后一页）
+        """
+        # 按分页导航中的加密页码直接构造下一页地址
+        url = next_page_url(self.page_source, self.search_state, self.base_url)
+        if not url:
+            print("已到最后一页")
+            return False
+
+        print("跳转到下一页...")
+        try:
+            self.page_source = call_with_retry(lambda: self.fetcher.fetch_page(url), self.pipeline.retry,
+                                               self.pipeline.breaker)
+        except Exception as e:
+            print(f"跳转下一页时发生错误: {str(e)}")
+            summary = result_summary(self.page_source)
+            if summary:
+                page_size = summary[1] - summary[0] + 1
+                self.failed_pages.append((self.search_state, (summary[0] - 1) // page_size + 2))
+            raise
+        return True
+
+    def collect_page(self, page_data: List[Dict], sink: Optional[RecordSink] = None):
+        """
+        收集一页记录：有 sink 时立即写出、不保留在内存中，否则追加到 results_data（RecordStore）
+        同时更新摘要统计
+        """
+        if sink:
+            sink.write_page(page_data)
+        else:
+            self.results_data.write_page(page_data)
+
+        self.record_count += len(page_data)
+        if len(self.sample_records) < 5:
+            self.sample_records.extend(page_data[:5 - len(self.sample_records)])
+        years = [record['Birth_Year'] for record in page_data if record.get('Birth_Year')]
+        if years:
+            low, high = self.birth_year_range or (min(years), max(years))
+            self.birth_year_range = (min(low, *years), max(high, *years))
+
+    def scrape_all_pages(self, last_name: str, max_pages: Optional[int] = None,
+                         min_birth_year: Optional[int] = None,
+                         checkpoint: Optional[CheckpointStore] = None,
+                         page_tokens: Optional[Dict[int, str]] = None,
+                         sink: Optional[RecordSink] = None) -> bool:
+        """
+        爬取所有页面，成功完成返回 True
+        max_pages / min_birth_year 为空时使用 CONFIG 中的设置
+        checkpoint: 断点记录，已完成的页直接读取记录、不再抓取，每页完成后立即写入
+        page_tokens: 共享的页码 token 表（批量爬取时各任务共用）
+        sink: 逐页写出记录（CSV/Parquet），内存占用不随页数增长；不传时记录保留在 results_data
+        """
+        self.failed_pages = []
+        self.truncated = False
+        # timings 是整个运行共用的，本次的统计表只打印开始之后的增量（批量模式中每个姓氏一份）
+        started = timings.snapshot()
+        try:
+            # 开始搜索
+            if not self.search_by_last_name(last_name):
+                print("搜索失败")
+                return False
+
+            completed = None
+            if checkpoint:
+                for page_data in checkpoint.iter_page_records(last_name):
+                    self.collect_page(page_data, sink)
+                    # 恢复的记录已经写出，登记到去重索引中，其他姓氏的搜索再遇到时不重复输出
+                    if self.pipeline.dedup is not None:
+                        self.pipeline.dedup.seed(dict_identity(record) for record in page_data)
+                completed = lambda state: checkpoint.completed_pages(last_name, state.key())
+
+            # 第一页给出总页数后，剩余页并发抓取（按页码顺序返回）；
+            # 出生年份条件通过 pyb 字段下推到服务器，按年份分别搜索后合并
+            tokens = page_tokens if page_tokens is not None else {}
+            # 启用查询计划时，超过 max_pages 的搜索先拆分为更窄的搜索，避免结果被截断
+            crawl = self.pipeline.crawl
+            if self.config.get("query_planner", True):
+                crawl = QueryPlanner(self.pipeline, max_pages=max_pages, min_year=min_birth_year).crawl
+            pages = crawl(self.search_state, self.page_source, min_year=min_birth_year,
+                          max_pages=max_pages, page_tokens=tokens, completed=completed)
+            for state, page_count, page_data in pages:
+                year_label = f"（出生年份 {state.birth_year}）" if state.birth_year else ""
+                print(f"\n正在处理第 {page_count} 页{year_label}...")
+                print(f"本页找到 {len(page_data)} 条符合条件记录")
+
+                self.collect_page(page_data, sink)
+                if checkpoint:
+                    checkpoint.save_page(last_name, state.key(), page_count, page_data)
+
+            if checkpoint:
+                checkpoint.save_tokens(tokens)
+
+            self.failed_pages = self.pipeline.failed_pages
+            self.truncated = bool(self.pipeline.truncated)
+            if self.failed_pages:
+                failed = [f"{state.birth_year or '-'}/{page}" for state, page in self.failed_pages]
+                print(f"以下页面抓取失败（出生年份/页码）: {failed}")
+
+            print(f"\n爬取完成！共找到 {self.record_count} 条符合条件的记录")
+            timings.report(since=started)
+            return True
+
+        except Exception as e:
+            print(f"爬取过程中发生错误: {str(e)}")
+            return False
+
+    def process_data(self, min_birth_year: Optional[int] = None):
+        """
+        处理数据（整列向量化，需要 pandas）：分割姓名、解析日期、提取军种和州
+        返回 DataFrame；min_birth_year 不为空时只保留不早于该年份出生的记录
+        """
+        from .analysis import process_frame
+        return process_frame(self.results_data.to_pandas(), min_birth_year)
+
+    def save_to_csv(self, filename: str = "veterans_data.csv", encoding: str = "utf-8"):
+        """
+        保存数据到CSV文件（逐页写出时不需要调用）
+        """
+        if not self.results_data:
+            print("没有数据可保存")
+            return
+
+        try:
+            with CsvSink(filename, encoding=encoding) as sink:
+                sink.write_page(self.results_data)
+            print(f"数据已保存到 {filename}")
+
+            if self.config.get("export_excel", True):
+                save_excel(filename)
+
+        except Exception as e:
+            print(f"保存文件时发生错误: {str(e)}")
+
+    def save_to_parquet(self, filename: str = "veterans_data.parquet"):
+        """
+        保存数据到Parquet文件（需要 pyarrow，列直接由 results_data 转换，不复制记录）
+        """
+        if not self.results_data:
+            print("没有数据可保存")
+            return
+
+        try:
+            self.results_data.write_parquet(filename)
+            print(f"数据已保存到 {filename}")
+        except Exception as e:
+            print(f"保存文件时发生错误: {str(e)}")
+
+    def get_summary(self):
+        """
+        获取数据摘要
+        """
+        if not self.record_count:
+            print("没有数据")
+            return
+
+        print("\n=== 数据摘要 ===")
+        print(f"总记录数: {self.record_count}")
+
+        # 按出生年份统计
+        if self.birth_year_range:
+            print(f"出生年份范围: {self.birth_year_range[0]} - {self.birth_year_range[1]}")
+
+        # 记录保留在内存中时按军种/墓地/出生年代/州计数
+        if self.results_data:
+            try:
+                from .analysis import print_counts, summarize
+                print_counts(summarize(self.process_data()))
+            except ImportError as e:
+                print(f"分类统计需要 pandas: {str(e)}")
+
+        # 显示前几条记录
+        print("\n=== 前5条记录示例 ===")
+        for i, record in enumerate(output_row(record) for record in self.sample_records):
+            print(
+                f"{i + 1}. {record['Last_Name']}, {record['First_Name']} | {record['Date_of_Birth']} | {record['Rank_Branch']}")
+
+    def close(self):
+        """关闭抓取后端（浏览器或HTTP连接池；来自浏览器池的浏览器归还到池中）"""
+        self.pipeline.close()
+        print("抓取后端已关闭")
+
+
+def save_excel(path: str):
+    """后处理：由已写出的CSV/Parquet生成Excel，失败不影响已写出的数据"""
+    try:
+        print(f"数据已保存为Excel格式: {export_excel(path)}")
+    except Exception as e:
+        print(f"生成Excel时发生错误: {str(e)}")
+
+
+def scrape_to_files(scraper: VeteransGravesiteScraper, last_name: str, base_path: str,
+                    max_pages: Optional[int] = None, min_birth_year: Optional[int] = None, **kwargs) -> bool:
+    """
+    爬取并逐页写出到 <base_path>.csv / .parquet（CONFIG["output_formats"]），
+    结束后按 CONFIG["export_excel"] 生成Excel
+    """
+    formats = scraper.config.get("output_formats", ["csv"])
+    with create_sink(base_path, formats) as sink:
+        ok = scraper.scrape_all_pages(last_name, max_pages=max_pages, min_birth_year=min_birth_year,
+                                      sink=sink, **kwargs)
+    print(f"数据已逐页写入 {', '.join(f'{base_path}.{fmt}' for fmt in formats)}")
+    if ok and scraper.config.get("export_excel", True) and scraper.record_count:
+        save_excel(f"{base_path}.{formats[0]}")
+    return ok
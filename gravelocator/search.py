@@ -0,0 +1,144 @@
+import base64
+import json
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+
+# sessionVeteranDetails 中的字段顺序（与网站 JSON.stringify 的输出一致）
+SESSION_FIELDS = (
+    "nl", "nlOpt", "nf", "nfOpt", "nm", "nmOpt",
+    "pmb", "pyb", "pmd", "pyd", "cm", "pn", "nfp", "nglUP",
+)
+
+# 姓名匹配方式（lnameopt 下拉框的取值）
+NAME_OPT_EXACT = "1"
+NAME_OPT_BEGINS_WITH = "2"
+
+# 搜索表单元素 id -> sessionVeteranDetails 字段
+FORM_FIELD_IDS = {
+    "lname": "nl",
+    "lnameopt": "nlOpt",
+    "fname": "nf",
+    "fnameopt": "nfOpt",
+    "mname": "nm",
+    "mnameopt": "nmOpt",
+}
+
+_SESSION_JSON_RE = re.compile(r'sessionVeteranDetails\s*=\s*JSON\.stringify\((\{.*?\})\)')
+_RESULT_TOKEN_RE = re.compile(r'/ngl/result/([A-Za-z0-9_\-=]+)')
+
+
+def encode_field(value) -> str:
+    """明文 -> 网站使用的 base64 字段值，空值保持为空字符串"""
+    if value is None or value == "":
+        return ""
+    return base64.b64encode(str(value).encode("utf-8")).decode("ascii")
+
+
+def decode_field(value: str) -> str:
+    """base64 字段值 -> 明文"""
+    if not value:
+        return ""
+    try:
+        return base64.b64decode(value).decode("utf-8")
+    except Exception:
+        return ""
+
+
+class SearchState:
+    """
+    一次搜索的状态，对应结果页里的 sessionVeteranDetails
+    字段值以明文保存，序列化时再做 base64 编码
+    """
+
+    def __init__(self, fields: Optional[Dict[str, str]] = None):
+        self.fields = {name: "" for name in SESSION_FIELDS}
+        self.fields.update({"nfOpt": "1", "nmOpt": "1", "pn": "1", "nglUP": "1"})
+        if fields:
+            self.fields.update({k: str(v) for k, v in fields.items() if k in self.fields})
+
+    @classmethod
+    def for_last_name(cls, last_name: str, option: str = NAME_OPT_BEGINS_WITH) -> "SearchState":
+        """按姓氏搜索（默认 begins with）"""
+        return cls({"nl": last_name.strip().upper(), "nlOpt": option})
+
+    @classmethod
+    def from_session_json(cls, text: str) -> "SearchState":
+        """从 sessionVeteranDetails JSON 还原搜索状态"""
+        data = json.loads(text)
+        return cls({name: decode_field(data.get(name, "")) for name in SESSION_FIELDS})
+
+    @classmethod
+    def from_page(cls, html: str) -> Optional["SearchState"]:
+        """从结果页脚本中的 sessionVeteranDetails 还原搜索状态，找不到时返回 None"""
+        match = _SESSION_JSON_RE.search(html)
+        if not match:
+            return None
+        try:
+            return cls.from_session_json(match.group(1))
+        except ValueError:
+            return None
+
+    @property
+    def last_name(self) -> str:
+        return self.fields["nl"]
+
+    @property
+    def total_pages(self) -> int:
+        """nfp 字段：结果总页数，未知时为0"""
+        try:
+            return int(self.fields["nfp"])
+        except ValueError:
+            return 0
+
+    @property
+    def birth_year(self) -> str:
+        """pyb 字段：出生年份（服务器端过滤），为空表示不限"""
+        return self.fields["pyb"]
+
+    def copy(self, **overrides) -> "SearchState":
+        fields = dict(self.fields)
+        fields.update({k: str(v) for k, v in overrides.items()})
+        return SearchState(fields)
+
+    def form_values(self) -> Dict[str, str]:
+        """搜索表单元素 id -> 要填写的值"""
+        return {element_id: self.fields[name] for element_id, name in FORM_FIELD_IDS.items()}
+
+    def to_session_json(self) -> str:
+        """序列化为网站使用的紧凑 JSON（字段值 base64 编码）"""
+        data = {name: encode_field(self.fields[name]) for name in SESSION_FIELDS}
+        return json.dumps(data, separators=(",", ":"))
+
+    def key(self) -> str:
+        """规范化的搜索条件（不含分页字段），可用作缓存/断点的键"""
+        return "&".join(f"{name}={self.fields[name]}" for name in SESSION_FIELDS
+                        if name not in ("pn", "nfp"))
+
+    def result_url(self, base_url: str, page_token: str) -> str:
+        """
+        构造结果页地址: <base_url>/result/<page-token>/<sessionVeteranDetails JSON>
+        页码 token 由服务器加密生成，只能从分页导航中获得
+        """
+        return f"{base_url.rstrip('/')}/result/{page_token}/{quote(self.to_session_json(), safe=':,=')}"
+
+    def __repr__(self):
+        return f"SearchState({self.key()})"
+
+
+def birth_year_states(state: SearchState, min_year: int, max_year: Optional[int] = None) -> List[SearchState]:
+    """
+    把一次搜索按出生年份拆成多次服务器端过滤的搜索（每年一次，pyb=年份）
+    max_year 默认为今年
+    """
+    if max_year is None:
+        max_year = datetime.now().year
+    return [state.copy(pyb=year, pn=1, nfp="") for year in range(min_year, max_year + 1)]
+
+
+def extract_page_token(url: str) -> Optional[str]:
+    """从结果页链接中取出加密的页码 token"""
+    match = _RESULT_TOKEN_RE.search(url)
+    return match.group(1) if match else None
@@ -0,0 +1,171 @@
+import csv
+import os
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .metrics import timings
+from .schema import RECORD_SCHEMA
+
+
+# 输出文件的列：拆分后的姓名 + 记录字典的全部列（见 schema.RECORD_SCHEMA）
+OUTPUT_SCHEMA = [('Last_Name', str), ('First_Name', str)] + RECORD_SCHEMA
+OUTPUT_FIELDS = [name for name, _ in OUTPUT_SCHEMA]
+
+
+def extract_name_parts(full_name: str) -> Tuple[str, str]:
+    """
+    将全名分割为姓和名
+    格式: MICHAEL, BERNARD EDWARD -> 姓: MICHAEL, 名: BERNARD EDWARD
+    """
+    if ',' in full_name:
+        last_name, first_name = full_name.split(',', 1)
+        return last_name.strip(), first_name.strip()
+    return full_name.strip(), ""
+
+
+def output_row(record: Dict) -> Dict:
+    """记录字典 -> 输出行（分割姓名）"""
+    last_name, first_name = extract_name_parts(record['Full_Name'])
+    row = {name: record.get(name, '') for name in OUTPUT_FIELDS}
+    row['Last_Name'] = last_name
+    row['First_Name'] = first_name
+    return row
+
+
+def _ensure_dir(path: str):
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+
+class RecordSink:
+    """
+    记录输出接口：每解析完一页调用一次 write_page，结束时 close
+    实现类应在 write_page 后尽快落盘，进程崩溃时只丢失当前页
+    """
+
+    def write_page(self, records: List[Dict]):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CsvSink(RecordSink):
+    """逐页追加写入CSV，每页写完后 flush"""
+
+    def __init__(self, path: str, encoding: str = 'utf-8'):
+        _ensure_dir(path)
+        self.path = path
+        self._file = open(path, 'w', newline='', encoding=encoding)
+        self._writer = csv.DictWriter(self._file, fieldnames=OUTPUT_FIELDS)
+        self._writer.writeheader()
+        self._file.flush()
+
+    def write_page(self, records: List[Dict]):
+        with timings.measure("write"):
+            self._writer.writerows(output_row(record) for record in records)
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class ParquetSink(RecordSink):
+    """
+    写入Parquet（需要 pyarrow）
+    Parquet 按行组写入，记录先缓冲到 row_group_size 条再写出一个行组，
+    内存占用以行组大小为上限；崩溃时最多丢失一个未写出的行组
+    """
+
+    def __init__(self, path: str, row_group_size: int = 5000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        _ensure_dir(path)
+        self.path = path
+        self.row_group_size = row_group_size
+        self._pa = pa
+        arrow_types = {str: pa.string(), int: pa.int64(), date: pa.date32()}
+        self._schema = pa.schema([(name, arrow_types[kind]) for name, kind in OUTPUT_SCHEMA])
+        self._writer = pq.ParquetWriter(path, self._schema)
+        self._buffer: List[Dict] = []
+
+    def _write_buffer(self):
+        if not self._buffer:
+            return
+        # 类型不符的值（缺失时的空字符串等）写为 null
+        columns = {name: [row[name] if kind is str or isinstance(row[name], kind) else None for row in self._buffer]
+                   for name, kind in OUTPUT_SCHEMA}
+        self._writer.write_table(self._pa.Table.from_pydict(columns, schema=self._schema))
+        self._buffer = []
+
+    def write_page(self, records: List[Dict]):
+        with timings.measure("write"):
+            self._buffer.extend(output_row(record) for record in records)
+            if len(self._buffer) >= self.row_group_size:
+                self._write_buffer()
+
+    def close(self):
+        if self._writer is not None:
+            self._write_buffer()
+            self._writer.close()
+            self._writer = None
+
+
+class MultiSink(RecordSink):
+    """同时写入多个输出"""
+
+    def __init__(self, sinks: Iterable[RecordSink]):
+        self.sinks = list(sinks)
+
+    def write_page(self, records: List[Dict]):
+        for sink in self.sinks:
+            sink.write_page(records)
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+# 输出格式注册表: 格式名（同时是文件扩展名）-> 类(path)
+SINK_TYPES = {
+    'csv': CsvSink,
+    'parquet': ParquetSink,
+}
+
+
+def register_sink(fmt: str, sink_type):
+    """注册输出格式，sink_type(文件路径) 返回 RecordSink"""
+    SINK_TYPES[fmt] = sink_type
+
+
+def create_sink(base_path: str, formats: Iterable[str] = ('csv',)) -> RecordSink:
+    """
+    按格式创建输出，base_path 不含扩展名，例如 data/veterans_smith -> data/veterans_smith.csv
+    """
+    sinks = [SINK_TYPES[fmt](f"{base_path}.{fmt}") for fmt in formats]
+    return sinks[0] if len(sinks) == 1 else MultiSink(sinks)
+
+
+def export_excel(source_path: str, excel_path: Optional[str] = None) -> str:
+    """
+    后处理：把已写好的CSV/Parquet文件转换为Excel（需要 pandas + openpyxl）
+    返回Excel文件路径
+    """
+    import pandas as pd
+
+    base, ext = os.path.splitext(source_path)
+    excel_path = excel_path or base + '.xlsx'
+    if ext == '.parquet':
+        df = pd.read_parquet(source_path)
+    else:
+        df = pd.read_csv(source_path, dtype=str, keep_default_na=False)
+    df.to_excel(excel_path, index=False)
+    return excel_path
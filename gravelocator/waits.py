@@ -0,0 +1,72 @@
+from .metrics import timings
+
+
+def results_summary_text(driver) -> str:
+    """当前页面 #results-content 的文字（"Displaying 11 to 20 of 2710 ..."），没有时为空字符串"""
+    from selenium.common.exceptions import WebDriverException
+    from selenium.webdriver.common.by import By
+
+    try:
+        return driver.find_element(By.ID, "results-content").text
+    except WebDriverException:
+        return ""
+
+
+class new_results_loaded:
+    """
+    WebDriverWait 条件：新的结果页已经出现
+    - 旧的结果表格已失效（页面已替换），或 #results-content 的范围文字已变化
+    - 并且新页面上有结果表格，或有"未找到记录"提示 (#err-msg)
+    old_table / old_summary 为空时只检查新页面内容是否出现
+    """
+
+    def __init__(self, old_table=None, old_summary: str = ""):
+        self.old_table = old_table
+        self.old_summary = old_summary
+
+    def _old_page_gone(self, driver) -> bool:
+        from selenium.common.exceptions import StaleElementReferenceException
+
+        if self.old_table is None:
+            return True
+        try:
+            self.old_table.is_enabled()
+        except StaleElementReferenceException:
+            return True
+        return bool(self.old_summary) and results_summary_text(driver) not in ("", self.old_summary)
+
+    def __call__(self, driver):
+        from selenium.webdriver.common.by import By
+
+        if not self._old_page_gone(driver):
+            return False
+        tables = driver.find_elements(By.ID, "searchResults")
+        if tables:
+            return tables[0]
+        errors = driver.find_elements(By.ID, "err-msg")
+        return errors[0] if errors and errors[0].text.strip() else False
+
+
+def current_results_table(driver):
+    """当前页面的结果表格元素，没有时返回 None（用于之后判断页面是否已替换）"""
+    from selenium.webdriver.common.by import By
+
+    tables = driver.find_elements(By.ID, "searchResults")
+    return tables[0] if tables else None
+
+
+def wait_for_new_results(wait, old_table=None, old_summary: str = ""):
+    """
+    等待新结果页出现后立即返回，代替固定的 time.sleep
+    wait: WebDriverWait（超时时间由它决定，超时抛出 TimeoutException）
+    """
+    with timings.measure("page_wait"):
+        return wait.until(new_results_loaded(old_table, old_summary))
+
+
+def wait_for_clickable(wait, locator):
+    """等待元素可点击（例如被禁用的搜索按钮重新启用）"""
+    from selenium.webdriver.support import expected_conditions as EC
+
+    with timings.measure("page_wait"):
+        return wait.until(EC.element_to_be_clickable(locator))
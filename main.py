@@ -1,356 +1,38 @@
-import time
-import csv
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import Select
-from bs4 import BeautifulSoup
+import os
+import sys
 from typing import List, Dict, Optional
-import re
 from datetime import datetime
 
-
-class VeteransGravesiteScraper:
-    def __init__(self, driver_path: str = "chromedriver"):
-        """
-        初始化爬虫
-        driver_path: ChromeDriver路径
-        """
-        options = webdriver.ChromeOptions()
-        options.add_argument('--headless')  # 无头模式
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
-
-        self.driver = webdriver.Chrome(options=options)
-        self.wait = WebDriverWait(self.driver, 10)
-        self.base_url = "https://gravelocator.cem.va.gov/ngl"
-        self.results_data = []
-
-    def search_by_last_name(self, last_name: str):
-        """
-        在首页搜索姓氏
-        """
-        try:
-            print(f"正在搜索姓氏: {last_name}")
-            self.driver.get(self.base_url)
-            time.sleep(3)
-
-            # 等待页面加载
-            self.wait.until(EC.presence_of_element_located((By.ID, "lname")))
-
-            # 输入姓氏
-            last_name_input = self.driver.find_element(By.ID, "lname")
-            last_name_input.clear()
-            last_name_input.send_keys(last_name)
-
-            # 设置搜索选项为"begins with" (选项值2)
-            last_name_option = Select(self.driver.find_element(By.ID, "lnameopt"))
-            last_name_option.select_by_value("2")  # begins with
-
-            # 点击搜索按钮
-            search_button = self.driver.find_element(By.ID, "searchb")
-
-            # 启用按钮（如果被禁用）
-            if search_button.get_attribute("disabled"):
-                # 点击一下其他字段来启用按钮
-                first_name_input = self.driver.find_element(By.ID, "fname")
-                first_name_input.click()
-                time.sleep(1)
-
-            search_button.click()
-            print("搜索请求已发送...")
-
-            # 等待结果页面加载
-            self.wait.until(EC.presence_of_element_located((By.ID, "searchResults")))
-            print("结果页面加载完成")
-            return True
-
-        except Exception as e:
-            print(f"搜索时发生错误: {str(e)}")
-            return False
-
-    def extract_name_parts(self, full_name: str) -> tuple:
-        """
-        将全名分割为姓和名
-        格式: MICHAEL, BERNARD EDWARD -> 姓: MICHAEL, 名: BERNARD EDWARD
-        """
-        if ',' in full_name:
-            parts = full_name.split(',', 1)
-            last_name = parts[0].strip()
-            first_name = parts[1].strip() if len(parts) > 1 else ""
-            return last_name, first_name
-        else:
-            return full_name.strip(), ""
-
-    def parse_birth_year(self, birth_date: str) -> int:
-        """
-        从出生日期提取年份
-        格式: 01/17/1925 -> 1925
-        """
-        try:
-            if '/' in birth_date:
-                parts = birth_date.split('/')
-                if len(parts) >= 3:
-                    return int(parts[2])
-        except:
-            pass
-        return 0
-
-    def parse_results_page(self, min_birth_year: int = 1980) -> List[Dict]:
-        """
-        解析当前结果页面，提取符合条件的记录
-        """
-        try:
-            page_data = []
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-
-            # 查找结果表格
-            results_table = soup.find('table', {'id': 'searchResults'})
-            if not results_table:
-                print("未找到结果表格")
-                return page_data
-
-            # 查找所有记录组
-            records = []
-            tbody = results_table.find('tbody')
-
-            if tbody:
-                # 查找所有记录开始的tr（包含序号的行）
-                record_start_trs = tbody.find_all('th', class_='table_row_labels item-number text-center')
-
-                for record_start in record_start_trs:
-                    # 获取包含此th的tr
-                    start_row = record_start.find_parent('tr')
-                    if not start_row:
-                        continue
-
-                    # 初始化记录字典
-                    record = {}
-
-                    # 提取名称
-                    name_cells = start_row.find_all(['th', 'td'])
-                    if len(name_cells) >= 3:
-                        name_cell = name_cells[2]
-                        name_div = name_cell.find('div', class_='p-2')
-                        if name_div:
-                            name_text = name_div.get_text(strip=True)
-                            if name_text.startswith('Name:'):
-                                name_text = name_text.replace('Name:', '').strip()
-                            record['Full_Name'] = name_text
-
-                    # 查找此记录的所有行
-                    current_row = start_row
-                    while current_row:
-                        next_row = current_row.find_next_sibling('tr')
-
-                        # 检查是否是下一条记录的开始或分隔符
-                        if next_row and 'horizontal-line' in str(next_row):
-                            break
-                        if next_row and next_row.find('th', class_='table_row_labels item-number text-center'):
-                            break
-
-                        # 提取当前行的数据
-                        cells = current_row.find_all(['th', 'td'])
-                        if len(cells) >= 2:
-                            label_cell = cells[1]
-                            value_cell = cells[2] if len(cells) > 2 else None
-
-                            if label_cell and value_cell:
-                                label_div = label_cell.find('div', class_='p-2')
-                                value_div = value_cell.find('div', class_='p-2')
-
-                                if label_div and value_div:
-                                    label = label_div.get_text(strip=True).replace(':', '')
-                                    value = value_div.get_text(strip=True)
-
-                                    if label == 'Rank & Branch':
-                                        record['Rank_Branch'] = value
-                                    elif label == 'Date of Birth':
-                                        record['Date_of_Birth'] = value
-                                        # 检查年份是否符合条件
-                                        birth_year = self.parse_birth_year(value)
-                                        if birth_year >= min_birth_year:
-                                            record['Birth_Year'] = birth_year
-
-                        current_row = next_row
-
-                    # 只添加包含所需信息且出生年份>=1980的记录
-                    if all(key in record for key in ['Full_Name', 'Rank_Branch', 'Date_of_Birth']):
-                        if record.get('Birth_Year', 0) >= min_birth_year:
-                            page_data.append(record)
-
-            print(f"本页找到 {len(page_data)} 条符合条件记录")
-            return page_data
-
-        except Exception as e:
-            print(f"解析页面时发生错误: {str(e)}")
-            return []
-
-    def go_to_next_page(self) -> bool:
-        """
-        跳转到下一页
-        """
-        try:
-            # 查找下一页链接
-            next_links = self.driver.find_elements(By.XPATH, "//nav[@id='pagination']//a[contains(text(), 'Next')]")
-
-            for link in next_links:
-                if link.is_displayed() and link.is_enabled():
-                    print("跳转到下一页...")
-                    link.click()
-                    time.sleep(3)  # 等待页面加载
-
-                    # 等待结果表格重新加载
-                    self.wait.until(EC.presence_of_element_located((By.ID, "searchResults")))
-                    return True
-
-            print("已到最后一页")
-            return False
-
-        except Exception as e:
-            print(f"跳转下一页时发生错误: {str(e)}")
-            return False
-
-    def scrape_all_pages(self, last_name: str, max_pages: int = 100, min_birth_year: int = 1980):
-        """
-        爬取所有页面
-        """
-        try:
-            # 开始搜索
-            if not self.search_by_last_name(last_name):
-                print("搜索失败")
-                return
-
-            page_count = 1
-
-            while page_count <= max_pages:
-                print(f"\n正在处理第 {page_count} 页...")
-
-                # 解析当前页面
-                page_data = self.parse_results_page(min_birth_year)
-                self.results_data.extend(page_data)
-
-                # 尝试下一页
-                if not self.go_to_next_page():
-                    break
-
-                page_count += 1
-                time.sleep(2)  # 避免请求过快
-
-            print(f"\n爬取完成！共找到 {len(self.results_data)} 条符合条件的记录")
-
-        except Exception as e:
-            print(f"爬取过程中发生错误: {str(e)}")
-
-    def process_data(self):
-        """
-        处理数据：分割姓名字段
-        """
-        processed_data = []
-
-        for record in self.results_data:
-            # 分割姓名
-            last_name, first_name = self.extract_name_parts(record['Full_Name'])
-
-            processed_record = {
-                'Last_Name': last_name,
-                'First_Name': first_name,
-                'Full_Name': record['Full_Name'],
-                'Rank_Branch': record['Rank_Branch'],
-                'Date_of_Birth': record['Date_of_Birth'],
-                'Birth_Year': record.get('Birth_Year', '')
-            }
-            processed_data.append(processed_record)
-
-        return processed_data
-
-    def save_to_csv(self, filename: str = "veterans_data.csv"):
-        """
-        保存数据到CSV文件
-        """
-        if not self.results_data:
-            print("没有数据可保存")
-            return
-
-        processed_data = self.process_data()
-
-        # 定义CSV列名
-        fieldnames = ['Last_Name', 'First_Name', 'Full_Name', 'Rank_Branch', 'Date_of_Birth', 'Birth_Year']
-
-        try:
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-                writer.writeheader()
-                writer.writerows(processed_data)
-
-            print(f"数据已保存到 {filename}")
-
-            # 同时保存为pandas DataFrame（可选）
-            df = pd.DataFrame(processed_data)
-            df.to_excel("veterans_data.xlsx", index=False)
-            print("数据已保存为Excel格式")
-
-        except Exception as e:
-            print(f"保存文件时发生错误: {str(e)}")
-
-    def get_summary(self):
-        """
-        获取数据摘要
-        """
-        if not self.results_data:
-            print("没有数据")
-            return
-
-        processed_data = self.process_data()
-
-        print("\n=== 数据摘要 ===")
-        print(f"总记录数: {len(processed_data)}")
-
-        # 按出生年份统计
-        birth_years = [record.get('Birth_Year', 0) for record in processed_data if record.get('Birth_Year')]
-        if birth_years:
-            print(f"出生年份范围: {min(birth_years)} - {max(birth_years)}")
-
-        # 显示前几条记录
-        print("\n=== 前5条记录示例 ===")
-        for i, record in enumerate(processed_data[:5]):
-            print(
-                f"{i + 1}. {record['Last_Name']}, {record['First_Name']} | {record['Date_of_Birth']} | {record['Rank_Branch']}")
-
-    def close(self):
-        """关闭浏览器"""
-        self.driver.quit()
-        print("浏览器已关闭")
+from config import CONFIG
+from gravelocator import (AdaptiveRateLimiter, CheckpointStore, CircuitBreaker, DedupIndex, DriverPool,
+                          RateLimiter, covered_surnames, create_filters, create_sink, read_surnames, run_batch,
+                          serve_metrics, timings)
+from gravelocator.checkpoint import STATUS_DONE, STATUS_FAILED
+from gravelocator.incremental import IncrementalStore, scrape_incremental
+from gravelocator.scraper import VeteransGravesiteScraper, scrape_to_files
 
 
 # 主程序
-def main():
-    # 设置要搜索的姓氏
-    last_name = input("请输入要搜索的姓氏 (例如: MICHAEL): ").strip()
+def main(last_name: Optional[str] = None):
+    # 设置要搜索的姓氏（未传入时交互输入）
+    if last_name is None:
+        last_name = input("请输入要搜索的姓氏 (例如: MICHAEL): ").strip()
 
     if not last_name:
         print("姓氏不能为空")
         return
 
     # 创建爬虫实例
-    scraper = VeteransGravesiteScraper()
+    scraper = VeteransGravesiteScraper(CONFIG)
 
     try:
-        # 爬取所有页面
-        scraper.scrape_all_pages(last_name=last_name, max_pages=50, min_birth_year=1980)
+        # 爬取所有页面，每页解析后立即写入文件
+        scrape_to_files(scraper, last_name, f"veterans_{last_name.lower()}", max_pages=CONFIG["max_pages"],
+                        min_birth_year=CONFIG["min_birth_year"])
 
         # 获取摘要
         scraper.get_summary()
 
-        # 保存数据
-        filename = f"veterans_{last_name.lower()}.csv"
-        scraper.save_to_csv(filename)
-
     except Exception as e:
         print(f"主程序发生错误: {str(e)}")
 
@@ -364,7 +46,7 @@ def quick_search():
     """
     快速搜索示例
     """
-    scraper = VeteransGravesiteScraper()
+    scraper = VeteransGravesiteScraper(CONFIG)
 
     try:
         # 搜索特定姓氏
@@ -380,7 +62,254 @@ def quick_search():
         scraper.close()
 
 
+def finish_run(mode: str, **fields):
+    """一次运行结束：打印各阶段耗时汇总表，CONFIG["metrics_file"] 不为空时追加一行 JSON 指标"""
+    timings.report()
+    if CONFIG.get("metrics_file"):
+        timings.write_jsonl(CONFIG["metrics_file"], mode=mode, **fields)
+
+
+def crawl_surname(surname: str, checkpoint: CheckpointStore, page_tokens: Dict[int, str],
+                  driver_pool: Optional[DriverPool] = None, rate_limiter: Optional[RateLimiter] = None,
+                  dedup: Optional[DedupIndex] = None, complete: Optional[set] = None,
+                  breaker: Optional[CircuitBreaker] = None) -> int:
+    """
+    批量模式中的单个任务：爬取一个姓氏并逐页写出 <output_dir>/veterans_<姓氏>.csv，返回记录数
+    补抓后仍有页面失败时抛出异常，任务标记为失败，下次运行从断点继续（只抓取未完成的页）
+    dedup: 各任务共用的去重索引，complete: 完整爬取（没有超过 max_pages）的姓氏会加入其中，并记录在断点中
+    breaker: 各任务共用的熔断器
+    """
+    scraper = VeteransGravesiteScraper(CONFIG, driver_pool=driver_pool, rate_limiter=rate_limiter, dedup=dedup,
+                                       breaker=breaker)
+    try:
+        base_path = os.path.join(CONFIG["output_dir"], f"veterans_{surname.lower()}")
+        if not scrape_to_files(scraper, surname, base_path, max_pages=CONFIG["max_pages"],
+                               min_birth_year=CONFIG["min_birth_year"],
+                               checkpoint=checkpoint, page_tokens=page_tokens):
+            raise RuntimeError("搜索失败")
+        if scraper.failed_pages:
+            raise RuntimeError(f"{len(scraper.failed_pages)} 个页面抓取失败")
+        if complete is not None and not scraper.truncated:
+            complete.add(surname)
+            checkpoint.mark_complete(surname)
+        return scraper.record_count
+    finally:
+        scraper.close()
+
+
+def async_batch_search(surnames: List[str], checkpoint: CheckpointStore) -> Dict[str, int]:
+    """
+    批量模式的 asyncio 引擎（CONFIG["engine"] = "asyncio"）：全部未完成的姓氏在一个事件循环中同时爬取
+    断点只记录到姓氏为止，未完成的姓氏下次运行时重新爬取
+    被更短前缀覆盖的姓氏在前缀完整爬取后不再搜索
+    """
+    # asyncio / aiohttp 只在选用该引擎时导入
+    from gravelocator.async_engine import crawl_surnames
+
+    checkpoint.add_jobs(surnames)
+    pending = [surname for surname in surnames if checkpoint.job_status(surname) != STATUS_DONE]
+    skipped = len(surnames) - len(pending)
+    if skipped:
+        print(f"跳过 {skipped} 个已完成的姓氏")
+    print(f"asyncio 引擎: {len(pending)} 个姓氏，最多 {CONFIG['async_concurrency']} 个请求同时进行")
+    covered = covered_surnames(surnames)
+    dedup = DedupIndex.from_config(CONFIG)
+
+    def sink_for(surname: str):
+        base_path = os.path.join(CONFIG["output_dir"], f"veterans_{surname.lower()}")
+        return create_sink(base_path, CONFIG["output_formats"])
+
+    def on_done(surname: str, records: int, error: Optional[Exception]):
+        if error is None:
+            checkpoint.set_job_status(surname, STATUS_DONE, records=records)
+        else:
+            checkpoint.set_job_status(surname, STATUS_FAILED, records=records, error=str(error))
+
+    page_tokens = checkpoint.load_tokens()
+    try:
+        summary = crawl_surnames(CONFIG, [s for s in pending if s not in covered], sink_for, on_done,
+                                 tokens=page_tokens, dedup=dedup)
+        for surname in pending:
+            if checkpoint.job_status(surname) == STATUS_DONE and surname not in summary["truncated"]:
+                checkpoint.mark_complete(surname)
+        # 包括之前的运行中完整爬取的姓氏
+        complete = checkpoint.complete_surnames()
+        rest = []
+        for surname in pending:
+            if surname not in covered:
+                continue
+            if covered[surname] in complete:
+                print(f"[{surname}] 已包含在 {covered[surname]} 的搜索结果中，跳过")
+                checkpoint.set_job_status(surname, STATUS_DONE)
+                summary["done"] += 1
+            else:
+                rest.append(surname)
+        if rest:
+            more = crawl_surnames(CONFIG, rest, sink_for, on_done, tokens=page_tokens, dedup=dedup)
+            summary["done"] += more["done"]
+            summary["failed"] += more["failed"]
+    finally:
+        checkpoint.save_tokens(page_tokens)
+    summary["skipped"] = skipped
+    return summary
+
+
+def batch_search(surname_file: str, workers: Optional[int] = None) -> bool:
+    """批量模式：从文件读取姓氏列表（每行一个）后按 search_surnames 处理，全部成功返回 True"""
+    return search_surnames(read_surnames(surname_file), workers)
+
+
+def search_surnames(surnames: List[str], workers: Optional[int] = None) -> bool:
+    """
+    批量爬取姓氏列表，每个姓氏一个任务，由 workers 个线程并行处理（默认 CONFIG["batch_workers"]）
+    （CONFIG["engine"] 为 asyncio 时改为在一个事件循环中同时爬取）
+    进度按姓氏、按页记录在 CONFIG["checkpoint_db"] 中，中断后重新运行会从断点继续
+    全部成功返回 True
+    """
+    if workers is None:
+        workers = CONFIG["batch_workers"]
+    if CONFIG.get("engine") == "asyncio":
+        checkpoint = CheckpointStore(CONFIG["checkpoint_db"])
+        try:
+            summary = async_batch_search(surnames, checkpoint)
+        finally:
+            checkpoint.close()
+        print(f"\n批量爬取结束: 完成 {summary['done']}，失败 {summary['failed']}，跳过 {summary['skipped']}")
+        finish_run("batch", engine="asyncio", surnames=len(surnames), **summary)
+        return summary["failed"] == 0
+
+    print(f"共 {len(surnames)} 个姓氏，{workers} 个任务并行")
+
+    checkpoint = CheckpointStore(CONFIG["checkpoint_db"])
+    page_tokens = checkpoint.load_tokens()
+    # 浏览器只在退回到浏览器后端时才会启动，多个任务共用
+    driver_pool = DriverPool(size=CONFIG["driver_pool_size"], recycle_after=CONFIG["driver_recycle_pages"])
+    # 所有任务共用一个限速器，总请求速率不随并行任务数增加
+    rate_limiter = AdaptiveRateLimiter(CONFIG["requests_per_second"], burst=CONFIG["workers"])
+    # 所有任务共用一个去重索引，前缀重叠的姓氏之间的重复记录只写出一次
+    dedup = DedupIndex.from_config(CONFIG)
+    # 所有任务共用一个熔断器，网站持续出错时一起暂停请求
+    breaker = CircuitBreaker.from_config(CONFIG)
+    # begins with 搜索中被更短前缀覆盖的姓氏，等前缀爬取完成后再处理
+    covered = covered_surnames(surnames)
+    # 之前的运行中完整爬取的姓氏也算在内，恢复时被它们覆盖的姓氏不再重新爬取
+    complete = checkpoint.complete_surnames()
+
+    def crawl_job(surname: str) -> int:
+        if covered.get(surname) in complete:
+            print(f"[{surname}] 已包含在 {covered[surname]} 的搜索结果中，跳过")
+            return 0
+        return crawl_surname(surname, checkpoint, page_tokens, driver_pool, rate_limiter, dedup, complete, breaker)
+
+    try:
+        summary = run_batch([s for s in surnames if s not in covered], crawl_job, checkpoint, workers=workers)
+        if covered:
+            rest = run_batch([s for s in surnames if s in covered], crawl_job, checkpoint, workers=workers)
+            summary = {status: summary[status] + rest[status] for status in summary}
+    finally:
+        driver_pool.close()
+        checkpoint.close()
+        if dedup:
+            dedup.flush()
+
+    print(f"\n批量爬取结束: 完成 {summary['done']}，失败 {summary['failed']}，跳过 {summary['skipped']}")
+    finish_run("batch", engine="threads", surnames=len(surnames), **summary)
+    return summary["failed"] == 0
+
+
+def refresh_search(surname_file: str) -> bool:
+    """增量模式：从文件读取姓氏列表（每行一个）后按 refresh_surnames 处理，全部成功返回 True"""
+    return refresh_surnames(read_surnames(surname_file))
+
+
+def refresh_surnames(surnames: List[str]) -> bool:
+    """
+    增量模式（每晚刷新）：只抓取结果有变化的搜索，新的或有变化的记录写入
+    <output_dir>/delta_<日期时间>/veterans_<姓氏>.csv，上次的结果保存在 CONFIG["incremental_db"]
+    全部成功返回 True
+    """
+    store = IncrementalStore(CONFIG["incremental_db"])
+    delta_dir = os.path.join(CONFIG["output_dir"], f"delta_{datetime.now():%Y%m%d_%H%M%S}")
+    rate_limiter = AdaptiveRateLimiter(CONFIG["requests_per_second"], burst=CONFIG["workers"])
+    breaker = CircuitBreaker.from_config(CONFIG)
+    total = failed = 0
+    try:
+        for surname in surnames:
+            # 增量由 IncrementalStore 按全部字段判断；不能用跨运行持久化的去重索引（CONFIG["dedup_db"]），
+            # 否则标识相同、其他字段有变化的记录会在解析时被当作重复去掉，不会进入增量
+            scraper = VeteransGravesiteScraper(CONFIG, rate_limiter=rate_limiter, breaker=breaker, dedup=DedupIndex())
+            try:
+                base_path = os.path.join(delta_dir, f"veterans_{surname.lower()}")
+                records, _ = scrape_incremental(scraper.pipeline, surname, store,
+                                                lambda: create_sink(base_path, CONFIG["output_formats"]),
+                                                max_pages=CONFIG["max_pages"])
+                total += records
+            except Exception as e:
+                failed += 1
+                print(f"[{surname}] 失败: {str(e)}")
+            finally:
+                scraper.close()
+    finally:
+        store.close()
+
+    print(f"\n增量爬取结束: {len(surnames)} 个姓氏，增量记录 {total} 条，失败 {failed} 个")
+    if total:
+        print(f"增量文件保存在 {delta_dir}")
+    finish_run("refresh", surnames=len(surnames), delta_records=total, failed=failed)
+    return failed == 0
+
+
+def reparse_archives(paths: List[str]) -> bool:
+    """
+    离线重新解析（修改解析器后使用）：重新解析目录或归档（.tar / .zip / 页面缓存）中的原始结果页，
+    不访问网络，记录写入 <output_dir>/veterans_reparsed.<格式>
+    解析进程数为 CONFIG["parse_processes"]（0 表示使用全部CPU核），过滤条件与爬取时相同
+    """
+    # 只在离线模式下导入
+    from gravelocator.ingest import ingest_pages
+
+    base_path = os.path.join(CONFIG["output_dir"], "veterans_reparsed")
+    # 只在本次解析的页面之间去重，不使用 dedup_db（其中已有的记录会被全部去掉）
+    dedup = DedupIndex() if CONFIG.get("dedup", True) else None
+    pages = total = 0
+    buffered: List[Dict] = []
+    with create_sink(base_path, CONFIG["output_formats"]) as sink:
+        for _, records in ingest_pages(paths, parser=CONFIG.get("parser"), filters=create_filters(CONFIG),
+                                       processes=CONFIG["parse_processes"] or None, dedup=dedup):
+            pages += 1
+            total += len(records)
+            buffered.extend(records)
+            # 多页合并后再写出，减少小页面的写入次数
+            if len(buffered) >= 1000:
+                sink.write_page(buffered)
+                buffered = []
+        if buffered:
+            sink.write_page(buffered)
+
+    print(f"\n离线解析结束: {pages} 页，{total} 条记录，保存在 {base_path}.*")
+    finish_run("reparse", pages=pages, records=total)
+    return True
+
+
 if __name__ == "__main__":
+    # 带参数时为无交互的命令行（参数见 python cli.py --help），例如:
+    #   python main.py SMITH --max-pages 50 / python main.py -f surnames.txt --jobs 4
+    # 旧写法 --batch surnames.txt / --refresh surnames.txt 仍然可用
+    if len(sys.argv) > 1:
+        import cli
+        argv = sys.argv[1:]
+        if argv[0] == "--batch":
+            argv = ["-f"] + argv[1:]
+        elif argv[0] == "--refresh" and len(argv) >= 2 and not argv[1].startswith("-"):
+            argv = ["--refresh", "-f"] + argv[1:]
+        sys.exit(cli.main(argv))
+    if not sys.stdin.isatty():
+        print("没有可交互的终端，请带参数运行（python cli.py --help 查看参数）", file=sys.stderr)
+        sys.exit(2)
+    # Prometheus 指标: http://127.0.0.1:<metrics_port>/metrics
+    if CONFIG.get("metrics_port"):
+        serve_metrics(CONFIG["metrics_port"])
+
     print("=== 美国退伍军人墓地信息爬虫 ===")
     print("此程序将爬取Nationwide Gravesite Locator网站数据")
     print("只提取出生年份 >= 1980 的记录\n")
@@ -0,0 +1,39 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from gravelocator import RecordStore, parse_results
+from gravelocator.analysis import process_frame, split_names, summarize
+
+
+def load_frame():
+    with open("debug_page.html", encoding="utf-8") as f:
+        return RecordStore(record.to_dict() for record in parse_results(f.read())).to_pandas()
+
+
+def test_split_names():
+    names = split_names(pd.Series(["MICHAEL, BERNARD EDWARD", "SOLO", None, "O'BRIEN,  PAT "]))
+    assert names["Last_Name"].tolist() == ["MICHAEL", "SOLO", "", "O'BRIEN"]
+    assert names["First_Name"].tolist() == ["BERNARD EDWARD", "", "", "PAT"]
+
+
+def test_summary_counts_match_rows(tmp_path):
+    df = load_frame()
+    out = process_frame(df)
+    assert out["Last_Name"].eq("MICHAEL").all()
+    assert out["Birth_Year"].tolist() == [int(value[-4:]) for value in df["Date_of_Birth"]]
+    summary = summarize(out)
+    assert summary["records"] == 10
+    assert summary["by_branch"]["US ARMY"] == sum("US ARMY" in value for value in df["Rank_Branch"])
+    assert summary["by_state"].sum() == (df["Cemetery_State"] != "").sum()
+    assert summary["by_decade"].sum() == 10
+
+    # 从 CSV 读入（全部为字符串）的结果相同
+    path = tmp_path / "records.csv"
+    df.to_csv(path, index=False)
+    from_csv = summarize(process_frame(pd.read_csv(path, dtype=str, keep_default_na=False)))
+    assert from_csv["by_decade"].to_dict() == summary["by_decade"].to_dict()
+    assert dict(from_csv["by_state"]) == dict(summary["by_state"])
+
+    filtered = process_frame(df, min_birth_year=1930)
+    assert (filtered["Birth_Year"] >= 1930).all() and len(filtered) < 10
@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from conftest import ListSink
+from gravelocator import AsyncCrawler, AsyncHttpFetcher, FetchError, SearchState, crawl_surnames, timings
+from gravelocator.replay import ReplayServer, ReplaySite
+from gravelocator.schema import RECORD_COLUMNS
+
+pytest.importorskip("aiohttp")
+
+
+@pytest.mark.parametrize("parse_processes", [0, 2])
+def test_crawls_many_surnames_concurrently(parse_processes):
+    site = ReplaySite(records={"SMITH": 150, "JONES": 45, "BROWN": 5}, latency=0.01)
+    pages = {}
+    done = {}
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "requests_per_second": 0, "async_concurrency": 30,
+                  "min_birth_year": 1950, "parse_processes": parse_processes}
+        summary = crawl_surnames(config, ["SMITH", "JONES", "BROWN", "NOBODY"],
+                                 lambda surname: ListSink(pages.setdefault(surname, [])),
+                                 on_done=lambda surname, count, error: done.__setitem__(surname, (count, error)))
+
+    assert summary == {"done": 4, "failed": 0, "truncated": []}
+    for surname in ("SMITH", "JONES", "BROWN"):
+        names = [record["Full_Name"] for page in pages[surname] for record in page]
+        expected = [person for person in site.search(SearchState.for_last_name(surname))
+                    if int(person.birth_year) >= 1950]
+        assert sorted(names) == sorted(person.full_name for person in expected)
+        assert done[surname] == (len(names), None)
+        assert list(pages[surname][0][0]) == RECORD_COLUMNS
+    assert done["NOBODY"] == (0, None)
+
+
+def test_no_birth_year_split_without_lower_bound():
+    site = ReplaySite(records={"SMITH": 45})
+    pages = []
+    timings.reset()
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "requests_per_second": 0, "min_birth_year": 0,
+                  "filters": ["min_birth_year"]}
+        summary = crawl_surnames(config, ["SMITH"], lambda surname: ListSink(pages))
+
+    assert summary["done"] == 1
+    assert sum(len(page) for page in pages) == 45
+    # 只有一次搜索（不按出生年份逐年搜索），计入 search 阶段
+    assert site.requests["search"] == timings.counts["search"] == 1
+
+
+def test_request_timeout_and_cancellation():
+    site = ReplaySite(records={"SMITH": 30}, latency=0.5)
+    with ReplayServer(site) as server:
+        async def timed_out():
+            fetcher = AsyncHttpFetcher(base_url=server.base_url, timeout=0.1)
+            try:
+                await fetcher.search(SearchState.for_last_name("SMITH"))
+            finally:
+                await fetcher.close()
+
+        with pytest.raises(FetchError):
+            asyncio.run(timed_out())
+
+        async def cancelled():
+            crawler = AsyncCrawler(AsyncHttpFetcher(base_url=server.base_url))
+            task = asyncio.ensure_future(crawler.run(["SMITH"], lambda surname: ListSink([])))
+            await asyncio.sleep(0.2)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return crawler.fetcher._session
+
+        assert asyncio.run(cancelled()) is None
@@ -0,0 +1,18 @@
+from gravelocator.checkpoint import CheckpointStore
+
+
+def test_page_records_streamed_in_order(tmp_path):
+    checkpoint = CheckpointStore(str(tmp_path / "checkpoint.sqlite"))
+    for search_key in ("SMITH|B", "SMITH"):
+        for page in (3, 1, 2):
+            checkpoint.save_page("SMITH", search_key, page, [{"Full_Name": f"{search_key} {page}"}])
+    checkpoint.save_page("JONES", "JONES", 1, [{"Full_Name": "JONES 1"}])
+
+    pages = checkpoint.iter_page_records("SMITH", batch=2)
+    assert next(pages) == [{"Full_Name": "SMITH 1"}]
+    # 逐批读取时不占用锁，迭代中途仍可写入
+    checkpoint.save_page("SMITH", "SMITH|C", 1, [{"Full_Name": "SMITH|C 1"}])
+    assert [records[0]["Full_Name"] for records in pages] == [
+        "SMITH 2", "SMITH 3", "SMITH|B 1", "SMITH|B 2", "SMITH|B 3", "SMITH|C 1"]
+    assert len(checkpoint.load_records("SMITH")) == 7
+    checkpoint.close()
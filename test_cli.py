@@ -0,0 +1,51 @@
+import csv
+import json
+import subprocess
+import sys
+
+import pytest
+
+import cli
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_overrides_and_shards(tmp_path):
+    surname_file = tmp_path / "surnames.txt"
+    surname_file.write_text("jones\n# 注释\nsmith\nbrown\n", encoding="utf-8")
+    args = cli.build_parser().parse_args(
+        ["adams", "-f", str(surname_file), "--max-pages", "7", "--format", "csv", "parquet", "-j", "3",
+         "--backend", "http", "--set", "dedup=false", "--set", "requests_per_second=0.5", "--shard", "1/2"])
+    overrides = cli.config_overrides(args)
+    assert overrides["max_pages"] == 7 and overrides["output_formats"] == ["csv", "parquet"]
+    assert overrides["batch_workers"] == overrides["async_surnames"] == 3
+    assert overrides["dedup"] is False and overrides["requests_per_second"] == 0.5
+    assert overrides["checkpoint_db"].endswith(".shard1of2.sqlite")
+    assert cli.select_surnames(args) == ["JONES", "BROWN"]
+
+
+def test_usage_errors(capsys):
+    assert cli.main([]) == cli.EXIT_USAGE
+    assert cli.main(["SMITH", "--set", "no_such_key=1"]) == cli.EXIT_USAGE
+    with pytest.raises(SystemExit) as exit_info:
+        cli.main(["SMITH", "--shard", "3/2"])
+    assert exit_info.value.code == cli.EXIT_USAGE
+
+
+def test_unattended_run(tmp_path, restore_config):
+    with ReplayServer(ReplaySite(records={"SMITH": 120, "JONES": 40})) as server:
+        code = cli.main(["SMITH", "JONES", "--backend", "http", "--rate", "0", "--min-birth-year", "1980",
+                         "--output-dir", str(tmp_path / "out"), "--checkpoint-db", str(tmp_path / "cp.sqlite"),
+                         "--no-excel", "--set", f"base_url={json.dumps(server.base_url)}"])
+    assert code == cli.EXIT_OK
+    with open(tmp_path / "out" / "veterans_smith.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert rows and all(int(row["Birth_Year"]) >= 1980 for row in rows)
+    assert (tmp_path / "out" / "veterans_jones.csv").exists()
+
+
+def test_startup_skips_heavy_dependencies():
+    # 较重的依赖只在用到浏览器后端、Excel 导出、asyncio 引擎等时才导入
+    heavy = ["pandas", "selenium", "bs4", "webdriver_manager", "aiohttp", "asyncio", "multiprocessing", "http.server"]
+    code = f"import sys, cli, ixed_scraper; print([m for m in {heavy!r} if m in sys.modules])"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
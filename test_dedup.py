@@ -0,0 +1,79 @@
+from gravelocator import (CheckpointStore, DedupIndex, SearchState, covered_surnames, dict_identity, parse_results,
+                          record_identity)
+from gravelocator.checkpoint import STATUS_FAILED
+from gravelocator.pipeline import process_page
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_dedup_index_persists_across_runs(tmp_path):
+    page_html = ReplaySite(records={"SMITH": 10}).render_results(SearchState.for_last_name("SMITH"))
+    records = list(parse_results(page_html))
+    assert len({record_identity(record) for record in records}) == 10
+    assert [dict_identity(record.to_dict()) for record in records] == [record_identity(r) for r in records]
+
+    path = str(tmp_path / "dedup.sqlite")
+    index = DedupIndex(path)
+    assert len(process_page(page_html, None, [], index)) == 10
+    # 页面在抓取中移动时同一页可能再次出现
+    assert process_page(page_html, None, [], index) == []
+    assert index.duplicates == 10
+    index.flush()
+
+    assert len(DedupIndex(path)) == 10
+    assert process_page(page_html, None, [], DedupIndex(path)) == []
+    assert len(process_page(page_html, None, [], DedupIndex())) == 10
+
+
+def test_batch_skips_surnames_covered_by_prefix(tmp_path, monkeypatch):
+    import main
+    from config import CONFIG
+
+    assert covered_surnames(["SMITH", "JONES", "SMITHSON", "SMITHS", "SMI"]) == {
+        "SMITH": "SMI", "SMITHSON": "SMI", "SMITHS": "SMI"}
+
+    surname_file = tmp_path / "surnames.txt"
+    surname_file.write_text("SMITHSON\nSMITH\n", encoding="utf-8")
+    site = ReplaySite(records={"SMITH": 40, "SMITHSON": 5})
+    with ReplayServer(site) as server:
+        for key, value in {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                           "export_excel": False, "output_dir": str(tmp_path / "data"),
+                           "checkpoint_db": str(tmp_path / "checkpoint.sqlite")}.items():
+            monkeypatch.setitem(CONFIG, key, value)
+        assert main.batch_search(str(surname_file), workers=2)
+
+    assert site.requests["search"] == 1
+    assert (tmp_path / "data" / "veterans_smith.csv").exists()
+    assert not (tmp_path / "data" / "veterans_smithson.csv").exists()
+
+
+def test_resume_keeps_coverage_and_dedup(tmp_path, monkeypatch):
+    import main
+    from config import CONFIG
+
+    surname_file = tmp_path / "surnames.txt"
+    site = ReplaySite(records={"SMITH": 40, "SMITHSON": 5})
+    checkpoint_db = str(tmp_path / "checkpoint.sqlite")
+    with ReplayServer(site) as server:
+        for key, value in {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                           "export_excel": False, "output_dir": str(tmp_path / "data"), "min_birth_year": 0,
+                           "checkpoint_db": checkpoint_db}.items():
+            monkeypatch.setitem(CONFIG, key, value)
+        surname_file.write_text("SMITH\n", encoding="utf-8")
+        assert main.batch_search(str(surname_file), workers=1)
+        # 下次运行加入被 SMITH 覆盖的姓氏：SMITH 已在上次完整爬取，不必再搜索
+        surname_file.write_text("SMITHSON\nSMITH\n", encoding="utf-8")
+        assert main.batch_search(str(surname_file), workers=1)
+        assert site.requests["search"] == 1
+
+        # 从断点恢复的记录登记到去重索引中
+        checkpoint = CheckpointStore(checkpoint_db)
+        checkpoint.set_job_status("SMITH", STATUS_FAILED)
+        dedup = DedupIndex()
+        scraper = main.VeteransGravesiteScraper(CONFIG, dedup=dedup)
+        try:
+            assert scraper.scrape_all_pages("SMITH", checkpoint=checkpoint)
+        finally:
+            scraper.close()
+            checkpoint.close()
+    assert len(dedup) == scraper.record_count == 45
+    assert dedup.duplicates == 0
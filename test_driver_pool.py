@@ -0,0 +1,76 @@
+import threading
+
+import pytest
+
+from gravelocator import driver_pool as driver_pool_module
+from gravelocator.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.alive = True
+
+    def execute_script(self, script):
+        if not self.alive:
+            raise RuntimeError("session deleted")
+        return 1
+
+    def quit(self):
+        self.alive = False
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(driver_pool_module, "new_chrome", lambda *args, **kwargs: FakeDriver())
+    pool = DriverPool(size=2, recycle_after=3, driver_path="/fake/chromedriver")
+    yield pool
+    pool.close()
+
+
+def test_reuses_warm_driver(pool):
+    with pool.driver() as item:
+        first = item.driver
+    with pool.driver() as item:
+        assert item.driver is first
+
+
+def test_recycles_after_page_limit(pool):
+    with pool.driver() as item:
+        first = item.driver
+        item.pages = 3
+    assert not first.alive
+    with pool.driver() as item:
+        assert item.driver is not first
+
+
+def test_replaces_unhealthy_driver(pool):
+    with pool.driver() as item:
+        first = item.driver
+    first.alive = False
+    with pool.driver() as item:
+        assert item.driver is not first and item.driver.alive
+
+
+def test_size_limit(pool):
+    a = pool.acquire()
+    b = pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+    pool.release(a)
+    assert pool.acquire(timeout=0.01) is a
+    pool.release(b)
+
+
+def test_waiter_wakes_when_driver_is_recycled(pool):
+    a = pool.acquire()
+    b = pool.acquire()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.acquire(timeout=5)))
+    waiter.start()
+    # 归还时达到回收页数，浏览器被关闭，空出的名额让等待的线程新建浏览器
+    a.pages = 3
+    pool.release(a)
+    waiter.join(timeout=5)
+    assert acquired and acquired[0] is not a and acquired[0].driver.alive
+    pool.release(acquired[0])
+    pool.release(b)
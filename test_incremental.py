@@ -0,0 +1,82 @@
+import csv
+
+from conftest import ListSink
+from gravelocator import Pipeline
+from gravelocator.incremental import IncrementalStore, page_fingerprint, record_key, scrape_incremental
+from gravelocator.replay import ReplayServer, ReplaySite, generate_decedents
+
+
+def refresh(site, store):
+    """对回放网站做一次增量爬取，返回 (增量记录, 本次请求数)"""
+    sink = ListSink()
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                  "min_birth_year": 1985, "max_pages": 1000}
+        pipeline = Pipeline.from_config(config)
+        try:
+            scrape_incremental(pipeline, "SMITH", store, lambda: sink)
+        finally:
+            pipeline.close()
+    return sink.records, sum(site.requests.values())
+
+
+def test_fingerprint_ignores_order():
+    records = [{"Full_Name": "A", "Date_of_Birth": "01/01/1990", "Rank_Branch": "US ARMY"},
+               {"Full_Name": "B", "Date_of_Birth": "01/01/1991", "Rank_Branch": "US NAVY"}]
+    assert page_fingerprint(records) == page_fingerprint(records[::-1])
+    assert page_fingerprint(records) != page_fingerprint(records[:1])
+
+
+def test_any_field_change_is_a_new_record():
+    record = {"Full_Name": "A", "Date_of_Birth": "01/01/1990", "Rank_Branch": "US ARMY",
+              "Date_of_Death": "02/02/2020", "Cemetery": "FORT SNELLING NATIONAL CEMETERY", "Buried_At": "SECTION A"}
+    for column, value in (("Date_of_Death", "03/03/2021"), ("Cemetery", "CALVERTON NATIONAL CEMETERY"),
+                          ("Buried_At", "SECTION B"), ("Location_ID", 266866)):
+        changed = dict(record, **{column: value})
+        assert record_key(changed) != record_key(record)
+        assert page_fingerprint([changed]) != page_fingerprint([record])
+    assert record_key(dict(record)) == record_key(record)
+
+
+def test_refresh_only_writes_new_records(tmp_path):
+    store = IncrementalStore(str(tmp_path / "incremental.sqlite"))
+    try:
+        first, full_requests = refresh(ReplaySite(records={"SMITH": 5000}), store)
+        assert len(first) == sum(int(person.birth_year) >= 1985 for person in generate_decedents("SMITH", 5000))
+
+        # 没有变化：只有一次搜索（首页 + 提交表单）
+        delta, requests = refresh(ReplaySite(records={"SMITH": 5000}), store)
+        assert delta == [] and requests == 2
+
+        # 新增9条记录，其中1条出生于1985年之后：只重新抓取该出生年份的搜索
+        added = set(generate_decedents("SMITH", 5009)) - set(generate_decedents("SMITH", 5000))
+        delta, requests = refresh(ReplaySite(records={"SMITH": 5009}), store)
+        assert [record["Full_Name"] for record in delta] == [person.full_name for person in added
+                                                             if int(person.birth_year) >= 1985]
+        assert requests < full_requests / 2
+    finally:
+        store.close()
+
+
+def test_refresh_with_persistent_dedup_keeps_changed_records(tmp_path, monkeypatch):
+    import main
+    from config import CONFIG
+
+    site = ReplaySite(records={"SMITH": 30})
+    people = site._decedents("SMITH")
+    with ReplayServer(site) as server:
+        for key, value in {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                           "min_birth_year": 0, "output_dir": str(tmp_path / "data"),
+                           "incremental_db": str(tmp_path / "incremental.sqlite"),
+                           "dedup_db": str(tmp_path / "dedup.sqlite")}.items():
+            monkeypatch.setitem(CONFIG, key, value)
+        assert main.refresh_surnames(["SMITH"])
+        # 标识（姓名、生卒日期、墓地）不变，只有墓位变化
+        moved = people[0]._replace(site="SECTION Z SITE 1", location_id=1)
+        site._decedents = lambda surname: [moved, *people[1:]]
+        assert main.refresh_surnames(["SMITH"])
+
+    deltas = sorted((tmp_path / "data").glob("delta_*/veterans_smith.csv"))
+    with open(deltas[-1], encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [(row["Full_Name"], row["Buried_At"]) for row in rows] == [(moved.full_name, moved.site)]
@@ -0,0 +1,81 @@
+import json
+import urllib.request
+
+from gravelocator import FetchError, Pipeline, StageTimer, error_category, serve_metrics, timings
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_percentiles_and_outputs(tmp_path):
+    metrics = StageTimer(sample_size=100)
+    for ms in range(1, 1001):
+        metrics.add("fetch", ms / 1000)
+    assert 0.45 <= metrics.percentile("fetch", 0.5) <= 0.55
+    assert 0.9 <= metrics.percentile("fetch", 0.95) <= 1.0
+    metrics.incr("errors", category="timeout")
+    metrics.error(FetchError("请求失败"), stage="search")
+    assert metrics.counter("errors") == 2 and metrics.counter("errors", category="timeout") == 1
+
+    path = tmp_path / "metrics.jsonl"
+    metrics.write_jsonl(str(path), mode="test")
+    metrics.write_jsonl(str(path), mode="test")
+    lines = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert len(lines) == 2 and lines[0]["mode"] == "test"
+    assert lines[0]["stages"]["fetch"]["count"] == 1000
+    assert lines[0]["counters"]['errors{category="fetch",stage="search"}'] == 1
+
+    server = serve_metrics(0, metrics)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics") as response:
+            text = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+    assert 'gravelocator_stage_seconds{stage="fetch",quantile="0.95"}' in text
+    assert 'gravelocator_errors_total{category="timeout"} 1' in text
+
+
+def test_report_since_snapshot(capsys):
+    metrics = StageTimer()
+    metrics.add("fetch", 1.0)
+    metrics.add("parse", 0.5)
+    metrics.incr("pages", 3)
+    before = metrics.snapshot()
+    metrics.add("fetch", 0.25)
+    metrics.incr("pages")
+    assert metrics.since(before) == {"stages": {"fetch": {"count": 1, "total": 0.25}}, "counters": {"pages": 1}}
+
+    metrics.report(since=before)
+    out = capsys.readouterr().out
+    assert "parse" not in out and "pages=1" in out
+    metrics.report()
+    assert "pages=4" in capsys.readouterr().out
+
+
+def test_error_categories():
+    import requests
+
+    assert error_category(TimeoutError()) == "timeout"
+    try:
+        raise FetchError("请求失败") from requests.ConnectionError()
+    except FetchError as e:
+        assert error_category(e) == "connection"
+    response = requests.Response()
+    response.status_code = 503
+    assert error_category(requests.HTTPError(response=response)) == "http_5xx"
+
+
+def test_crawl_counters():
+    timings.reset()
+    site = ReplaySite(records={"SMITH": 200})
+    with ReplayServer(site) as server:
+        pipeline = Pipeline.from_config({"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                                         "min_birth_year": 1950})
+        try:
+            state, first_html = pipeline.search("SMITH")
+            kept = sum(len(records) for _, _, records in pipeline.crawl(state, first_html, min_year=0))
+        finally:
+            pipeline.close()
+    assert timings.counter("pages") == site.requests["search"] + site.requests["result"]
+    assert timings.counter("records") == kept
+    assert timings.counter("records") + timings.counter("filtered") + timings.counter("duplicates") == 200
+    assert timings.counts["parse"] == timings.counts["filter"] == 20
+    assert timings.counts["search"] == 1
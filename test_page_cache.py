@@ -0,0 +1,60 @@
+import zlib
+
+import pytest
+
+from gravelocator import FetchError, PageCache, Pipeline, SearchState
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_ttl_lru_and_cache_only(tmp_path):
+    site = ReplaySite(records={"SMITH": 300})
+    state = SearchState.for_last_name("SMITH")
+    pages = {page: site.render_results(state, page) for page in range(1, 31)}
+
+    cache = PageCache(str(tmp_path), ttl=3600, max_bytes=0)
+    cache.put(state, 1, pages[1])
+    assert cache.get(state, 1) == pages[1]
+    assert cache.get(state.copy(pyb=1950), 1) is None
+    cache.put(state, 2, pages[2])
+    cache.ttl = 1e-9
+    assert cache.get(state, 2) is None  # 已过期
+    cache.close()
+
+    # 超出大小上限时淘汰最久未使用的页
+    page_size = len(zlib.compress(pages[1].encode("utf-8"), 6))
+    lru = PageCache(str(tmp_path / "lru"), max_bytes=page_size * 5)
+    for page in range(1, 11):
+        lru.put(state, page, pages[page])
+        lru.get(state, 1)
+    assert lru.size() <= page_size * 5
+    assert 1 in lru.cached_pages(state) and 2 not in lru.cached_pages(state)
+    lru.cache_only = True
+    with pytest.raises(FetchError):
+        lru.get(state, 2)
+    lru.close()
+
+
+def test_reparse_from_cache_without_network(tmp_path):
+    site = ReplaySite(records={"SMITH": 95})
+    config = {"backend": "http", "requests_per_second": 0, "min_birth_year": 0,
+              "page_cache_dir": str(tmp_path / "cache")}
+
+    def crawl():
+        pipeline = Pipeline.from_config(config)
+        try:
+            state, first_html = pipeline.search("SMITH")
+            return [record for _, _, records in pipeline.crawl(state, first_html) for record in records]
+        finally:
+            pipeline.close()
+
+    with ReplayServer(site) as server:
+        config["base_url"] = server.base_url
+        online = crawl()
+        requests = dict(site.requests)
+        assert crawl() == online
+        assert site.requests == requests  # 第二次全部命中缓存
+
+    # 服务器已关闭，只从缓存解析
+    config["cache_only"] = True
+    assert crawl() == online
+    assert len(online) == 95
@@ -0,0 +1,34 @@
+from gravelocator import ParsePool, Pipeline, SearchState, create_filters
+from gravelocator.pipeline import process_page
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_imap_keeps_page_order_and_schema():
+    site = ReplaySite(records={"SMITH": 200})
+    state = SearchState.for_last_name("SMITH")
+    pages = [(page, site.render_results(state, page)) for page in range(1, 21)]
+    filters = create_filters({"min_birth_year": 1940})
+
+    for compress in (False, True):
+        with ParsePool(2, filters=filters, compress=compress) as pool:
+            parsed = list(pool.imap(pages, window=3))
+        assert [page for page, _ in parsed] == list(range(1, 21))
+        assert [records for _, records in parsed] == [process_page(page_html, None, filters)
+                                                     for _, page_html in pages]
+
+
+def test_pipeline_parses_in_processes():
+    site = ReplaySite(records={"SMITH": 80})
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                  "min_birth_year": 0, "parse_processes": 2, "parse_compress": True}
+        pipeline = Pipeline.from_config(config)
+        try:
+            state, first_html = pipeline.search("SMITH")
+            crawled = list(pipeline.crawl(state, first_html))
+        finally:
+            pipeline.close()
+
+    assert [page for _, page, _ in crawled] == list(range(1, 9))
+    names = [record["Full_Name"] for _, _, records in crawled for record in records]
+    assert names == [person.full_name for person in site.search(state)]
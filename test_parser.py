@@ -0,0 +1,79 @@
+from datetime import date
+
+from gravelocator.parser import PARSER_BACKENDS, parse_birth_year, parse_results
+from gravelocator.schema import RECORD_COLUMNS, cemetery_id, parse_date
+
+
+def load_debug_page():
+    with open("debug_page.html", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_parse_results_debug_page():
+    records = list(parse_results(load_debug_page(), "stdlib"))
+    assert [r.number for r in records] == list(range(1, 11))
+    first = records[0]
+    assert first.full_name == "MICHAEL, A HINKLE"
+    assert first.rank_branch == "SGT US ARMY"
+    assert first.date_of_birth == "01/17/1925"
+    assert first.birth_year == 1925
+    assert first.details["Cemetery"] == "AUGUSTA MEMORIAL PARK"
+    # Rank & Branch 出现在 Relationships 之后的记录
+    assert records[3].rank_branch == "S1 US NAVY"
+
+
+def test_backends_agree():
+    page_html = load_debug_page()
+    expected = list(parse_results(page_html, "stdlib"))
+    for backend in PARSER_BACKENDS:
+        assert list(parse_results(page_html, backend)) == expected
+
+
+def test_no_results_table():
+    assert list(parse_results("<html><p id=\"err-msg\">No records</p></html>")) == []
+
+
+def test_parse_birth_year():
+    assert parse_birth_year("01/17/1925") == 1925
+    assert parse_birth_year("") == 0
+    assert parse_birth_year("01/17/25") == 0
+
+
+def test_record_dict_has_all_fields():
+    records = [record.to_dict() for record in parse_results(load_debug_page())]
+    assert all(list(record) == RECORD_COLUMNS for record in records)
+    record = records[2]
+    assert record["Death_Date"] == date(1968, 5, 30) and record["Birth_Date"] == date(1892, 4, 1)
+    assert record["Buried_At"] == "SECTION S SITE 1594"
+    assert record["Location_ID"] == 266866
+    assert record["Cemetery_ID"] == "FORT ROSECRANS NATIONAL CEMETERY"
+    assert record["Cemetery_Address"] == "1700 CABRILLO MEMORIAL DR SAN DIEGO, CA 92106"
+    assert record["Cemetery_State"] == "CA"
+    # 没有 Buried At 行的记录
+    assert records[0]["Location_ID"] == 0 and records[0]["Buried_At"] == ""
+
+
+def test_parse_date():
+    assert parse_date("01/17/1925") == date(1925, 1, 17)
+    assert parse_date("00/00/1925") is None
+    assert parse_date("") is None
+    assert cemetery_id("Ft.  Rosecrans National Cem") == "FORT ROSECRANS NATIONAL CEMETERY"
+
+
+def test_odd_labels_and_missing_fields():
+    def row(label, value):
+        return (f'<tr><th scope="row" class="row-header"><div class="p-2">{label}</div></th>'
+                f'<td class="results-info"><div class="p-2">{value}</div></td></tr>')
+
+    page_html = ('<table id="searchResults"><tbody><tr><th class="item-number"><div class="p-2">1</div></th>'
+                 '<th scope="row" class="row-header"><div class="p-2">Name:</div></th>'
+                 '<td class="results-info"><div class="p-2">SMITH,  JOHN </div></td></tr>'
+                 + row("Date\n  of Birth :", "01/02/1950") + row("<span>Rank &amp; Branch</span>", "")
+                 + row("War&nbsp;Period:", "VIETNAM <b>ERA</b>")
+                 + '<tr><td colspan="3"><hr class="horizontal-line"></td></tr></tbody></table>')
+    records = {backend: list(parse_results(page_html, backend)) for backend in PARSER_BACKENDS}
+    record = records["stdlib"][0]
+    assert record.details == {"Name": "SMITH, JOHN", "Date of Birth": "01/02/1950", "Rank & Branch": "",
+                              "War Period": "VIETNAM ERA"}
+    assert record.birth_year == 1950 and record.location_id == 0
+    assert all(parsed == records["stdlib"] for parsed in records.values())
@@ -0,0 +1,49 @@
+from conftest import ListSink
+from gravelocator import Pipeline, SearchState, create_filters
+from gravelocator.filters import BirthYearFilter, RecordFilter, register_filter
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def load_debug_page():
+    with open("debug_page.html", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_filters_from_config():
+    filters = create_filters({"min_birth_year": 1925})
+    assert [f.name for f in filters] == ["complete", "min_birth_year"]
+    assert filters[1].min_year == 1925
+
+
+def test_process_page_applies_filters():
+    page_html = load_debug_page()
+    pipeline = Pipeline(fetcher=None, filters=create_filters({"min_birth_year": 1925}))
+    records = pipeline.process_page(page_html)
+    assert records and all(record["Birth_Year"] >= 1925 for record in records)
+    # 单次调用时覆盖出生年份下限
+    assert len(pipeline.process_page(page_html, min_year=0)) == 10
+
+
+def test_registered_filter_and_run():
+    @register_filter
+    class NavyFilter(RecordFilter):
+        name = "navy"
+
+        def accept(self, record):
+            return "NAVY" in record.rank_branch
+
+    site = ReplaySite(records={"SMITH": 60})
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                  "filters": ["complete", "navy"]}
+        pipeline = Pipeline.from_config(config)
+        sink = ListSink()
+        try:
+            count = pipeline.run("SMITH", sink)
+        finally:
+            pipeline.close()
+
+    records = sink.records
+    expected = [person for person in site.search(SearchState.for_last_name("SMITH")) if "NAVY" in person.rank_branch]
+    assert count == len(records) == len(expected)
+    assert not any(isinstance(f, BirthYearFilter) for f in pipeline.filters)
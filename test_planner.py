@@ -0,0 +1,94 @@
+from gravelocator import Pipeline, QueryPlanner, RateLimiter, SurnameTrie
+from gravelocator.replay import ReplayServer, ReplaySite, generate_decedents
+
+
+def planner_crawl(site, last_name, max_pages):
+    """按计划抓取回放网站上的一个姓氏，返回 (记录, 计划, 被截断的搜索)"""
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "requests_per_second": 0,
+                  "filters": ["complete"], "max_pages": max_pages}
+        pipeline = Pipeline.from_config(config)
+        try:
+            planner = QueryPlanner(pipeline)
+            state, first_html = pipeline.search(last_name)
+            records = [record for _, _, page in planner.crawl(state, first_html) for record in page]
+            plan = planner.plan_surnames([last_name, last_name + "SON"])
+            return records, plan, pipeline.truncated
+        finally:
+            pipeline.close()
+
+
+def test_trie_roots():
+    trie = SurnameTrie(["SMITHSON", "JONES", "SMITH", "JONESY", "SMYTHE"])
+    assert trie.roots() == ["JONES", "SMITH", "SMYTHE"]
+
+
+def test_broad_prefix_split_into_exact_and_longer_prefixes():
+    site = ReplaySite(records={"SMITH": 600})
+    records, plan, truncated = planner_crawl(site, "SMITH", max_pages=50)
+
+    # 60 页超过上限：拆成 SMITH 精确匹配 + SMITHS* / SMITHE* 等，全部记录都抓到
+    assert truncated == []
+    assert len(records) == 600
+    assert sorted(record["Full_Name"] for record in records) == sorted(
+        person.full_name for person in generate_decedents("SMITH", 600))
+    queries = plan["SMITH"]
+    assert [(query.state.last_name, query.state.fields["nlOpt"]) for query in queries][0] == ("SMITH", "1")
+    assert all(query.pages <= 50 for query in queries)
+    assert sum(query.total for query in queries) == 600
+
+
+def test_prefix_within_limit_is_one_query():
+    site = ReplaySite(records={"SMITH": 600})
+    records, plan, truncated = planner_crawl(site, "SMITH", max_pages=100)
+    assert len(records) == 600 and truncated == []
+    assert [query.total for query in plan["SMITH"]] == [600]
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(0)
+        self.acquired = 0
+
+    def acquire(self):
+        self.acquired += 1
+
+
+def test_probe_searches_are_rate_limited():
+    site = ReplaySite(records={"SMITH": 600})
+    limiter = CountingLimiter()
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "filters": ["complete"], "max_pages": 50}
+        pipeline = Pipeline.from_config(config, rate_limiter=limiter)
+        try:
+            planner = QueryPlanner(pipeline)
+            state, first_html = pipeline.search("SMITH")
+            assert len([page for page in planner.crawl(state, first_html)]) > planner.probes > 1
+        finally:
+            pipeline.close()
+    # 每个请求（包括查询计划的探测搜索）都先经过限速器；回放网站的首页请求是搜索表单，不单独限速
+    assert limiter.acquired == sum(site.requests.values()) - site.requests.get("landing", 0)
+
+
+def test_year_over_limit_is_split_by_name():
+    site = ReplaySite(records={"SMITH": 600})
+    base = site._decedents("SMITH")
+    # 1990 年出生的记录特别多：按年份拆分后该年份仍超过 max_pages
+    extra = [base[0]._replace(last_name=f"SMITH{letter}", first_name=f"EXTRA {i}", birth="06/15/1990")
+             for letter in "ABCDEFGH" for i in range(10)]
+    people = sorted(base + extra, key=lambda person: (person.full_name, person.birth))
+    site._decedents = lambda surname: people
+    with ReplayServer(site) as server:
+        config = {"base_url": server.base_url, "backend": "http", "requests_per_second": 0, "dedup": False,
+                  "filters": ["complete", "min_birth_year"], "min_birth_year": 1980, "max_pages": 5}
+        pipeline = Pipeline.from_config(config)
+        try:
+            state, first_html = pipeline.search("SMITH")
+            crawled = list(QueryPlanner(pipeline).crawl(state, first_html))
+        finally:
+            pipeline.close()
+
+    names = sorted(record["Full_Name"] for _, _, records in crawled for record in records)
+    assert names == sorted(person.full_name for person in people if int(person.birth_year) >= 1980)
+    assert pipeline.truncated == [] and pipeline.failed_pages == []
+    assert any(sub_state.birth_year == "1990" and sub_state.last_name == "SMITHA" for sub_state, _, _ in crawled)
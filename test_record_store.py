@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from gravelocator import RecordStore, parse_results
+
+
+def load_records():
+    with open("debug_page.html", encoding="utf-8") as f:
+        return [record.to_dict() for record in parse_results(f.read())]
+
+
+def test_store_round_trip():
+    records = load_records()
+    store = RecordStore()
+    store.write_page(records[:4])
+    store.write_page(records[4:])
+    assert len(store) == len(records)
+    assert list(store) == records
+    assert store[-1] == records[-1]
+    # 每个墓地只保存一次
+    assert len(store.categories("Cemetery")) == len({record["Cemetery"] for record in records})
+
+
+def test_store_exports_without_copying(tmp_path):
+    pytest.importorskip("pandas")
+    pq = pytest.importorskip("pyarrow.parquet")
+    records = load_records() + [{"Full_Name": "SMITH, JOHN", "Birth_Date": None}]
+    store = RecordStore(records)
+
+    df = store.to_pandas()
+    assert str(df["Cemetery"].dtype) == "category"
+    assert df["Death_Date"].iloc[2] == np.datetime64("1968-05-30")
+    assert df["Birth_Date"].isna().iloc[-1]
+    assert np.shares_memory(df["Location_ID"].to_numpy(), np.frombuffer(store._columns["Location_ID"], np.int64))
+    # DataFrame 引用缓冲区期间不能追加，且追加失败不破坏存储
+    with pytest.raises(BufferError):
+        store.append(records[0])
+    del df
+    assert len(store) == len(records) and list(store)[:-1] == records[:-1]
+    assert store[-1]["Cemetery"] == "" and store[-1]["Birth_Year"] == 0
+
+    table = pq.read_table(store.write_parquet(str(tmp_path / "records.parquet")))
+    assert table.column("Location_ID").to_pylist() == [record.get("Location_ID", 0) for record in records]
+    assert table.column("Birth_Date").to_pylist()[-1] is None
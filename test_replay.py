@@ -0,0 +1,56 @@
+import csv
+
+from gravelocator import HttpFetcher, PageScheduler, SearchState, parse_results
+from gravelocator.replay import ReplayServer, ReplaySite
+
+
+def test_http_fetcher_crawls_replay_site():
+    site = ReplaySite(records={"SMITH": 95})
+    with ReplayServer(site) as server:
+        fetcher = HttpFetcher(base_url=server.base_url)
+        state = SearchState.for_last_name("smith")
+        first = fetcher.search(state)
+        state = SearchState.from_page(first)
+        assert state.total_pages == 10
+
+        scheduler = PageScheduler(fetcher, workers=3, rate=0)
+        pages = list(scheduler.crawl(state, first))
+        fetcher.close()
+
+    assert [page for page, _ in pages] == list(range(1, 11))
+    names = [record.full_name for _, page_html in pages for record in parse_results(page_html)]
+    assert names == [person.full_name for person in site.search(state)]
+    assert not scheduler.failed_pages
+
+
+def test_birth_year_and_exact_filters():
+    site = ReplaySite(records={"SMITH": 300})
+    state = SearchState.for_last_name("SMITH")
+    exact = site.search(state.copy(nlOpt="1"))
+    assert exact and all(person.last_name == "SMITH" for person in exact)
+    assert len(exact) < len(site.search(state))
+
+    page_html = site.render_results(state.copy(pyb=1950))
+    assert all(record.birth_year == 1950 for record in parse_results(page_html))
+    assert 'id="err-msg"' in site.render_results(SearchState.for_last_name("NOBODY"))
+
+
+def test_scraper_end_to_end(tmp_path, monkeypatch):
+    import main
+    from config import CONFIG
+
+    with ReplayServer(ReplaySite(records={"SMITH": 120})) as server:
+        monkeypatch.setitem(CONFIG, "base_url", server.base_url)
+        monkeypatch.setitem(CONFIG, "requests_per_second", 0)
+        monkeypatch.setitem(CONFIG, "export_excel", False)
+        scraper = main.VeteransGravesiteScraper(CONFIG, backend="http")
+        try:
+            assert main.scrape_to_files(scraper, "SMITH", str(tmp_path / "veterans"), max_pages=50,
+                                        min_birth_year=1980)
+        finally:
+            scraper.close()
+
+    with open(tmp_path / "veterans.csv", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == scraper.record_count > 0
+    assert all(int(row["Birth_Year"]) >= 1980 for row in rows)
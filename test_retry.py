@@ -0,0 +1,159 @@
+import time
+
+import pytest
+
+from gravelocator import (BirthYearFilter, CircuitBreaker, CircuitOpenError, FetchError, HttpFetcher,
+                          IncompletePageError, PageScheduler, Pipeline, RetryPolicy, SearchState, call_with_retry,
+                          error_category, timings)
+from gravelocator.fetchers import FallbackFetcher
+from gravelocator.replay import ReplayServer, ReplaySite
+from test_scheduler import TOTAL_PAGES, FakeFetcher, make_page
+
+
+class FlakyFetcher(FakeFetcher):
+    """指定的页前 failures[page] 次返回不完整的页面"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = dict(failures)
+
+    def fetch_page(self, url):
+        page_html = super().fetch_page(url)
+        page = self.fetched[-1]
+        if self.failures.get(page):
+            self.failures[page] -= 1
+            raise IncompletePageError(f"结果页不完整: {page}")
+        return page_html
+
+
+def test_retry_policy_and_circuit_breaker():
+    policy = RetryPolicy(attempts=3, base_delay=1.0, max_delay=3.0, jitter=0.5)
+    assert 0.5 <= policy.delay(1) <= 1.0 and 1.0 <= policy.delay(2) <= 2.0 and 1.5 <= policy.delay(5) <= 3.0
+    assert policy.should_retry("timeout", 1) and not policy.should_retry("timeout", 3)
+    assert not policy.should_retry("http_4xx", 1)
+    assert error_category(IncompletePageError("x")) == "empty_table"
+
+    breaker = CircuitBreaker(threshold=2, reset_after=0.05)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise TimeoutError("timed out")
+
+    for _ in range(2):
+        with pytest.raises(TimeoutError):
+            call_with_retry(failing, breaker=breaker)
+    # 打开后不再发出请求
+    with pytest.raises(CircuitOpenError):
+        call_with_retry(failing, breaker=breaker)
+    assert len(calls) == 2 and breaker.is_open
+    # 冷却结束后放行一个试探请求，成功即关闭
+    time.sleep(0.06)
+    assert call_with_retry(lambda: "ok", breaker=breaker) == "ok"
+    assert not breaker.is_open
+
+
+def test_trial_request_with_other_failure_releases_breaker():
+    def failing(error):
+        def request():
+            raise error
+        return request
+
+    breaker = CircuitBreaker(threshold=1, reset_after=0.02)
+    with pytest.raises(TimeoutError):
+        call_with_retry(failing(TimeoutError("timed out")), breaker=breaker)
+    time.sleep(0.03)
+    # 试探请求以不计入熔断器的失败（表单缺失）结束，下一个请求仍可以试探
+    with pytest.raises(FetchError):
+        call_with_retry(failing(FetchError("搜索表单缺失")), breaker=breaker)
+    assert call_with_retry(lambda: "ok", breaker=breaker) == "ok"
+    assert not breaker.is_open
+
+
+def test_auto_backend_retries_page_errors_over_http():
+    fallbacks = []
+    fetcher = FallbackFetcher(FlakyFetcher({4: 1, 9: 1}), lambda: fallbacks.append(1))
+    first = make_page(1)
+    scheduler = PageScheduler(fetcher, workers=3, rate=0, retry=RetryPolicy(attempts=3, base_delay=0))
+    pages = [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)]
+    assert pages == list(range(1, TOTAL_PAGES + 1))
+    assert not fallbacks and not scheduler.failed_pages
+
+
+def test_single_search_timeout_is_retried_without_fallback():
+    class SlowOnceFetcher(FakeFetcher):
+        name = "http"
+        timeouts = 1
+
+        def search(self, state):
+            if self.timeouts:
+                self.timeouts -= 1
+                raise FetchError("搜索超时") from TimeoutError()
+            return make_page(1)
+
+    fallbacks = []
+    fetcher = FallbackFetcher(SlowOnceFetcher(), lambda: fallbacks.append(1))
+    scheduler = PageScheduler(fetcher, rate=0, retry=RetryPolicy(attempts=3, base_delay=0))
+    assert scheduler.open_search(SearchState.for_last_name("SMITH")) == make_page(1)
+    assert not fallbacks and fetcher.concurrent
+
+    # 重试策略放弃（3次都超时）后才改用备用后端
+    primary = SlowOnceFetcher()
+    primary.timeouts = 3
+    browser = SlowOnceFetcher()
+    browser.timeouts = 0
+    fetcher = FallbackFetcher(primary, lambda: fallbacks.append(browser) or browser)
+    scheduler = PageScheduler(fetcher, rate=0, retry=RetryPolicy(attempts=3, base_delay=0))
+    assert scheduler.open_search(SearchState.for_last_name("SMITH")) == make_page(1)
+    assert fallbacks == [browser] and primary.timeouts == 0
+
+
+def test_transient_failures_are_retried_and_persistent_ones_requeued():
+    timings.reset()
+    fetcher = FlakyFetcher({4: 1, 9: 2, 12: 5})
+    first = make_page(1)
+    scheduler = PageScheduler(fetcher, workers=3, rate=0, retry=RetryPolicy(attempts=3, base_delay=0))
+    pages = [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)]
+
+    # 4、9 页重试后成功；12 页三次都失败，记入 failed_pages，其余页不受影响
+    assert pages == [page for page in range(1, TOTAL_PAGES + 1) if page != 12]
+    assert [page for _, page in scheduler.failed_pages] == [12]
+    assert timings.counter("retries", reason="empty_table") == 1 + 2 + 2
+
+    refetched = [page for _, page, _ in scheduler.refetch(scheduler.failed_pages[:])]
+    assert refetched == [12] and fetcher.failures[12] == 0
+
+
+class FailingYearFetcher(HttpFetcher):
+    def __init__(self, base_url, year):
+        super().__init__(base_url=base_url)
+        self.year = year
+
+    def fetch_page(self, url):
+        # 已知第1页 token 时年份搜索直接 GET 第1页
+        page_html = super().fetch_page(url)
+        state = SearchState.from_page(page_html)
+        if state.birth_year == self.year and state.fields["pn"] == "1":
+            raise FetchError("搜索表单缺失")
+        return page_html
+
+
+def test_failed_year_search_is_recorded_and_requeued():
+    site = ReplaySite(records={"SMITH": 600})
+    with ReplayServer(site) as server:
+        fetcher = FailingYearFetcher(server.base_url, "1995")
+        pipeline = Pipeline(fetcher, filters=[BirthYearFilter(1990)], rate=0, requeue=False,
+                            retry=RetryPolicy(base_delay=0))
+        try:
+            state, first_html = pipeline.search("SMITH")
+            records = [record for _, _, page in pipeline.crawl(state, first_html) for record in page]
+            assert [(failed.birth_year, page) for failed, page in pipeline.failed_pages] == [("1995", 1)]
+
+            fetcher.year = None
+            records += [record for _, _, page in pipeline.retry_failed() for record in page]
+            assert pipeline.failed_pages == []
+        finally:
+            pipeline.close()
+
+    expected = [person for person in site.search(SearchState.for_last_name("SMITH")) if int(person.birth_year) >= 1990]
+    assert len(records) == len(expected) > 0
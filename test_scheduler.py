@@ -0,0 +1,142 @@
+import re
+import threading
+import time
+
+import pytest
+
+from gravelocator import AdaptiveRateLimiter, FetchError, IncompletePageError, PageScheduler, SearchState
+from gravelocator.fetchers import FallbackFetcher, PageFetcher
+from gravelocator.search import extract_page_token
+
+
+with open("debug_page.html", encoding="utf-8") as f:
+    DEBUG_PAGE = f.read()
+
+TOTAL_PAGES = 25
+
+
+def make_page(page):
+    """第 page 页：分页导航显示前后若干页，与网站的滑动窗口类似"""
+    nav = "".join(
+        f'<a aria-label="Goto Page TOK{other}=" href="https://x/ngl/result/TOK{other}=">{other}</a>'
+        for other in range(max(1, page - 4), min(TOTAL_PAGES, page + 9) + 1) if other != page)
+    page_html = re.sub(r'<nav id="pagination".*?</nav>', f'<nav id="pagination">{nav}</nav>', DEBUG_PAGE, flags=re.S)
+    page_html = page_html.replace("Displaying 1 to 10", f"Displaying {(page - 1) * 10 + 1} to {page * 10}")
+    return page_html.replace('"nfp":"Mjcx"', '"nfp":"MjU="')
+
+
+class FakeFetcher(PageFetcher):
+    concurrent = True
+
+    def __init__(self):
+        super().__init__()
+        self.fetched = []
+
+    def fetch_page(self, url):
+        page = int(extract_page_token(url)[3:-1])
+        self.fetched.append(page)
+        return make_page(page)
+
+
+def test_crawl_yields_all_pages_in_order():
+    fetcher = FakeFetcher()
+    first = make_page(1)
+    scheduler = PageScheduler(fetcher, workers=3, rate=0)
+    pages = [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)]
+    assert pages == list(range(1, TOTAL_PAGES + 1))
+    assert sorted(fetcher.fetched) == list(range(2, TOTAL_PAGES + 1))
+
+
+def test_crawl_respects_max_pages():
+    first = make_page(1)
+    scheduler = PageScheduler(FakeFetcher(), workers=3, rate=0, max_pages=5)
+    assert [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)] == [1, 2, 3, 4, 5]
+
+
+def test_resume_skips_completed_pages():
+    fetcher = FakeFetcher()
+    first = make_page(1)
+    scheduler = PageScheduler(fetcher, workers=3, rate=0, completed=lambda state: set(range(1, 18)))
+    pages = [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)]
+    assert pages == list(range(18, TOTAL_PAGES + 1))
+    # 只重新抓取了一个已完成的页来发现后续链接
+    assert len(fetcher.fetched) == len(pages) + 1
+
+
+def test_no_birth_year_split_without_lower_bound():
+    fetcher = FakeFetcher()
+    first = make_page(1)
+    state = SearchState.from_page(first)
+    scheduler = PageScheduler(fetcher, workers=3, rate=0)
+    # 年份区间 0-10 少于页数，但没有出生年份下限时不应按年份逐年搜索
+    crawled = list(scheduler.crawl_by_birth_year(state, first, 0, max_year=10))
+    assert [page for _, page, _ in crawled] == list(range(1, TOTAL_PAGES + 1))
+    assert all(sub_state is state for sub_state, _, _ in crawled)
+    assert scheduler.failed_pages == []
+    # 没有为年份搜索去学第1页的 token，也没有打开任何年份的搜索
+    assert sorted(fetcher.fetched) == list(range(2, TOTAL_PAGES + 1))
+
+
+def test_adaptive_rate_limiter():
+    limiter = AdaptiveRateLimiter(4.0, slow_after=1.0)
+    limiter.record(2.0)
+    assert limiter.rate == 2.0
+    limiter.record(0.1, ok=False)
+    assert limiter.rate == 1.0
+    for _ in range(100):
+        limiter.record(0.1)
+    assert limiter.rate == 4.0
+
+
+def test_fallback_only_when_search_fails():
+    class BrokenFetcher(FakeFetcher):
+        name = "http"
+
+        def search(self, state):
+            raise FetchError("搜索表单缺失")
+
+        def fetch_page(self, url):
+            raise IncompletePageError("结果页不完整")
+
+    class BrowserFetcher(FakeFetcher):
+        def search(self, state):
+            return make_page(1)
+
+    created = []
+    fetcher = FallbackFetcher(BrokenFetcher(), lambda: created.append(BrowserFetcher()) or created[-1])
+    # 结果页出错不切换后端，交给重试处理
+    with pytest.raises(IncompletePageError):
+        fetcher.fetch_page("https://x/ngl/result/TOK4=")
+    # 搜索失败先交给调用方的重试策略，放弃后才切换
+    with pytest.raises(FetchError):
+        fetcher.search(SearchState.for_last_name("SMITH"))
+    assert not created
+    scheduler = PageScheduler(fetcher, rate=0)
+    assert scheduler.open_search(SearchState.for_last_name("SMITH")) == make_page(1)
+    assert fetcher.active is created[0] and len(created) == 1
+
+
+def test_requests_serialized_after_switching_to_browser():
+    class BrowserFetcher(FakeFetcher):
+        def __init__(self):
+            super().__init__()
+            self.lock = threading.Lock()
+            self.active = self.most_active = 0
+
+        def fetch_page(self, url):
+            with self.lock:
+                self.active += 1
+                self.most_active = max(self.most_active, self.active)
+            time.sleep(0.005)
+            with self.lock:
+                self.active -= 1
+            return super().fetch_page(url)
+
+    fetcher = BrowserFetcher()
+    first = make_page(1)
+    scheduler = PageScheduler(fetcher, workers=4, rate=0)
+    # 创建调度器之后 auto 后端退回了浏览器
+    fetcher.concurrent = False
+    pages = [page for page, _ in scheduler.crawl(SearchState.from_page(first), first)]
+    assert pages == list(range(1, TOTAL_PAGES + 1))
+    assert fetcher.most_active == 1
@@ -0,0 +1,54 @@
+from gravelocator import SearchState, birth_year_states, page_links, next_page_url, result_summary, total_pages
+from gravelocator.fetchers import parse_search_form
+
+
+BASE_URL = "https://gravelocator.cem.va.gov/ngl"
+
+
+def load_debug_page():
+    with open("debug_page.html", encoding="utf-8") as f:
+        return f.read()
+
+
+def test_session_state_round_trip():
+    state = SearchState.from_page(load_debug_page())
+    assert state.last_name == "MICHAEL"
+    assert state.fields["nlOpt"] == "2"
+    assert state.total_pages == 271
+    assert SearchState.from_session_json(state.to_session_json()).fields == state.fields
+    assert state.to_session_json().startswith('{"nl":"TUlDSEFFTA==","nlOpt":"Mg==","nf":""')
+
+
+def test_pagination_links():
+    page_html = load_debug_page()
+    state = SearchState.from_page(page_html)
+    links = page_links(page_html, state, BASE_URL)
+    assert sorted(links) == list(range(2, 11))
+    assert links[2].startswith(BASE_URL + "/result/WnZOfk5LLywivlA0DgJMnQ==/%7B%22nl%22:%22TUlDSEFFTA==%22")
+    assert next_page_url(page_html, state, BASE_URL) == links[2]
+
+
+def test_search_form():
+    landing = ('<form action="search" method="post"><input type="hidden" name="csrf" value="x">'
+               '<input id="lname" name="lastName"><select id="lnameopt" name="lastNameOpt">'
+               '<option value="1" selected>exact</option><option value="2">begins</option></select></form>')
+    action, method, fields, ids = parse_search_form(landing, BASE_URL + "/")
+    assert action == BASE_URL + "/search"
+    assert method == "post"
+    assert fields == {"csrf": "x", "lastName": "", "lastNameOpt": "1"}
+    assert ids == {"lname": "lastName", "lnameopt": "lastNameOpt"}
+
+
+def test_result_summary():
+    page_html = load_debug_page()
+    assert result_summary(page_html) == (1, 10, 2710)
+    assert total_pages(page_html) == 271
+    assert total_pages(page_html, SearchState.from_page(page_html)) == 271
+
+
+def test_birth_year_states():
+    state = SearchState.from_page(load_debug_page())
+    states = birth_year_states(state, 1980, 1982)
+    assert [s.birth_year for s in states] == ["1980", "1981", "1982"]
+    assert all(s.total_pages == 0 and s.last_name == "MICHAEL" for s in states)
+    assert '"pyb":"MTk4MA=="' in states[0].to_session_json()
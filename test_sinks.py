@@ -0,0 +1,50 @@
+import csv
+
+import pytest
+
+from gravelocator.sinks import CsvSink, ParquetSink, create_sink, extract_name_parts
+
+
+def make_page(start, count=10):
+    return [{'Full_Name': f"SMITH, JOHN {i}", 'Rank_Branch': "SGT US ARMY",
+             'Date_of_Birth': "01/17/1985", 'Birth_Year': 1985} for i in range(start, start + count)]
+
+
+def test_extract_name_parts():
+    assert extract_name_parts("MICHAEL, BERNARD EDWARD") == ("MICHAEL", "BERNARD EDWARD")
+    assert extract_name_parts(" MICHAEL ") == ("MICHAEL", "")
+
+
+def test_csv_sink_flushes_each_page(tmp_path):
+    path = tmp_path / "out" / "veterans.csv"
+    sink = CsvSink(str(path))
+    sink.write_page(make_page(0))
+    # 未关闭时已写入的页在文件中可见（模拟中途崩溃）
+    with open(path, encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 10
+    assert rows[0]['Last_Name'] == "SMITH" and rows[0]['First_Name'] == "JOHN 0"
+    sink.write_page(make_page(10))
+    sink.close()
+    with open(path, encoding="utf-8") as f:
+        assert len(list(csv.DictReader(f))) == 20
+
+
+def test_parquet_sink(tmp_path):
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "veterans.parquet"
+    with ParquetSink(str(path), row_group_size=15) as sink:
+        for start in range(0, 40, 10):
+            sink.write_page(make_page(start))
+    table = pq.read_table(str(path))
+    assert table.num_rows == 40
+    assert table.column('Birth_Year').to_pylist()[0] == 1985
+
+
+def test_create_sink_multiple_formats(tmp_path):
+    pytest.importorskip("pyarrow")
+    base = str(tmp_path / "veterans")
+    with create_sink(base, ["csv", "parquet"]) as sink:
+        sink.write_page(make_page(0))
+    assert (tmp_path / "veterans.csv").exists()
+    assert (tmp_path / "veterans.parquet").exists()